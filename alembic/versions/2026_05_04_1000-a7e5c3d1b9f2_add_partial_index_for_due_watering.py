@@ -0,0 +1,35 @@
+"""add_partial_index_for_due_watering
+
+Revision ID: a7e5c3d1b9f2
+Revises: f3c2b7a91d4e
+Create Date: 2026-05-04 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7e5c3d1b9f2"
+down_revision: str | None = "f3c2b7a91d4e"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+INDEX_NAME = "ix_garden_plants_due_watering"
+
+
+def upgrade() -> None:
+    op.create_index(
+        INDEX_NAME,
+        "garden_plants",
+        ["next_watering_at"],
+        postgresql_where=sa.text("notifications_enabled"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name="garden_plants")
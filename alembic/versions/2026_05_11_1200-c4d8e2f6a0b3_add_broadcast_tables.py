@@ -0,0 +1,62 @@
+"""add_broadcast_tables
+
+Revision ID: c4d8e2f6a0b3
+Revises: a7e5c3d1b9f2
+Create Date: 2026-05-11 12:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4d8e2f6a0b3"
+down_revision: str | None = "a7e5c3d1b9f2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    broadcast_status_enum = sa.Enum("RUNNING", "PAUSED", "FINISHED", "CANCELLED", name="broadcaststatus")
+    broadcast_outcome_enum = sa.Enum("SENT", "BLOCKED", "DEACTIVATED", "FAILED", name="broadcastoutcome")
+
+    op.create_table(
+        "broadcast_jobs",
+        sa.Column("admin_chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("progress_message_id", sa.BigInteger(), nullable=True),
+        sa.Column("text", sa.Text(), nullable=True),
+        sa.Column("photo_file_id", sa.Text(), nullable=True),
+        sa.Column("status", broadcast_status_enum, nullable=False),
+        sa.Column("cursor_tg_id", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("total", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("sent", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("blocked", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("failed", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "broadcast_recipients",
+        sa.Column("job_id", sa.Integer(), nullable=False),
+        sa.Column("user_tg_id", sa.BigInteger(), nullable=False),
+        sa.Column("outcome", broadcast_outcome_enum, nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["job_id"], ["broadcast_jobs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("job_id", "user_tg_id", name="uq_broadcast_recipients_job_user"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("broadcast_recipients")
+    op.drop_table("broadcast_jobs")
+    sa.Enum(name="broadcastoutcome").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="broadcaststatus").drop(op.get_bind(), checkfirst=True)
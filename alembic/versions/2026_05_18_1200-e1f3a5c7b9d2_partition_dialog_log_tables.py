@@ -0,0 +1,145 @@
+"""partition_dialog_log_tables
+
+Revision ID: e1f3a5c7b9d2
+Revises: c4d8e2f6a0b3
+Create Date: 2026-05-18 12:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+from datetime import UTC, date, datetime
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1f3a5c7b9d2"
+down_revision: str | None = "c4d8e2f6a0b3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+MONTHS_AHEAD = 3
+
+TABLE_COLUMNS = {
+    "user_request_logs": (
+        "user_tg_id BIGINT NOT NULL REFERENCES users (tg_id) ON DELETE CASCADE, "
+        "request_text TEXT NOT NULL"
+    ),
+    "bot_response_logs": (
+        "user_tg_id BIGINT NOT NULL REFERENCES users (tg_id) ON DELETE CASCADE, "
+        "user_request_log_id INTEGER, "
+        "response_text TEXT NOT NULL"
+    ),
+}
+COPY_COLUMNS = {
+    "user_request_logs": "id, created_at, user_tg_id, request_text",
+    "bot_response_logs": "id, created_at, user_tg_id, user_request_log_id, response_text",
+}
+OLD_INDEXES = {
+    "user_request_logs": ["ix_user_request_logs_user_tg_id"],
+    "bot_response_logs": ["ix_bot_response_logs_user_tg_id", "ix_bot_response_logs_user_request_log_id"],
+}
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _months_to_create(oldest: datetime | None) -> list[date]:
+    current = datetime.now(UTC).date().replace(day=1)
+    month = oldest.astimezone(UTC).date().replace(day=1) if oldest is not None else current
+    last = _add_months(current, MONTHS_AHEAD)
+    months = []
+    while month <= last:
+        months.append(month)
+        month = _add_months(month, 1)
+    return months
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for table, columns in TABLE_COLUMNS.items():
+        legacy = f"{table}_unpartitioned"
+        op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        op.execute(f"ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey")
+        for index_name in OLD_INDEXES[table]:
+            op.execute(f"ALTER INDEX {index_name} RENAME TO {index_name}_unpartitioned")
+        # Keep the id sequence (the write-behind log writer reserves ids from it) when the old table goes.
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+
+        op.execute(
+            f"CREATE TABLE {table} ("
+            f"id INTEGER NOT NULL DEFAULT nextval('{table}_id_seq'), "
+            "created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(), "
+            f"{columns}, "
+            f"CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)"
+            ") PARTITION BY RANGE (created_at)"
+        )
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        # Indexes on the parent are created on every partition (partition-local indexes).
+        op.create_index(f"ix_{table}_user_tg_id_created_at", table, ["user_tg_id", "created_at"])
+        if table == "bot_response_logs":
+            op.create_index(op.f("ix_bot_response_logs_user_request_log_id"), table, ["user_request_log_id"])
+
+        oldest = bind.execute(sa.text(f"SELECT min(created_at) FROM {legacy}")).scalar()  # noqa: S608
+        for month in _months_to_create(oldest):
+            upper = _add_months(month, 1)
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+            )
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+        op.execute(
+            f"INSERT INTO {table} ({COPY_COLUMNS[table]}) "  # noqa: S608
+            f"SELECT {COPY_COLUMNS[table]} FROM {legacy}"
+        )
+    # The old response table references the old request table, so it goes first.
+    op.execute("DROP TABLE bot_response_logs_unpartitioned")
+    op.execute("DROP TABLE user_request_logs_unpartitioned")
+
+
+def downgrade() -> None:
+    for table in ("bot_response_logs", "user_request_logs"):
+        partitioned = f"{table}_partitioned"
+        op.execute(f"ALTER TABLE {table} RENAME TO {partitioned}")
+        op.execute(f"ALTER TABLE {partitioned} RENAME CONSTRAINT {table}_pkey TO {partitioned}_pkey")
+        op.execute(f"ALTER INDEX ix_{table}_user_tg_id_created_at RENAME TO ix_{partitioned}_user_tg_id_created_at")
+        if table == "bot_response_logs":
+            op.execute(
+                "ALTER INDEX ix_bot_response_logs_user_request_log_id "
+                "RENAME TO ix_bot_response_logs_partitioned_user_request_log_id"
+            )
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+
+    for table in ("user_request_logs", "bot_response_logs"):
+        columns = TABLE_COLUMNS[table]
+        if table == "bot_response_logs":
+            columns += ", FOREIGN KEY (user_request_log_id) REFERENCES user_request_logs (id) ON DELETE SET NULL"
+        op.execute(
+            f"CREATE TABLE {table} ("
+            f"id INTEGER NOT NULL DEFAULT nextval('{table}_id_seq'), "
+            "created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(), "
+            f"{columns}, "
+            f"CONSTRAINT {table}_pkey PRIMARY KEY (id))"
+        )
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        source_columns = COPY_COLUMNS[table]
+        if table == "bot_response_logs":
+            # Requests of archived partitions are gone; their responses lose the link instead of the FK failing.
+            source_columns = source_columns.replace(
+                "user_request_log_id",
+                "CASE WHEN user_request_log_id IN (SELECT id FROM user_request_logs) THEN user_request_log_id END",
+            )
+        op.execute(
+            f"INSERT INTO {table} ({COPY_COLUMNS[table]}) "  # noqa: S608
+            f"SELECT {source_columns} FROM {table}_partitioned"
+        )
+        for index_name in OLD_INDEXES[table]:
+            column = "user_request_log_id" if index_name.endswith("user_request_log_id") else "user_tg_id"
+            op.create_index(index_name, table, [column])
+
+    for table in ("bot_response_logs", "user_request_logs"):
+        op.execute(f"DROP TABLE {table}_partitioned")
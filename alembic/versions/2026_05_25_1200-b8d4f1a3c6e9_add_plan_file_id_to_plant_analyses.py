@@ -0,0 +1,27 @@
+"""add_plan_file_id_to_plant_analyses
+
+Revision ID: b8d4f1a3c6e9
+Revises: e1f3a5c7b9d2
+Create Date: 2026-05-25 12:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b8d4f1a3c6e9"
+down_revision: str | None = "e1f3a5c7b9d2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("plant_analyses", sa.Column("plan_file_id", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("plant_analyses", "plan_file_id")
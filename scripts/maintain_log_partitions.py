@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Maintain monthly partitions of user_request_logs / bot_response_logs.
+
+Creates partitions for the coming months and retires partitions older than the retention window:
+they are detached, dumped to <archive-dir>/<partition>.csv.gz and dropped. Run it daily from cron.
+
+Usage:
+  python scripts/maintain_log_partitions.py --months-ahead 3 --retain-months 6 --archive-dir archive/dialog_logs
+  python scripts/maintain_log_partitions.py --retain-months 6 --no-archive --keep-detached
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from datetime import UTC, datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from bot.config import get_settings  # noqa: E402
+from database.database_connector import get_db  # noqa: E402
+from database.partitions import ensure_partitions, retire_partitions  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Create future and retire old dialog log partitions")
+    parser.add_argument("--months-ahead", type=int, default=3, help="Partitions to keep ready after this month")
+    parser.add_argument(
+        "--retain-months",
+        type=int,
+        default=None,
+        help="Months to keep attached before the current one; omit to keep everything",
+    )
+    parser.add_argument("--archive-dir", type=Path, default=ROOT / "archive" / "dialog_logs")
+    parser.add_argument("--no-archive", action="store_true", help="Retire partitions without dumping them")
+    parser.add_argument("--keep-detached", action="store_true", help="Leave retired partitions as plain tables")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    db = get_db(get_settings())
+    today = datetime.now(UTC).date()
+    try:
+        async with db.engine.begin() as conn:
+            created = await ensure_partitions(conn, today, args.months_ahead)
+        print(f"Created partitions: {', '.join(created) or 'none'}")  # noqa: T201
+        if args.retain_months is not None:
+            async with db.engine.begin() as conn:
+                retired = await retire_partitions(
+                    conn,
+                    today,
+                    args.retain_months,
+                    None if args.no_archive else args.archive_dir,
+                    drop=not args.keep_detached,
+                )
+            print(f"Retired partitions: {', '.join(retired) or 'none'}")  # noqa: T201
+    finally:
+        await db.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,190 @@
+import asyncio
+import heapq
+import logging
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from time import monotonic
+
+from bot.internal.enums import AIPriority
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 3
+IMAGE_INPUT_TOKENS = 1000
+
+
+class AIBusyError(Exception):
+    """The AI request was not admitted: the queue is full or its deadline passed while waiting."""
+
+    def __init__(self, message: str = "AI is busy", retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(text: str, *, images: int = 0, output_tokens: int = 0) -> int:
+    return len(text) // CHARS_PER_TOKEN + images * IMAGE_INPUT_TOKENS + output_tokens
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class AIPermit:
+    def __init__(self, admission: "AIAdmission", tokens: int) -> None:
+        self._admission = admission
+        self.tokens = tokens
+
+    def settle(self, used_tokens: int | None) -> None:
+        """Replace the estimate with the tokens the response actually used."""
+        if used_tokens is None:
+            return
+        self._admission.charge_tokens(used_tokens - self.tokens)
+        self.tokens = used_tokens
+
+
+class AIAdmission:
+    """
+    Admission control in front of OpenAI: at most `max_concurrency` requests in flight, `rpm` requests and
+    `tpm` (estimated) tokens per minute, 0 meaning no limit. Waiting requests are served by priority, then
+    in arrival order; a request that cannot start within `queue_timeout` seconds, or finds `max_queue`
+    requests already waiting, gets AIBusyError. `pause` stops admissions for a while after a 429.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        max_concurrency: int = 8,
+        rpm: int = 0,
+        tpm: int = 0,
+        queue_timeout: float = 20.0,
+        max_queue: int = 100,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.clock = clock
+        self.configure(
+            max_concurrency=max_concurrency, rpm=rpm, tpm=tpm, queue_timeout=queue_timeout, max_queue=max_queue
+        )
+        self.in_flight = 0
+        self.queued = 0
+        self._waiters: list[_Waiter] = []
+        self._seq = 0
+        self._paused_until = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+
+    def configure(self, *, max_concurrency: int, rpm: int, tpm: int, queue_timeout: float, max_queue: int) -> None:
+        self.max_concurrency = max_concurrency
+        self.rpm = rpm
+        self.tpm = tpm
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated_at = self.clock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _start_delay(self, tokens: int) -> float | None:
+        """Seconds until a request of `tokens` may start; None while every concurrency slot is taken."""
+        if self.in_flight >= self.max_concurrency:
+            return None
+        now = self.clock()
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._refill(now)
+        delay = 0.0
+        if self.rpm and self._requests < 1:
+            delay = (1 - self._requests) * 60 / self.rpm
+        if self.tpm:
+            needed = min(tokens, self.tpm)
+            if self._tokens < needed:
+                delay = max(delay, (needed - self._tokens) * 60 / self.tpm)
+        return delay
+
+    def _take(self, tokens: int) -> None:
+        self.in_flight += 1
+        self._requests -= 1
+        self._tokens -= tokens
+
+    def charge_tokens(self, tokens: int) -> None:
+        if self.tpm:
+            self._tokens -= tokens
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, self.clock() + seconds)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters:
+            waiter = self._waiters[0]
+            if waiter.future.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._start_delay(waiter.tokens)
+            if delay is None:
+                return
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._take(waiter.tokens)
+            self.queued -= 1
+            waiter.future.set_result(None)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    async def _wait(self, priority: AIPriority, tokens: int) -> None:
+        if not self._waiters and self._start_delay(tokens) == 0:
+            self._take(tokens)
+            return
+        if self.queued >= self.max_queue:
+            logger.warning("ai admission rejected", extra={"priority": priority.name, "queued": self.queued})
+            raise AIBusyError("AI queue is full")
+        waiter = _Waiter(priority, self._seq, tokens, asyncio.get_running_loop().create_future())
+        self._seq += 1
+        self.queued += 1
+        heapq.heappush(self._waiters, waiter)
+        self._dispatch()
+        started_at = self.clock()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except BaseException as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # admitted at the same moment the deadline fired: give the slot back
+                self._release()
+            else:
+                waiter.future.cancel()
+                self.queued -= 1
+                self._dispatch()
+            if isinstance(e, TimeoutError):
+                logger.warning(
+                    "ai admission timed out",
+                    extra={"priority": priority.name, "queued": self.queued, "in_flight": self.in_flight},
+                )
+                raise AIBusyError("AI queue deadline passed", retry_after=self.queue_timeout) from e
+            raise
+        logger.info(
+            "ai admission waited",
+            extra={"priority": priority.name, "wait_seconds": round(self.clock() - started_at, 3)},
+        )
+
+    @asynccontextmanager
+    async def admit(self, priority: AIPriority = AIPriority.NORMAL, tokens: int = 0) -> AsyncIterator[AIPermit]:
+        await self._wait(priority, tokens)
+        try:
+            yield AIPermit(self, tokens)
+        finally:
+            self._release()
@@ -1,33 +1,56 @@
 import logging
 from asyncio import sleep
 from base64 import b64encode
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
 from http import HTTPStatus
+from io import BytesIO
 
 import openai
 from aiogram.types import Message
-from openai import AsyncOpenAI, BadRequestError
+from openai import AsyncOpenAI, BadRequestError, RateLimitError
+from openai.types.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.ai_admission import AIAdmission, AIBusyError, AIPermit, estimate_tokens
+from bot.internal.enums import AIPriority
 from database.models import User
 
 logger = logging.getLogger(__name__)
 
+PENDING_RESPONSE_STATUSES = {"queued", "in_progress"}
+BACKGROUND_POLL_INTERVAL = 1.0
+BACKGROUND_POLL_ATTEMPTS = 60
+RATE_LIMIT_PAUSE_SECONDS = 5.0
+IMAGE_RATE_LIMIT_REPLY = "Превышены лимиты запросов. Пожалуйста, попробуйте позже."
+IMAGE_ERROR_REPLY = "Ошибка при обработке изображения. Убедитесь, что файл корректного формата."
 
 
+def is_image_error_reply(text: str | None) -> bool:
+    """get_response_with_image answers API errors with these texts instead of raising."""
+    return text in {IMAGE_RATE_LIMIT_REPLY, IMAGE_ERROR_REPLY}
+
 
 class AIClient:
-    def __init__(
+    def __init__(  # noqa: PLR0913
             self,
             token: str,
             model: str,
             system_prompt: str | None = None,
             vector_store_id: str | None = None,
+            base_url: str | None = None,
+            admission: AIAdmission | None = None,
+            expected_output_tokens: int = 800,
     ):
-        self.client = AsyncOpenAI(api_key=token)
+        # base_url points the client at an OpenAI-compatible server, e.g. tests/fake_openai_server.py.
+        self.client = AsyncOpenAI(api_key=token, base_url=base_url)
         self._responses_api = getattr(self.client, "responses", None)
         self.model = model
         self.system_prompt = system_prompt
         self.vector_store_id = vector_store_id
+        # every OpenAI call goes through admission; AIBusyError reaches the handlers
+        self.admission = admission or AIAdmission()
+        self.expected_output_tokens = expected_output_tokens
 
     def _get_responses_api(self):
         if self._responses_api is None:
@@ -51,6 +74,22 @@ class AIClient:
             ]
         return options
 
+    @asynccontextmanager
+    async def _admitted(self, priority: AIPriority, tokens: int) -> AsyncIterator[AIPermit]:
+        async with self.admission.admit(priority, tokens) as permit:
+            try:
+                yield permit
+            except RateLimitError as e:
+                retry_after = RATE_LIMIT_PAUSE_SECONDS
+                with suppress(ValueError):
+                    retry_after = float(e.response.headers.get("retry-after", retry_after))
+                self.admission.pause(retry_after)
+                logger.warning("OpenAI rate limit, pausing admissions", extra={"retry_after": retry_after})
+                raise AIBusyError("OpenAI rate limit", retry_after=retry_after) from e
+
+    def _estimate(self, text: str, images: int = 0) -> int:
+        return estimate_tokens(text, images=images, output_tokens=self.expected_output_tokens)
+
     async def delete_thread(self, response_id: str):
         if not response_id.startswith("resp_"):
             return
@@ -77,7 +116,7 @@ class AIClient:
         fullname: str,
         retry: int = 0,
         max_retries: int = 3,
-    ) -> str | None:
+    ) -> Response | None:
         previous_response_id = self._normalize_previous_response_id(response_id)
         responses_api = self._get_responses_api()
         try:
@@ -97,7 +136,13 @@ class AIClient:
             )
             logger.info(
                 "external api response",
-                extra={"provider": "openai", "operation": "responses.create", "response_id": response.id},
+                extra={
+                    "provider": "openai",
+                    "operation": "responses.create",
+                    "response_id": response.id,
+                    "status": response.status,
+                    **self._usage_extra(response),
+                },
             )
 
         except BadRequestError as e:
@@ -109,7 +154,7 @@ class AIClient:
                 await sleep(2)
                 return await self._safe_create_message(None, content, message, fullname, retry + 1, max_retries)
             raise
-        return response.id
+        return response
 
     def _extract_latest_text_response(self, messages) -> str | None:
         for message in messages.data:
@@ -121,23 +166,47 @@ class AIClient:
                     return text.value
         return None
 
-    async def _run_thread_and_get_response(self, response_id: str) -> tuple[str | None, str]:
+    @staticmethod
+    def _usage_extra(response: Response) -> dict[str, int]:
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return {}
+        return {
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "total_tokens": usage.total_tokens,
+        }
+
+    async def _wait_for_response(self, response: Response) -> Response:
+        """Poll responses.retrieve only for background responses that are not finished yet."""
         responses_api = self._get_responses_api()
-        logger.info(
-            "external api request",
-            extra={"provider": "openai", "operation": "responses.retrieve", "response_id": response_id},
-        )
-        response = await responses_api.retrieve(response_id)
-        logger.info(
-            "external api response",
-            extra={"provider": "openai", "operation": "responses.retrieve", "response_id": response.id},
-        )
+        attempts = 0
+        while response.status in PENDING_RESPONSE_STATUSES and attempts < BACKGROUND_POLL_ATTEMPTS:
+            attempts += 1
+            await sleep(BACKGROUND_POLL_INTERVAL)
+            logger.info(
+                "external api request",
+                extra={"provider": "openai", "operation": "responses.retrieve", "response_id": response.id},
+            )
+            response = await responses_api.retrieve(response.id)
+            logger.info(
+                "external api response",
+                extra={
+                    "provider": "openai",
+                    "operation": "responses.retrieve",
+                    "response_id": response.id,
+                    "status": response.status,
+                },
+            )
+        return response
+
+    async def _get_response_text(self, response: Response) -> tuple[str | None, str]:
+        response = await self._wait_for_response(response)
         text_response = response.output_text
         if text_response:
-            logger.debug(f"Response {response_id} returned: {text_response[:100]}...")
+            logger.debug(f"Response {response.id} returned: {text_response[:100]}...")
         return text_response, response.id
 
-
     async def get_response( # noqa: PLR0913
         self,
         ai_thread_id: str | None,
@@ -146,13 +215,91 @@ class AIClient:
         fullname: str,
         retry: int = 0,
         max_retries: int = 3,
+        *,
+        priority: AIPriority = AIPriority.NORMAL,
     ) -> tuple[str | None, str | None]:
-        response_id = await self._safe_create_message(ai_thread_id, text, message, fullname, retry, max_retries)
-        if not response_id:
-            return None, ai_thread_id
+        async with self._admitted(priority, self._estimate(text)) as permit:
+            response = await self._safe_create_message(ai_thread_id, text, message, fullname, retry, max_retries)
+            if response is None:
+                return None, ai_thread_id
+            permit.settle(self._usage_extra(response).get("total_tokens"))
+            return await self._get_response_text(response)
+
+    async def stream_response(  # noqa: PLR0913
+        self,
+        ai_thread_id: str | None,
+        text: str,
+        message: Message,
+        fullname: str,
+        on_delta: Callable[[str], Awaitable[None]],
+        retry: int = 0,
+        max_retries: int = 3,
+        *,
+        priority: AIPriority = AIPriority.NORMAL,
+    ) -> tuple[str | None, str | None]:
+        """Same contract as get_response, but output text deltas are passed to on_delta as they arrive."""
+        async with self._admitted(priority, self._estimate(text)) as permit:
+            return await self._stream_response(
+                ai_thread_id, text, message, fullname, on_delta, retry, max_retries, permit
+            )
 
-        response_text, new_response_id = await self._run_thread_and_get_response(response_id)
-        return response_text, new_response_id
+    async def _stream_response(  # noqa: PLR0913
+        self,
+        ai_thread_id: str | None,
+        text: str,
+        message: Message,
+        fullname: str,
+        on_delta: Callable[[str], Awaitable[None]],
+        retry: int,
+        max_retries: int,
+        permit: AIPermit,
+    ) -> tuple[str | None, str | None]:
+        previous_response_id = self._normalize_previous_response_id(ai_thread_id)
+        responses_api = self._get_responses_api()
+        received_delta = False
+        logger.info(
+            "external api request",
+            extra={
+                "provider": "openai",
+                "operation": "responses.stream",
+                "has_previous_response_id": bool(previous_response_id),
+            },
+        )
+        try:
+            async with responses_api.stream(
+                model=self.model,
+                input=[{"role": "user", "content": text}],
+                previous_response_id=previous_response_id,
+                **self._build_response_options(),
+            ) as stream:
+                async for event in stream:
+                    if event.type == "response.output_text.delta" and event.delta:
+                        received_delta = True
+                        await on_delta(event.delta)
+                response = await stream.get_final_response()
+        except BadRequestError as e:
+            if "previous_response_id" in str(e) and not received_delta:
+                logger.warning("Invalid response chain (retry=%s)", retry)
+                if retry >= max_retries:
+                    await message.answer("Произошла ошибка: ассистент сейчас занят, попробуйте позже.")
+                    return None, ai_thread_id
+                await sleep(2)
+                return await self._stream_response(
+                    None, text, message, fullname, on_delta, retry + 1, max_retries, permit
+                )
+            raise
+        logger.info(
+            "external api response",
+            extra={
+                "provider": "openai",
+                "operation": "responses.stream",
+                "response_id": response.id,
+                "status": response.status,
+                **self._usage_extra(response),
+            },
+        )
+        permit.settle(self._usage_extra(response).get("total_tokens"))
+        return response.output_text, response.id
 
     async def get_response_with_image( # noqa: PLR0913
         self,
@@ -163,6 +310,8 @@ class AIClient:
         fullname: str,
         retry: int = 0,
         max_retries: int = 3,
+        *,
+        priority: AIPriority = AIPriority.NORMAL,
     ) -> tuple[str | None, str | None]:
         try:
             await self._ensure_thread_available(thread_id, message, fullname)
@@ -174,17 +323,20 @@ class AIClient:
                 },
             ]
 
-            response_id = await self._safe_create_message(thread_id, content, message, fullname, retry, max_retries)
-            if not response_id:
-                return None, thread_id
-
-            response_text, new_response_id = await self._run_thread_and_get_response(response_id)
+            async with self._admitted(priority, self._estimate(text, images=1)) as permit:
+                response = await self._safe_create_message(
+                    thread_id, content, message, fullname, retry, max_retries
+                )
+                if response is None:
+                    return None, thread_id
+                permit.settle(self._usage_extra(response).get("total_tokens"))
+                response_text, new_response_id = await self._get_response_text(response)
 
         except BadRequestError as e:
             logger.exception("OpenAI API Error")
             if e.status_code == HTTPStatus.TOO_MANY_REQUESTS:
-                return "Превышены лимиты запросов. Пожалуйста, попробуйте позже.", thread_id
-            return "Ошибка при обработке изображения. Убедитесь, что файл корректного формата.", thread_id
+                return IMAGE_RATE_LIMIT_REPLY, thread_id
+            return IMAGE_ERROR_REPLY, thread_id
         else:
             return response_text, new_response_id
 
@@ -196,6 +348,7 @@ class AIClient:
         db_session: AsyncSession,
         *,
         use_existing_thread: bool = False,
+        priority: AIPriority = AIPriority.NORMAL,
     ) -> str:
         responses_api = self._get_responses_api()
         logger.info(
@@ -207,12 +360,15 @@ class AIClient:
                 "use_existing_thread": use_existing_thread,
             },
         )
-        response = await responses_api.create(
-            model=self.model,
-            input=[{"role": "user", "content": context}],
-            previous_response_id=self._normalize_previous_response_id(user.ai_thread) if use_existing_thread else None,
-            **self._build_response_options(),
-        )
+        async with self._admitted(priority, self._estimate(context)):
+            response = await responses_api.create(
+                model=self.model,
+                input=[{"role": "user", "content": context}],
+                previous_response_id=(
+                    self._normalize_previous_response_id(user.ai_thread) if use_existing_thread else None
+                ),
+                **self._build_response_options(),
+            )
         logger.info(
             "external api response",
             extra={"provider": "openai", "operation": "responses.create", "response_id": response.id},
@@ -224,3 +380,10 @@ class AIClient:
         await db_session.flush()
         logger.info("Added context to thread %s", thread_id)
         return thread_id
+
+    async def transcribe(self, audio: BytesIO, *, priority: AIPriority = AIPriority.NORMAL) -> str:
+        async with self._admitted(priority, 0):
+            transcription = await self.client.audio.transcriptions.create(
+                file=audio, model="whisper-1", response_format="text", language="ru"
+            )
+        return transcription.strip()
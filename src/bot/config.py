@@ -25,6 +25,25 @@ class BotConfig(BaseSettings):
     STAGE: Stage
     WATERING_WORKER_INTERVAL_SECONDS: int = 60
     WATERING_TEST_REPEAT_MINUTES: int = 0
+    WATERING_WORKER_BATCH_SIZE: int = 100
+    WATERING_SEND_RATE: float = 25.0
+    WATERING_SEND_CONCURRENCY: int = 10
+    WATERING_SCHEDULE_RESYNC_SECONDS: int = 3600
+    BROADCAST_SEND_RATE: float = 25.0
+    BROADCAST_CONCURRENCY: int = 20
+    ANALYTICS_FLUSH_SECONDS: float = 5.0
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    DIALOG_LOG_WRITE_BEHIND: bool = True
+    DIALOG_LOG_FLUSH_SECONDS: float = 0.5
+    DIALOG_LOG_BATCH_SIZE: int = 200
+    LOG_CHANNEL_FLUSH_SECONDS: float = 2.0
+    LOG_CHANNEL_QUEUE_SIZE: int = 1000
+    LOG_QUEUED: bool = True
+    LOG_HANDLER_SAMPLE_RATE: float = 1.0
+    PDF_RENDER_WORKERS: int = 1
+    IMAGE_ANALYSIS_CACHE_SIZE: int = 2000
+    IMAGE_ANALYSIS_CACHE_TTL_SECONDS: float = 7 * 24 * 3600
 
     model_config = assign_config_dict(prefix="BOT_")
 
@@ -33,6 +52,8 @@ class ShopConfig(BaseSettings):
     ID: int
     PROVIDER_TOKEN: SecretStr
     API_KEY: SecretStr
+    API_URL: str = "https://api.yookassa.ru/v3"
+    REQUEST_TIMEOUT_SECONDS: float = 10.0
 
     model_config = assign_config_dict(prefix="SHOP_")
 
@@ -61,6 +82,19 @@ class GPTConfig(BaseSettings):
         default=None,
         validation_alias=AliasChoices("GPT_VECTOR_STORE_ID", "VECTOR_STORE_ID"),
     )
+    BASE_URL: str | None = Field(
+        default=None,
+        validation_alias=AliasChoices("GPT_BASE_URL", "OPENAI_BASE_URL"),
+    )
+    STREAM_RESPONSES: bool = False
+    STREAM_EDIT_INTERVAL_SECONDS: float = 1.0
+    # admission control for OpenAI calls; 0 disables the RPM/TPM budget
+    MAX_CONCURRENT_REQUESTS: int = 8
+    REQUESTS_PER_MINUTE: int = 0
+    TOKENS_PER_MINUTE: int = 0
+    EXPECTED_OUTPUT_TOKENS: int = 800
+    QUEUE_TIMEOUT_SECONDS: float = 20.0
+    MAX_QUEUED_REQUESTS: int = 100
 
     model_config = assign_config_dict(prefix="GPT_")
 
@@ -84,6 +118,7 @@ class DBConfig(BaseSettings):
     echo: bool = False
     pool_size: int = 50
     max_overflow: int = 10
+    release_connection_on_io: bool = False
 
     model_config = assign_config_dict(prefix="DB_")
 
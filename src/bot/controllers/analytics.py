@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+
+from redis.asyncio import Redis
+
+from bot.controllers.statistics import STAT_EVENTS, EventTimeline, StatsIndex, StatsSnapshot, floor_hour
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_PREFIX = "analytics"
+HOUR_KEY_FORMAT = "%Y%m%d%H"
+DAY_KEY_FORMAT = "%Y%m%d"
+
+
+def _hour_key(moment: datetime) -> str:
+    return moment.astimezone(UTC).strftime(HOUR_KEY_FORMAT)
+
+
+def _hour_start(hour_key: str) -> float:
+    year, month, day, hour = int(hour_key[:4]), int(hour_key[4:6]), int(hour_key[6:8]), int(hour_key[8:])
+    return datetime(year, month, day, hour, tzinfo=UTC).timestamp()
+
+
+def _day_keys(start_at: datetime, end_at: datetime) -> list[str]:
+    day = start_at.astimezone(UTC).date()
+    last_day = (end_at - timedelta(microseconds=1)).astimezone(UTC).date()
+    days = []
+    while day <= last_day:
+        days.append(day.strftime(DAY_KEY_FORMAT))
+        day += timedelta(days=1)
+    return days
+
+
+class AnalyticsSink:
+    """
+    Event counters in Redis: "<prefix>:events:<event>" is a hash of UTC hour ("YYYYMMDDHH") -> count and
+    "<prefix>:users:<event>:<YYYYMMDD>" is a daily HyperLogLog of the users behind the event.
+    `track` only updates in-memory buffers; `run` flushes them in one MULTI pipeline every few seconds,
+    so events of the last interval are lost if the process is killed.
+    "<prefix>:since" marks the first flushed hour; older periods are answered from the log index.
+    """
+
+    def __init__(self, redis: Redis | None = None, prefix: str = ANALYTICS_PREFIX) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.since_key = f"{prefix}:since"
+        self._counts: Counter[tuple[str, str]] = Counter()
+        self._users: defaultdict[tuple[str, str], set[int]] = defaultdict(set)
+
+    def configure(self, redis: Redis | None) -> None:
+        self.redis = redis
+
+    def _events_key(self, event: str) -> str:
+        return f"{self.prefix}:events:{event}"
+
+    def _users_key(self, event: str, day_key: str) -> str:
+        return f"{self.prefix}:users:{event}:{day_key}"
+
+    def track(self, event: str, user_tg_id: int | None = None, at: datetime | None = None) -> None:
+        if self.redis is None:
+            return
+        hour_key = _hour_key(at or datetime.now(UTC))
+        self._counts[event, hour_key] += 1
+        if user_tg_id is not None:
+            self._users[event, hour_key[:8]].add(user_tg_id)
+
+    async def flush(self) -> None:
+        if self.redis is None or not self._counts:
+            return
+        counts, users = self._counts, self._users
+        self._counts, self._users = Counter(), defaultdict(set)
+        first_hour = datetime.strptime(min(hour for _, hour in counts), HOUR_KEY_FORMAT).replace(tzinfo=UTC)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.set(self.since_key, first_hour.isoformat(), nx=True)
+                for (event, hour_key), count in counts.items():
+                    pipe.hincrby(self._events_key(event), hour_key, count)
+                for (event, day_key), user_ids in users.items():
+                    pipe.pfadd(self._users_key(event, day_key), *user_ids)
+                await pipe.execute()
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to flush analytics counters, keeping them for the next flush", exc_info=True)
+            self._counts.update(counts)
+            for key, user_ids in users.items():
+                self._users[key] |= user_ids
+
+    async def run(self, interval: float = 5.0) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def tracking_since(self) -> datetime | None:
+        if self.redis is None:
+            return None
+        since = await self.redis.get(self.since_key)
+        return datetime.fromisoformat(since) if since else None
+
+    async def snapshots(self, windows: list[tuple[datetime, datetime]]) -> list[StatsSnapshot]:
+        """
+        Counts for every [start_at, end_at) window rounded to whole hours, from one round trip.
+        Photo_upload counts unique users (its events mean "first photo"), rounded to whole days.
+        """
+        if not windows:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for event in STAT_EVENTS:
+                pipe.hgetall(self._events_key(event))
+            for start_at, end_at in windows:
+                pipe.pfcount(*[self._users_key("Photo_upload", day_key) for day_key in _day_keys(start_at, end_at)])
+            results = await pipe.execute()
+        buckets, photo_users = results[: len(STAT_EVENTS)], results[len(STAT_EVENTS) :]
+        timeline = EventTimeline(
+            (_hour_start(hour_key), event, int(count))
+            for event, event_buckets in zip(STAT_EVENTS, buckets, strict=True)
+            for hour_key, count in event_buckets.items()
+        )
+        return [
+            replace(timeline.snapshot(floor_hour(start_at), end_at), photo_upload=users)
+            for (start_at, end_at), users in zip(windows, photo_users, strict=True)
+        ]
+
+    async def snapshot(self, start_at: datetime, end_at: datetime) -> StatsSnapshot:
+        return (await self.snapshots([(start_at, end_at)]))[0]
+
+
+async def build_period_snapshots(
+    windows: list[tuple[datetime | None, datetime]],
+    since: datetime | None,
+    log_index: StatsIndex,
+) -> list[StatsSnapshot]:
+    """Stats per window: the part before `since` comes from the log index, the rest from the Redis counters."""
+    if since is None:
+        return log_index.snapshots(windows)
+    log_windows = [(start_at, min(end_at, since)) for start_at, end_at in windows]
+    logged = log_index.snapshots(log_windows)
+    counted_windows = [(since if start_at is None else max(start_at, since), end_at) for start_at, end_at in windows]
+    counted_indexes = [index for index, (start_at, end_at) in enumerate(counted_windows) if end_at > start_at]
+    counted = await analytics.snapshots([counted_windows[index] for index in counted_indexes])
+    for index, snapshot in zip(counted_indexes, counted, strict=True):
+        logged[index] += snapshot
+    return logged
+
+
+analytics = AnalyticsSink()
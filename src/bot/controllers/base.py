@@ -137,6 +137,7 @@ async def daily_routine( # noqa: C901
                         user.tg_id,
                         user.subscription_duration,
                         user.payment_method_id,
+                        idempotence_key=f"recurrent-{user.tg_id}-{utcnow.date().isoformat()}",
                     )
                     new_payment = Payment(
                         payment_id=payment.id,
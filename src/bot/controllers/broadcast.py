@@ -0,0 +1,300 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+from time import monotonic
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.internal.enums import BroadcastOutcome, BroadcastStatus
+from bot.internal.throttling import TELEGRAM_GLOBAL_RATE, TokenBucket
+from database.database_connector import DatabaseConnector
+from database.models import BroadcastJob, BroadcastRecipient, User
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_STATUS_LABELS = {
+    BroadcastStatus.RUNNING: "идёт",
+    BroadcastStatus.PAUSED: "на паузе",
+    BroadcastStatus.FINISHED: "завершена",
+    BroadcastStatus.CANCELLED: "отменена",
+}
+
+
+async def create_broadcast_job(
+    admin_chat_id: int,
+    db_session: AsyncSession,
+    *,
+    text: str | None = None,
+    photo_file_id: str | None = None,
+) -> BroadcastJob:
+    total = await db_session.scalar(select(func.count(User.id)))
+    job = BroadcastJob(
+        admin_chat_id=admin_chat_id,
+        text=text,
+        photo_file_id=photo_file_id,
+        status=BroadcastStatus.RUNNING,
+        cursor_tg_id=0,
+        total=total or 0,
+    )
+    db_session.add(job)
+    await db_session.flush()
+    return job
+
+
+async def get_broadcast_job(job_id: int | None, db_session: AsyncSession) -> BroadcastJob | None:
+    """Job by id, or the latest job when job_id is None."""
+    query = select(BroadcastJob)
+    query = query.where(BroadcastJob.id == job_id) if job_id is not None else query.order_by(BroadcastJob.id.desc())
+    result = await db_session.execute(query.limit(1))
+    return result.scalar_one_or_none()
+
+
+async def set_broadcast_status(
+    job: BroadcastJob,
+    status: BroadcastStatus,
+    db_session: AsyncSession,
+) -> BroadcastJob:
+    """
+    Pause and resume keep the lease: the worker that holds it may still be sending a page,
+    and it releases the lease itself when it sees the pause.
+    """
+    job.status = status
+    if status in {BroadcastStatus.FINISHED, BroadcastStatus.CANCELLED}:
+        job.locked_until = None
+        job.finished_at = datetime.now(UTC)
+    await db_session.flush()
+    return job
+
+
+def format_broadcast_progress(job: BroadcastJob) -> str:
+    processed = job.sent + job.blocked + job.failed
+    percent = processed * 100 // job.total if job.total else 100
+    return (
+        f"📢 <b>Рассылка #{job.id}</b> — {BROADCAST_STATUS_LABELS[job.status]}\n\n"
+        f"👥 Всего пользователей: {job.total}\n"
+        f"⏳ Обработано: {processed} ({percent}%)\n"
+        f"✅ Отправлено: {job.sent}\n"
+        f"🚫 Заблокировали / удалены: {job.blocked}\n"
+        f"❌ Ошибок: {job.failed}\n\n"
+        f"/broadcast_pause {job.id} · /broadcast_resume {job.id}"
+    )
+
+
+async def claim_broadcast_job(db_session: AsyncSession, now: datetime, lease_seconds: float) -> int | None:
+    """Lease one running job that no other replica is working on."""
+    free_job = (
+        select(BroadcastJob.id)
+        .where(
+            BroadcastJob.status == BroadcastStatus.RUNNING,
+            (BroadcastJob.locked_until.is_(None)) | (BroadcastJob.locked_until < now),
+        )
+        .order_by(BroadcastJob.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await db_session.execute(
+        update(BroadcastJob)
+        .where(BroadcastJob.id == free_job)
+        .values(locked_until=now + timedelta(seconds=lease_seconds))
+        .returning(BroadcastJob.id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none()
+
+
+async def release_broadcast_job(job_id: int, db_session: AsyncSession) -> None:
+    await db_session.execute(update(BroadcastJob).where(BroadcastJob.id == job_id).values(locked_until=None))
+
+
+async def get_recipient_page(
+    db_session: AsyncSession,
+    job_id: int,
+    after_tg_id: int,
+    limit: int,
+) -> tuple[list[int], list[int]]:
+    """
+    Next keyset page of users after the cursor, and the part of it still to be sent
+    (users this job already recorded are skipped when a page is resumed after a crash).
+    """
+    result = await db_session.execute(
+        select(User.tg_id).where(User.tg_id > after_tg_id).order_by(User.tg_id).limit(limit)
+    )
+    page = list(result.scalars().all())
+    if not page:
+        return [], []
+    recorded = await db_session.execute(
+        select(BroadcastRecipient.user_tg_id).where(
+            BroadcastRecipient.job_id == job_id,
+            BroadcastRecipient.user_tg_id.in_(page),
+        )
+    )
+    recorded_ids = set(recorded.scalars().all())
+    return page, [tg_id for tg_id in page if tg_id not in recorded_ids]
+
+
+async def record_broadcast_page(  # noqa: PLR0913
+    db_session: AsyncSession,
+    job_id: int,
+    outcomes: list[tuple[int, BroadcastOutcome, str | None]],
+    cursor_tg_id: int,
+    now: datetime,
+    lease_seconds: float,
+) -> None:
+    counts: Counter[BroadcastOutcome] = Counter()
+    if outcomes:
+        result = await db_session.execute(
+            insert(BroadcastRecipient)
+            .values(
+                [
+                    {"job_id": job_id, "user_tg_id": user_tg_id, "outcome": outcome, "error": error}
+                    for user_tg_id, outcome, error in outcomes
+                ]
+            )
+            .on_conflict_do_nothing(constraint="uq_broadcast_recipients_job_user")
+            .returning(BroadcastRecipient.outcome)
+        )
+        counts.update(result.scalars().all())
+    await db_session.execute(
+        update(BroadcastJob)
+        .where(BroadcastJob.id == job_id)
+        .values(
+            cursor_tg_id=cursor_tg_id,
+            sent=BroadcastJob.sent + counts[BroadcastOutcome.SENT],
+            blocked=BroadcastJob.blocked + counts[BroadcastOutcome.BLOCKED] + counts[BroadcastOutcome.DEACTIVATED],
+            failed=BroadcastJob.failed + counts[BroadcastOutcome.FAILED],
+            locked_until=now + timedelta(seconds=lease_seconds),
+        )
+    )
+
+
+class BroadcastWorker:
+    """
+    Background sender for broadcast jobs. Jobs are persisted with a keyset cursor over users.tg_id,
+    so a restart continues from the last committed page. Pages are sent concurrently under a global
+    token bucket; every page commits its per-recipient outcomes, the cursor and a renewed lease.
+    Pause/resume is picked up between pages; the lease is held until the worker stops on a paused job.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        bot: Bot,
+        db: DatabaseConnector,
+        *,
+        rate: float = TELEGRAM_GLOBAL_RATE,
+        concurrency: int = 20,
+        page_size: int = 200,
+        lease_seconds: float = 120,
+        progress_interval: float = 5.0,
+        max_retries: int = 3,
+    ) -> None:
+        self.bot = bot
+        self.db = db
+        self.bucket = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.lease_seconds = lease_seconds
+        self.progress_interval = progress_interval
+        self.max_retries = max_retries
+
+    async def _send(self, job: BroadcastJob, user_tg_id: int) -> None:
+        if job.photo_file_id:
+            await self.bot.send_photo(chat_id=user_tg_id, photo=job.photo_file_id, caption=job.text or "")
+        else:
+            await self.bot.send_message(user_tg_id, job.text)
+
+    async def _deliver(self, job: BroadcastJob, user_tg_id: int) -> tuple[int, BroadcastOutcome, str | None]:
+        error = None
+        for _ in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                await self._send(job, user_tg_id)
+            except TelegramRetryAfter as e:
+                self.bucket.pause(e.retry_after)
+                error = str(e)
+            except TelegramForbiddenError as e:
+                outcome = BroadcastOutcome.DEACTIVATED if "deactivated" in str(e) else BroadcastOutcome.BLOCKED
+                return user_tg_id, outcome, str(e)
+            except Exception as e:  # noqa: BLE001
+                return user_tg_id, BroadcastOutcome.FAILED, str(e)
+            else:
+                return user_tg_id, BroadcastOutcome.SENT, None
+        return user_tg_id, BroadcastOutcome.FAILED, error
+
+    async def _send_page(self, job: BroadcastJob, page: list[int]) -> list[tuple[int, BroadcastOutcome, str | None]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def deliver(user_tg_id: int) -> tuple[int, BroadcastOutcome, str | None]:
+            async with semaphore:
+                return await self._deliver(job, user_tg_id)
+
+        return list(await asyncio.gather(*(deliver(user_tg_id) for user_tg_id in page)))
+
+    async def _report_progress(self, job: BroadcastJob) -> None:
+        if job.progress_message_id is None:
+            return
+        try:
+            await self.bot.edit_message_text(
+                format_broadcast_progress(job),
+                chat_id=job.admin_chat_id,
+                message_id=job.progress_message_id,
+            )
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                logger.warning("Failed to update broadcast progress: %s", e)
+
+    async def process(self, job_id: int) -> None:
+        last_progress_at = monotonic()
+        while True:
+            async with self.db.session_factory() as session:
+                job = await get_broadcast_job(job_id, session)
+                if job is None or job.status != BroadcastStatus.RUNNING:
+                    if job is not None:
+                        await release_broadcast_job(job_id, session)
+                        await session.commit()
+                        await self._report_progress(job)
+                    return
+                page, recipients = await get_recipient_page(session, job_id, job.cursor_tg_id, self.page_size)
+                if not page:
+                    await set_broadcast_status(job, BroadcastStatus.FINISHED, session)
+                    await session.commit()
+                    await self._report_progress(job)
+                    logger.info("broadcast finished", extra={"job_id": job_id, "sent": job.sent})
+                    return
+
+            outcomes = await self._send_page(job, recipients)
+
+            async with self.db.session_factory() as session:
+                await record_broadcast_page(
+                    session,
+                    job_id,
+                    outcomes,
+                    cursor_tg_id=page[-1],
+                    now=datetime.now(UTC),
+                    lease_seconds=self.lease_seconds,
+                )
+                await session.commit()
+                if monotonic() - last_progress_at >= self.progress_interval:
+                    last_progress_at = monotonic()
+                    job = await get_broadcast_job(job_id, session)
+                    await self._report_progress(job)
+
+    async def run(self, poll_interval: float = 5.0) -> None:
+        while True:
+            try:
+                async with self.db.session_factory() as session:
+                    job_id = await claim_broadcast_job(session, datetime.now(UTC), self.lease_seconds)
+                    await session.commit()
+                if job_id is None:
+                    await asyncio.sleep(poll_interval)
+                    continue
+                logger.info("broadcast job claimed", extra={"job_id": job_id})
+                await self.process(job_id)
+            except Exception:  # noqa: BLE001
+                logger.warning("Broadcast worker loop failed, retrying", exc_info=True)
+                await asyncio.sleep(poll_interval)
@@ -1,16 +1,183 @@
+import asyncio
+import logging
+from collections import deque
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from database.database_connector import DatabaseConnector
 from database.models import BotResponseLog, User, UserRequestLog
 
+logger = logging.getLogger(__name__)
 
-async def log_user_request(user: User, request_text: str, db_session: AsyncSession) -> UserRequestLog:
-    request_log = UserRequestLog(
-        user_tg_id=user.tg_id,
-        request_text=request_text,
-    )
-    db_session.add(request_log)
-    await db_session.flush()
-    return request_log
+
+@dataclass
+class DialogLogRecord:
+    model: type[UserRequestLog | BotResponseLog]
+    values: dict[str, Any]
+    attempts: int = 0
+
+
+class DialogLogWriter:
+    """
+    Write-behind queue for dialog logs. Records are inserted with multi-row INSERTs by a background task,
+    every `flush_interval` seconds or as soon as `batch_size` records are waiting, so an AI turn no longer
+    pays for two INSERT round trips inside its own transaction.
+    Request ids are taken from blocks reserved from the table sequence, so a response can reference
+    its request before either row is written. The queue is bounded: producers wait when it is full.
+    Without a configured database every record is written through the request session, as before.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        db: DatabaseConnector | None = None,
+        *,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_queue: int = 10_000,
+        id_block_size: int = 100,
+        max_attempts: int = 3,
+    ) -> None:
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.id_block_size = id_block_size
+        self.max_attempts = max_attempts
+        self._queue: asyncio.Queue[DialogLogRecord] = asyncio.Queue(max_queue)
+        self._request_ids: deque[int] = deque()
+        self._id_lock = asyncio.Lock()
+        self._batch_ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._stopped: asyncio.Event | None = None
+
+    def configure(
+        self,
+        db: DatabaseConnector | None,
+        *,
+        batch_size: int | None = None,
+        flush_interval: float | None = None,
+    ) -> None:
+        self.db = db
+        if batch_size is not None:
+            self.batch_size = batch_size
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+
+    async def next_request_id(self) -> int:
+        async with self._id_lock:
+            if not self._request_ids:
+                sequence = func.pg_get_serial_sequence(UserRequestLog.__tablename__, "id")
+                async with self.db.session_factory() as session:
+                    result = await session.execute(
+                        select(func.nextval(sequence)).select_from(func.generate_series(1, self.id_block_size))
+                    )
+                self._request_ids.extend(result.scalars().all())
+            return self._request_ids.popleft()
+
+    async def add(self, model: type[UserRequestLog | BotResponseLog], **values: Any) -> None:
+        values.setdefault("created_at", datetime.now(UTC))
+        await self._queue.put(DialogLogRecord(model, values))
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    def _take_batch(self) -> list[DialogLogRecord]:
+        batch = []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _insert(self, session: AsyncSession, batch: list[DialogLogRecord]) -> None:
+        # Requests go first: a response in the same batch references one of them.
+        for model in (UserRequestLog, BotResponseLog):
+            rows = [record.values for record in batch if record.model is model]
+            if rows:
+                await session.execute(insert(model), rows)
+
+    async def _write(self, batch: list[DialogLogRecord]) -> list[DialogLogRecord]:
+        """Insert the batch; return the records to retry later (e.g. their user is not committed yet)."""
+        try:
+            async with self.db.session_factory() as session:
+                await self._insert(session, batch)
+                await session.commit()
+        except Exception:  # noqa: BLE001
+            logger.warning("Bulk dialog log insert failed, writing %s rows one by one", len(batch), exc_info=True)
+        else:
+            return []
+        retry = []
+        for record in batch:
+            try:
+                async with self.db.session_factory() as session:
+                    await self._insert(session, [record])
+                    await session.commit()
+            except Exception:
+                record.attempts += 1
+                if record.attempts < self.max_attempts:
+                    retry.append(record)
+                else:
+                    logger.exception("Dropping dialog log row for user %s", record.values.get("user_tg_id"))
+        return retry
+
+    async def flush(self) -> int:
+        written = 0
+        retry: list[DialogLogRecord] = []
+        while batch := self._take_batch():
+            failed = await self._write(batch)
+            retry.extend(failed)
+            written += len(batch) - len(failed)
+        for record in retry:
+            try:
+                self._queue.put_nowait(record)
+            except asyncio.QueueFull:
+                logger.warning("Dialog log queue is full, dropping row for user %s", record.values.get("user_tg_id"))
+        return written
+
+    async def run(self) -> None:
+        """Flush in the background until close(); stopping between flushes means no batch is lost mid-write."""
+        if self.db is None:
+            return
+        self._stopped = asyncio.Event()
+        try:
+            while not self._closing.is_set():
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                self._batch_ready.clear()
+                await self.flush()
+        finally:
+            self._stopped.set()
+
+    async def close(self) -> None:
+        """Stop run() after its current flush and write everything still queued; call after the producers have stopped."""
+        if self.db is None:
+            return
+        self._closing.set()
+        self._batch_ready.set()
+        if self._stopped is not None:
+            await self._stopped.wait()
+        for _ in range(self.max_attempts):
+            await self.flush()
+            if self._queue.empty():
+                return
+
+
+dialog_log_writer = DialogLogWriter()
+
+
+async def log_user_request(user: User, request_text: str, db_session: AsyncSession) -> int:
+    if dialog_log_writer.db is None:
+        request_log = UserRequestLog(
+            user_tg_id=user.tg_id,
+            request_text=request_text,
+        )
+        db_session.add(request_log)
+        await db_session.flush()
+        return request_log.id
+    request_log_id = await dialog_log_writer.next_request_id()
+    await dialog_log_writer.add(UserRequestLog, id=request_log_id, user_tg_id=user.tg_id, request_text=request_text)
+    return request_log_id
 
 
 async def log_bot_response(
@@ -19,6 +186,14 @@ async def log_bot_response(
     db_session: AsyncSession,
     user_request_log_id: int | None = None,
 ) -> None:
+    if dialog_log_writer.db is not None:
+        await dialog_log_writer.add(
+            BotResponseLog,
+            user_tg_id=user.tg_id,
+            response_text=response_text,
+            user_request_log_id=user_request_log_id,
+        )
+        return
     db_session.add(
         BotResponseLog(
             user_tg_id=user.tg_id,
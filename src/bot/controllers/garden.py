@@ -1,9 +1,10 @@
 from datetime import UTC, datetime, timedelta
 
-from sqlalchemy import desc, select, update
+from sqlalchemy import Row, and_, desc, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.models import GardenPlant, GardenPlantHistory, GardenPlantPhoto
+from bot.controllers.watering_schedule import watering_schedule
+from database.models import GardenPlant, GardenPlantHistory, GardenPlantPhoto, User
 
 DEFAULT_WATERING_INTERVAL_DAYS = 7
 DEFAULT_PLANT_STATUS = "здоров"
@@ -75,6 +76,7 @@ async def add_plant(
     db_session.add(plant)
     await db_session.flush()
     await _add_history(plant.id, f"Добавлено в сад ({now:%d.%m})", db_session)
+    await watering_schedule.schedule(plant.id, next_watering_at)
     return plant
 
 
@@ -131,6 +133,7 @@ async def mark_plant_watered(plant: GardenPlant, db_session: AsyncSession) -> Ga
     plant.last_notification_at = None
     await db_session.flush()
     await _add_history(plant.id, f"Полив ({now:%d.%m})", db_session)
+    await watering_schedule.schedule(plant.id, plant.next_watering_at)
     return plant
 
 
@@ -138,12 +141,18 @@ async def toggle_plant_notifications(plant: GardenPlant, db_session: AsyncSessio
     plant.notifications_enabled = not plant.notifications_enabled
     plant.last_notification_at = None
     await db_session.flush()
+    await watering_schedule.schedule(
+        plant.id,
+        plant.next_watering_at if plant.notifications_enabled else None,
+    )
     return plant
 
 
 async def delete_plant(plant: GardenPlant, db_session: AsyncSession) -> None:
+    plant_id = plant.id
     await db_session.delete(plant)
     await db_session.flush()
+    await watering_schedule.unschedule(plant_id)
 
 
 async def get_recent_history(plant_id: int, db_session: AsyncSession, limit: int = 5) -> list[GardenPlantHistory]:
@@ -168,6 +177,95 @@ async def get_due_plants(user_tg_id: int, db_session: AsyncSession, now: datetim
     return list(result.scalars().all())
 
 
+async def claim_due_plants(
+    db_session: AsyncSession,
+    now: datetime,
+    *,
+    limit: int = 100,
+    test_repeat_minutes: int | None = None,
+) -> list[Row]:
+    """
+    Claim a batch of due plants of active subscribers by stamping last_notification_at in one statement.
+    Rows locked by another worker are skipped, so concurrent workers never claim the same plant.
+    The claim must be committed before reminders are sent.
+    """
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    due_ids = (
+        select(GardenPlant.id)
+        .join(User, User.tg_id == GardenPlant.user_tg_id)
+        .where(
+            GardenPlant.notifications_enabled.is_(True),
+            GardenPlant.next_watering_at <= now,
+            or_(
+                GardenPlant.last_notification_at.is_(None),
+                GardenPlant.last_notification_at < day_start,
+            ),
+            User.is_subscribed.is_(True),
+            User.expired_at > now,
+        )
+        .order_by(GardenPlant.next_watering_at)
+        .limit(limit)
+        .with_for_update(of=GardenPlant, skip_locked=True)
+    )
+    values: dict[str, datetime] = {"last_notification_at": now}
+    if test_repeat_minutes and test_repeat_minutes > 0:
+        values["next_watering_at"] = now + timedelta(minutes=test_repeat_minutes)
+    result = await db_session.execute(
+        update(GardenPlant)
+        .where(GardenPlant.id.in_(due_ids))
+        .values(**values)
+        .returning(GardenPlant.id, GardenPlant.user_tg_id, GardenPlant.name, GardenPlant.next_watering_at)
+        .execution_options(synchronize_session=False)
+    )
+    return sorted(result.all(), key=lambda row: (row.user_tg_id, row.id))
+
+
+async def release_claimed_plants(
+    db_session: AsyncSession,
+    plant_ids: list[int],
+    now: datetime,
+    *,
+    test_repeat_minutes: int | None = None,
+) -> None:
+    """Undo the claim made at `now` for plants whose reminder was not delivered, so a later tick claims them again."""
+    if not plant_ids:
+        return
+    values: dict[str, datetime | None] = {"last_notification_at": None}
+    if test_repeat_minutes and test_repeat_minutes > 0:
+        values["next_watering_at"] = now
+    await db_session.execute(
+        update(GardenPlant)
+        .where(GardenPlant.id.in_(plant_ids), GardenPlant.last_notification_at == now)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def get_watering_schedule_rows(
+    db_session: AsyncSession,
+    now: datetime,
+    plant_ids: list[int] | None = None,
+) -> list[Row]:
+    """Rows needed to place plants in the watering schedule; all plants with reminders when plant_ids is None."""
+    query = (
+        select(
+            GardenPlant.id,
+            GardenPlant.next_watering_at,
+            GardenPlant.last_notification_at,
+            GardenPlant.notifications_enabled,
+            and_(User.is_subscribed.is_(True), User.expired_at > now).label("is_active"),
+        )
+        .join(User, User.tg_id == GardenPlant.user_tg_id)
+        .where(GardenPlant.next_watering_at.isnot(None))
+    )
+    if plant_ids is None:
+        query = query.where(GardenPlant.notifications_enabled.is_(True))
+    else:
+        query = query.where(GardenPlant.id.in_(plant_ids))
+    result = await db_session.execute(query)
+    return list(result.all())
+
+
 def should_notify(plant: GardenPlant, now: datetime) -> bool:
     if plant.last_notification_at is None:
         return True
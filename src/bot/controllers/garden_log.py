@@ -1,22 +1,16 @@
-from aiogram.fsm.context import FSMContext
-from aiogram.types import Message
-
-from bot.config import Settings
+from bot.controllers.log_channel import log_channel
 from database.models import User
 
 
-async def log_garden_action(  # noqa: PLR0913
-    message: Message,
-    state: FSMContext | None,
+def log_garden_action(  # noqa: PLR0913
     user: User,
-    settings: Settings,
     action: str,
+    current_state: str | None = None,
     plant_name: str | None = None,
     details: str | None = None,
     user_message: str | None = None,
     bot_response: str | None = None,
 ) -> None:
-    current_state = await state.get_state() if state else None
     username = f"@{user.username}" if user.username else "without_username"
     lines = [
         "🪴 garden",
@@ -32,4 +26,4 @@ async def log_garden_action(  # noqa: PLR0913
         lines.append(f"user_message: {user_message}")
     if bot_response:
         lines.append(f"bot_response: {bot_response}")
-    await message.bot.send_message(settings.bot.CHAT_LOG_ID, "\n".join(lines))
+    log_channel.post("\n".join(lines))
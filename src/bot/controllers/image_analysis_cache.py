@@ -0,0 +1,185 @@
+import hashlib
+import json
+import logging
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from time import monotonic
+
+from aiogram import Bot
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+IMAGE_ANALYSIS_PREFIX = "image_analysis"
+
+
+def prompt_version(prompt: str) -> str:
+    """Editing a prompt changes its version, so answers to the old prompt are never reused."""
+    return hashlib.sha256(prompt.encode()).hexdigest()[:12]
+
+
+def content_key(image_bytes: bytes) -> str:
+    return f"sha256:{hashlib.sha256(image_bytes).hexdigest()}"
+
+
+@dataclass(frozen=True)
+class CachedAnalysis:
+    text: str
+    file_path: str | None = None
+
+
+class ImageAnalysisCache:
+    """
+    AI answers about a photo, keyed by (user, prompt version, image). The image is its Telegram
+    file_unique_id, which is known before downloading, or the sha256 of its bytes for a re-upload
+    of the same file. Answers can depend on the user's dialog, so entries are never shared between users.
+    Entries live in a TTL + LRU dict and in Redis with the same TTL, so other replicas and restarts reuse them.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 2_000,
+        ttl: float = 7 * 24 * 3600,
+        redis: Redis | None = None,
+        prefix: str = IMAGE_ANALYSIS_PREFIX,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.redis = redis
+        self.prefix = prefix
+        self.clock = clock
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self._entries: OrderedDict[str, tuple[float, CachedAnalysis]] = OrderedDict()
+
+    def configure(self, redis: Redis | None, *, maxsize: int | None = None, ttl: float | None = None) -> None:
+        self.redis = redis
+        if maxsize is not None:
+            self.maxsize = maxsize
+        if ttl is not None:
+            self.ttl = ttl
+        self._entries.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def _key(self, user_id: int, prompt: str, image_key: str) -> str:
+        return f"{self.prefix}:{user_id}:{prompt_version(prompt)}:{image_key}"
+
+    def _get_local(self, key: str) -> CachedAnalysis | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, analysis = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return analysis
+
+    def _put_local(self, key: str, analysis: CachedAnalysis) -> None:
+        self._entries[key] = (self.clock() + self.ttl, analysis)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def _lookup(self, user_id: int, prompt: str, image_key: str | None) -> CachedAnalysis | None:
+        if not self.enabled or not image_key:
+            return None
+        key = self._key(user_id, prompt, image_key)
+        analysis = self._get_local(key)
+        if analysis is None and self.redis is not None:
+            try:
+                raw = await self.redis.get(key)
+            except Exception:  # noqa: BLE001
+                logger.warning("Failed to read image analysis from redis", exc_info=True)
+                raw = None
+            if raw:
+                analysis = CachedAnalysis(**json.loads(raw))
+                self._put_local(key, analysis)
+        # a stored photo that is gone (another host, cleanup) cannot be reused
+        if analysis is not None and analysis.file_path and not Path(analysis.file_path).exists():
+            return None
+        return analysis
+
+    def _record(self, kind: str, *, hit: bool) -> None:
+        counter = self.hits if hit else self.misses
+        counter[kind] += 1
+        logger.info("image analysis cache lookup", extra={"kind": kind, "hit": hit, "hit_rate": self.hit_rate(kind)})
+
+    async def get(self, user_id: int, prompt: str, image_key: str | None, *, kind: str) -> CachedAnalysis | None:
+        """`kind` names the call site in hit/miss counters, e.g. "onboarding" or "garden"."""
+        analysis = await self._lookup(user_id, prompt, image_key)
+        self._record(kind, hit=analysis is not None)
+        return analysis
+
+    async def put(self, user_id: int, prompt: str, image_keys: list[str | None], analysis: CachedAnalysis) -> None:
+        if not self.enabled or not analysis.text:
+            return
+        keys = [self._key(user_id, prompt, image_key) for image_key in dict.fromkeys(image_keys) if image_key]
+        for key in keys:
+            self._put_local(key, analysis)
+        if self.redis is None or not keys:
+            return
+        payload = json.dumps(asdict(analysis), ensure_ascii=False)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.set(key, payload, ex=int(self.ttl))
+                await pipe.execute()
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to store image analysis in redis", exc_info=True)
+
+    async def analyse_photo(  # noqa: PLR0913
+        self,
+        bot: Bot,
+        file_id: str,
+        file_unique_id: str | None,
+        user_id: int,
+        prompt: str,
+        analyse: Callable[[bytes, str | None], Awaitable[CachedAnalysis | None]],
+        *,
+        kind: str,
+    ) -> tuple[CachedAnalysis | None, bool]:
+        """
+        Return (analysis, hit). A hit on file_unique_id skips both the download and `analyse`; otherwise the
+        photo is downloaded and looked up by content before `analyse(bytes, telegram_file_path)` is called.
+        Only analyses that `analyse` returns are cached, so it should return None for failed calls.
+        """
+        analysis = await self._lookup(user_id, prompt, file_unique_id)
+        if analysis is not None:
+            self._record(kind, hit=True)
+            return analysis, True
+        file_info = await bot.get_file(file_id)
+        file_bytes = await bot.download_file(file_info.file_path)
+        image_bytes = file_bytes.read()
+        digest = content_key(image_bytes)
+        analysis = await self._lookup(user_id, prompt, digest)
+        self._record(kind, hit=analysis is not None)
+        if analysis is not None:
+            await self.put(user_id, prompt, [file_unique_id], analysis)
+            return analysis, True
+        analysis = await analyse(image_bytes, file_info.file_path)
+        if analysis is not None:
+            await self.put(user_id, prompt, [file_unique_id, digest], analysis)
+        return analysis, False
+
+    def hit_rate(self, kind: str | None = None) -> float:
+        hits = self.hits[kind] if kind else self.hits.total()
+        misses = self.misses[kind] if kind else self.misses.total()
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def snapshot(self) -> dict[str, float | int]:
+        return {
+            "hits": self.hits.total(),
+            "misses": self.misses.total(),
+            "hit_rate": round(self.hit_rate(), 3),
+            "entries": len(self._entries),
+        }
+
+
+image_analysis_cache = ImageAnalysisCache()
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_LIMIT = 4096
+FORWARD_BATCH_LIMIT = 100
+DIGEST_SEPARATOR = "\n\n"
+
+
+@dataclass(slots=True)
+class LogEntry:
+    text: str | None = None
+    from_chat_id: int | None = None
+    message_id: int | None = None
+
+
+def _split_text(text: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    return [text[start : start + limit] for start in range(0, len(text), limit)] or [""]
+
+
+def build_digests(texts: list[str], limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Pack log texts into as few messages as possible, keeping their order; oversized texts are cut."""
+    digests: list[str] = []
+    current = ""
+    for text in texts:
+        for part in _split_text(text, limit):
+            if current and len(current) + len(DIGEST_SEPARATOR) + len(part) <= limit:
+                current += DIGEST_SEPARATOR + part
+                continue
+            if current:
+                digests.append(current)
+            current = part
+    if current:
+        digests.append(current)
+    return digests
+
+
+class LogChannel:
+    """
+    Write-behind pipeline for the admin log chat (CHAT_LOG_ID). `post` and `forward` only enqueue;
+    `run` waits `flush_interval` after the first entry, then sends what has accumulated: consecutive
+    texts coalesced into digests up to the 4096-char limit and consecutive forwards from one chat in a
+    single forward_messages call. Under backpressure forwards are shed first (the queue is past
+    `shed_forwards_at`), then everything once it is full; the number of dropped entries is reported
+    in the next digest.
+    """
+
+    def __init__(
+        self,
+        bot: Bot | None = None,
+        chat_id: int | None = None,
+        *,
+        max_queue: int = 1000,
+        flush_interval: float = 2.0,
+        shed_forwards_at: float = 0.5,
+    ) -> None:
+        self.bot = bot
+        self.chat_id = chat_id
+        self.flush_interval = flush_interval
+        self.shed_forwards_at = shed_forwards_at
+        self.dropped = 0
+        self._queue: asyncio.Queue[LogEntry] = asyncio.Queue(maxsize=max_queue)
+        self._pending: list[LogEntry] = []
+
+    def configure(
+        self,
+        bot: Bot | None,
+        chat_id: int | None,
+        *,
+        max_queue: int = 1000,
+        flush_interval: float = 2.0,
+    ) -> None:
+        self.bot = bot
+        self.chat_id = chat_id
+        self.flush_interval = flush_interval
+        self._queue = asyncio.Queue(maxsize=max_queue)
+
+    @property
+    def enabled(self) -> bool:
+        return self.bot is not None and self.chat_id is not None
+
+    def _put(self, entry: LogEntry) -> None:
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def post(self, text: str) -> None:
+        if self.enabled:
+            self._put(LogEntry(text=text))
+
+    def forward(self, message: Message) -> None:
+        if not self.enabled:
+            return
+        if self._queue.qsize() >= self._queue.maxsize * self.shed_forwards_at:
+            self.dropped += 1
+            return
+        self._put(LogEntry(from_chat_id=message.chat.id, message_id=message.message_id))
+
+    def _drain(self) -> list[LogEntry]:
+        entries, self._pending = self._pending, []
+        while not self._queue.empty():
+            entries.append(self._queue.get_nowait())
+        return entries
+
+    async def _call(self, method, **kwargs) -> None:
+        while True:
+            try:
+                await method(**kwargs)
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+            else:
+                return
+
+    async def _send_texts(self, texts: list[str]) -> None:
+        for digest in build_digests(texts):
+            try:
+                await self._call(self.bot.send_message, chat_id=self.chat_id, text=digest)
+            except TelegramBadRequest:
+                # One entry with broken markup must not lose the whole digest.
+                await self._call(self.bot.send_message, chat_id=self.chat_id, text=digest, parse_mode=None)
+
+    async def _send_forwards(self, from_chat_id: int, message_ids: list[int]) -> None:
+        message_ids = sorted(message_ids)
+        for start in range(0, len(message_ids), FORWARD_BATCH_LIMIT):
+            await self._call(
+                self.bot.forward_messages,
+                chat_id=self.chat_id,
+                from_chat_id=from_chat_id,
+                message_ids=message_ids[start : start + FORWARD_BATCH_LIMIT],
+            )
+
+    async def _send_group(self, group: list[LogEntry]) -> None:
+        if group[0].text is not None:
+            await self._send_texts([entry.text for entry in group])
+        else:
+            await self._send_forwards(group[0].from_chat_id, [entry.message_id for entry in group])
+
+    async def flush(self) -> int:
+        """Send everything queued so far; returns the number of entries sent."""
+        if not self.enabled:
+            return 0
+        entries = self._drain()
+        if self.dropped:
+            entries.insert(0, LogEntry(text=f"⚠️ log channel dropped {self.dropped} entries under load"))
+            self.dropped = 0
+        groups: list[list[LogEntry]] = []
+        for entry in entries:
+            previous = groups[-1][0] if groups else None
+            if previous is not None and (
+                (entry.text is not None and previous.text is not None)
+                or (entry.text is None and previous.text is None and entry.from_chat_id == previous.from_chat_id)
+            ):
+                groups[-1].append(entry)
+            else:
+                groups.append([entry])
+        for group in groups:
+            try:
+                await self._send_group(group)
+            except Exception:  # noqa: BLE001
+                logger.warning("Failed to send %s log channel entries", len(group), exc_info=True)
+        return len(entries)
+
+    async def run(self) -> None:
+        while True:
+            if not self.enabled:
+                await asyncio.sleep(self.flush_interval)
+                continue
+            self._pending.append(await self._queue.get())
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self) -> None:
+        await self.flush()
+
+
+log_channel = LogChannel()
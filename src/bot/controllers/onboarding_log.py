@@ -1,25 +1,15 @@
-import logging
-
-from aiogram.fsm.context import FSMContext
-from aiogram.types import Message
-
-from bot.config import Settings
+from bot.controllers.log_channel import log_channel
 from database.models import User
 
-logger = logging.getLogger(__name__)
-
 
-async def log_onboarding_step( # noqa: PLR0913
-    message: Message,
-    state: FSMContext | None,
+def log_onboarding_step(  # noqa: PLR0913
     user: User,
-    settings: Settings,
     step: str,
+    current_state: str | None = None,
     extra: str | None = None,
     user_message: str | None = None,
     bot_response: str | None = None,
 ) -> None:
-    current_state = await state.get_state() if state else None
     lines = [
         "🧭 onboarding_3",
         f"user: {user.tg_id} ({user.fullname})",
@@ -32,7 +22,4 @@ async def log_onboarding_step( # noqa: PLR0913
         lines.append(f"user_message: {user_message}")
     if bot_response:
         lines.append(f"bot_response: {bot_response}")
-    try:
-        await message.bot.send_message(settings.bot.CHAT_LOG_ID, "\n".join(lines))
-    except Exception:
-        logger.warning("Failed to send onboarding log step", exc_info=True)
+    log_channel.post("\n".join(lines))
@@ -2,14 +2,22 @@ import logging
 
 from sqlalchemy import Result, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from yookassa import Payment as YookassaPayment
 from yookassa.domain.response import PaymentResponse
 
+from bot.payment_gateway import PaymentGateway, get_payment_gateway
 from database.models import Payment
 
 logger = logging.getLogger(__name__)
 
-async def get_subscription_payment(amount: int, description: str, user_id: int, entity: str) -> PaymentResponse:
+async def get_subscription_payment(  # noqa: PLR0913
+    amount: int,
+    description: str,
+    user_id: int,
+    entity: str,
+    idempotence_key: str | None = None,
+    gateway: PaymentGateway | None = None,
+) -> PaymentResponse:
+    gateway = gateway or get_payment_gateway()
     logger.info(
         "external api request",
         extra={
@@ -20,7 +28,7 @@ async def get_subscription_payment(amount: int, description: str, user_id: int,
             "payment_kind": "subscription",
         },
     )
-    payment = YookassaPayment.create(
+    payment = await gateway.create_payment(
         {
             "amount": {"value": f"{amount}.00", "currency": "RUB"},
             "payment_method_data": {"type": "bank_card"},
@@ -52,7 +60,8 @@ async def get_subscription_payment(amount: int, description: str, user_id: int,
             "save_payment_method": True,
             "tax_system_code": 1,
             "merchant_customer_id": user_id,
-        }
+        },
+        idempotence_key,
     )
     logger.info(
         "external api response",
@@ -66,13 +75,16 @@ async def get_subscription_payment(amount: int, description: str, user_id: int,
     return payment
 
 
-async def create_recurrent_payment(
+async def create_recurrent_payment(  # noqa: PLR0913
     amount: int,
     description: str,
     user_id: int,
     entity: str,
     payment_method_id: str,
+    idempotence_key: str | None = None,
+    gateway: PaymentGateway | None = None,
 ) -> PaymentResponse:
+    gateway = gateway or get_payment_gateway()
     logger.info(
         "external api request",
         extra={
@@ -83,7 +95,7 @@ async def create_recurrent_payment(
             "payment_kind": "recurrent",
         },
     )
-    payment = YookassaPayment.create(
+    payment = await gateway.create_payment(
         {
             "amount": {"value": f"{amount}.00", "currency": "RUB"},
             "payment_method_id": payment_method_id,
@@ -110,7 +122,8 @@ async def create_recurrent_payment(
                 "payment_type": "recurrent",
             },
             "merchant_customer_id": user_id,
-        }
+        },
+        idempotence_key,
     )
     logger.info(
         "external api response",
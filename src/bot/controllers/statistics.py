@@ -1,16 +1,30 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import logging
+import math
+import os
+import threading
+from array import array
+from bisect import bisect_left
 from dataclasses import dataclass
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from itertools import accumulate, pairwise
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, BinaryIO
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
 
+logger = logging.getLogger(__name__)
+
 STAT_PREFIX = "STAT|"
 STAT_LOG_NAME = "suslik_robot"
+STAT_EVENTS = ("Start_bot", "Photo_upload", "Paywall_view", "Payment_success", "Diagnosis_result")
+STATS_INDEX_PATH = Path("logs") / "stats_index.json"
+STATS_INDEX_VERSION = 1
+STATS_INDEX_HEAD_BYTES = 256
 STAT_LOG_PATTERNS = (
     "%d.%m.%Y %H:%M:%S.%f%z",
     "%d.%m.%Y %H:%M:%S%z",
@@ -34,6 +48,15 @@ class StatsSnapshot:
     payment_success: int = 0
     diagnosis_result: int = 0
 
+    def __add__(self, other: StatsSnapshot) -> StatsSnapshot:
+        return StatsSnapshot(
+            start_bot=self.start_bot + other.start_bot,
+            photo_upload=self.photo_upload + other.photo_upload,
+            paywall_view=self.paywall_view + other.paywall_view,
+            payment_success=self.payment_success + other.payment_success,
+            diagnosis_result=self.diagnosis_result + other.diagnosis_result,
+        )
+
 
 def build_stat_message(event: str, user_tg_id: int | None = None, extra: dict[str, str] | None = None) -> str:
     parts = [f"{STAT_PREFIX}event={event}"]
@@ -137,55 +160,46 @@ def _is_payment_success(message: str) -> bool:
 def _is_diagnosis_result(message: str) -> bool:
     return any(marker in message for marker in LEGACY_DIAGNOSIS_MARKERS)
 
-def iter_stat_events(paths: Iterable[Path]) -> list[tuple[datetime, str]]: # noqa: C901
+def _extract_line_events(line: str, seen_photo_users: set[int]) -> list[tuple[datetime, str]]:
+    timestamp, message = _parse_timestamp(line)
+    if timestamp is None:
+        return []
+    stat_event = _parse_stat_event(message)
+    if stat_event:
+        return [(timestamp, stat_event)]
+    events: list[tuple[datetime, str]] = []
+    if _is_paywall_view(message):
+        events.append((timestamp, "Paywall_view"))
+    if _is_payment_success(message):
+        events.append((timestamp, "Payment_success"))
+    if _is_diagnosis_result(message):
+        events.append((timestamp, "Diagnosis_result"))
+    update_payload = _parse_update_payload(message)
+    if update_payload:
+        update_event = _extract_event_from_update(update_payload, seen_photo_users)
+        if update_event:
+            events.append((timestamp, update_event))
+    return events
+
+
+def iter_stat_events(paths: Iterable[Path]) -> list[tuple[datetime, str]]:
     events: list[tuple[datetime, str]] = []
     seen_photo_users: set[int] = set()
     for path in paths:
         try:
             with path.open("r", encoding="utf-8") as log_file:
                 for line in log_file:
-                    timestamp, message = _parse_timestamp(line)
-                    if timestamp is None:
-                        continue
-                    stat_event = _parse_stat_event(message)
-                    if stat_event:
-                        events.append((timestamp, stat_event))
-                        continue
-                    if _is_paywall_view(message):
-                        events.append((timestamp, "Paywall_view"))
-                    if _is_payment_success(message):
-                        events.append((timestamp, "Payment_success"))
-                    if _is_diagnosis_result(message):
-                        events.append((timestamp, "Diagnosis_result"))
-                    update_payload = _parse_update_payload(message)
-                    if update_payload:
-                        update_event = _extract_event_from_update(update_payload, seen_photo_users)
-                        if update_event:
-                            events.append((timestamp, update_event))
+                    events.extend(_extract_line_events(line, seen_photo_users))
         except FileNotFoundError:
             continue
     return events
 
 
-def build_stats_snapshot(
-    events: list[tuple[datetime, str]],
-    start_at: datetime | None,
-    end_at: datetime | None,
-) -> StatsSnapshot:
-    counts = {
-        "Start_bot": 0,
-        "Photo_upload": 0,
-        "Paywall_view": 0,
-        "Payment_success": 0,
-        "Diagnosis_result": 0,
-    }
-    for timestamp, event in events:
-        if start_at is not None and timestamp < start_at:
-            continue
-        if end_at is not None and timestamp >= end_at:
-            continue
-        if event in counts:
-            counts[event] += 1
+def floor_hour(moment: datetime) -> datetime:
+    return moment.astimezone(UTC).replace(minute=0, second=0, microsecond=0)
+
+
+def _snapshot_from_counts(counts: dict[str, int]) -> StatsSnapshot:
     return StatsSnapshot(
         start_bot=counts["Start_bot"],
         photo_upload=counts["Photo_upload"],
@@ -193,3 +207,208 @@ def build_stats_snapshot(
         payment_success=counts["Payment_success"],
         diagnosis_result=counts["Diagnosis_result"],
     )
+
+
+class EventTimeline:
+    """
+    Stat events sorted by time once, with running totals per event type.
+    Any window is then answered with two bisects per event, whatever its length,
+    so many windows (periods, per-day series) cost one sort instead of one pass each.
+    """
+
+    def __init__(self, points: Iterable[tuple[float, str, int]]) -> None:
+        """points: (unix timestamp, event, count), in any order."""
+        times: dict[str, list[float]] = {event: [] for event in STAT_EVENTS}
+        counts: dict[str, list[int]] = {event: [] for event in STAT_EVENTS}
+        for moment, event, count in points:
+            event_times = times.get(event)
+            if event_times is not None:
+                event_times.append(moment)
+                counts[event].append(count)
+        self._times: dict[str, array[float]] = {}
+        self._totals: dict[str, array[int]] = {}
+        for event in STAT_EVENTS:
+            event_times, event_counts = times[event], counts[event]
+            if any(earlier > later for earlier, later in pairwise(event_times)):
+                order = sorted(range(len(event_times)), key=event_times.__getitem__)
+                event_times = [event_times[index] for index in order]
+                event_counts = [event_counts[index] for index in order]
+            self._times[event] = array("d", event_times)
+            self._totals[event] = array("q", accumulate(event_counts, initial=0))
+
+    @classmethod
+    def from_events(cls, events: Iterable[tuple[datetime, str]]) -> EventTimeline:
+        return cls((timestamp.timestamp(), event, 1) for timestamp, event in events)
+
+    def snapshot(self, start_at: datetime | None, end_at: datetime | None) -> StatsSnapshot:
+        start = -math.inf if start_at is None else start_at.timestamp()
+        end = math.inf if end_at is None else end_at.timestamp()
+        if start >= end:
+            return StatsSnapshot()
+        counts = {}
+        for event in STAT_EVENTS:
+            times, totals = self._times[event], self._totals[event]
+            counts[event] = totals[bisect_left(times, end)] - totals[bisect_left(times, start)]
+        return _snapshot_from_counts(counts)
+
+    def snapshots(self, windows: Iterable[tuple[datetime | None, datetime | None]]) -> list[StatsSnapshot]:
+        return [self.snapshot(start_at, end_at) for start_at, end_at in windows]
+
+
+def day_windows(start_at: datetime, end_at: datetime) -> list[tuple[datetime, datetime]]:
+    """Consecutive calendar-day windows in start_at's timezone, e.g. for a per-day chart."""
+    windows = []
+    day_start = start_at.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day_start < end_at:
+        next_day = day_start + timedelta(days=1)
+        windows.append((max(day_start, start_at), min(next_day, end_at)))
+        day_start = next_day
+    return windows
+
+
+def build_stats_snapshots(
+    events: Iterable[tuple[datetime, str]],
+    windows: Iterable[tuple[datetime | None, datetime | None]],
+) -> list[StatsSnapshot]:
+    return EventTimeline.from_events(events).snapshots(windows)
+
+
+def build_stats_snapshot(
+    events: list[tuple[datetime, str]],
+    start_at: datetime | None,
+    end_at: datetime | None,
+) -> StatsSnapshot:
+    return build_stats_snapshots(events, [(start_at, end_at)])[0]
+
+
+class StatsIndex:
+    """
+    Incremental on-disk index of the stat events found in the bot logs.
+    Log files are checkpointed by inode (plus a hash of their first bytes, in case an inode gets reused),
+    so a RotatingFileHandler rename keeps the byte offset and only appended lines are parsed.
+    Events are counted in hourly buckets per UTC day; the counters outlive the log files they came from.
+    """
+
+    def __init__(self, path: Path = STATS_INDEX_PATH) -> None:
+        self.path = path
+        self.files: dict[str, dict[str, Any]] = {}
+        self.days: dict[str, dict[str, list[int]]] = {}
+        self.seen_photo_users: set[int] = set()
+        self.refreshed_at: datetime | None = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        self._loaded = True
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.warning("Stats index %s is unreadable, rebuilding it", self.path, exc_info=True)
+            return
+        if data.get("version") != STATS_INDEX_VERSION:
+            return
+        self.files = data["files"]
+        self.days = data["days"]
+        self.seen_photo_users = set(data["seen_photo_users"])
+        refreshed_at = data.get("refreshed_at")
+        self.refreshed_at = datetime.fromisoformat(refreshed_at) if refreshed_at else None
+
+    def save(self) -> None:
+        data = {
+            "version": STATS_INDEX_VERSION,
+            "files": self.files,
+            "days": self.days,
+            "seen_photo_users": sorted(self.seen_photo_users),
+            "refreshed_at": self.refreshed_at.isoformat() if self.refreshed_at else None,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        tmp_path.replace(self.path)
+
+    def _add(self, timestamp: datetime, event: str) -> None:
+        timestamp = timestamp.astimezone(UTC)
+        hours = self.days.setdefault(timestamp.date().isoformat(), {}).setdefault(event, [0] * 24)
+        hours[timestamp.hour] += 1
+
+    @staticmethod
+    def _head_hash(log_file: BinaryIO, length: int) -> str:
+        log_file.seek(0)
+        return hashlib.sha256(log_file.read(length)).hexdigest()
+
+    def _read_new_lines(self, path: Path) -> tuple[str, dict[str, Any]]:
+        with path.open("rb") as log_file:
+            stat = os.fstat(log_file.fileno())
+            key = f"{stat.st_dev}:{stat.st_ino}"
+            checkpoint = self.files.get(key)
+            offset = 0
+            if (
+                checkpoint is not None
+                and checkpoint["offset"] <= stat.st_size
+                and self._head_hash(log_file, checkpoint["head_len"]) == checkpoint["head_hash"]
+            ):
+                offset = checkpoint["offset"]
+            log_file.seek(offset)
+            for raw_line in log_file:
+                if not raw_line.endswith(b"\n"):
+                    break  # still being written, picked up on the next refresh
+                offset += len(raw_line)
+                line = raw_line.decode("utf-8", errors="replace")
+                for timestamp, event in _extract_line_events(line, self.seen_photo_users):
+                    self._add(timestamp, event)
+            head_len = min(offset, STATS_INDEX_HEAD_BYTES)
+            return key, {
+                "path": str(path),
+                "offset": offset,
+                "head_len": head_len,
+                "head_hash": self._head_hash(log_file, head_len),
+            }
+
+    def refresh(self, paths: Iterable[Path]) -> None:
+        """Parse the lines appended since the last refresh and persist the index. Blocking, run it in a thread."""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            refreshed_at = datetime.now(UTC)
+            existing: list[tuple[float, Path]] = []
+            for path in paths:
+                try:
+                    existing.append((path.stat().st_mtime, path))
+                except FileNotFoundError:
+                    continue
+            files: dict[str, dict[str, Any]] = {}
+            # Oldest file first, so the first photo of a user is attributed to the right day.
+            for _, path in sorted(existing):
+                try:
+                    key, checkpoint = self._read_new_lines(path)
+                except FileNotFoundError:
+                    continue
+                files[key] = checkpoint
+            self.files = files
+            self.refreshed_at = refreshed_at
+            self.save()
+
+    def timeline(self) -> EventTimeline:
+        with self._lock:
+            day_starts = {day_key: datetime.fromisoformat(day_key).replace(tzinfo=UTC).timestamp() for day_key in self.days}
+            return EventTimeline(
+                (day_starts[day_key] + hour * 3600, event, count)
+                for day_key, events in self.days.items()
+                for event, hours in events.items()
+                for hour, count in enumerate(hours)
+                if count
+            )
+
+    def snapshots(self, windows: Iterable[tuple[datetime | None, datetime | None]]) -> list[StatsSnapshot]:
+        """Counts for every [start_at, end_at) window, with the bounds rounded to whole hours."""
+        return self.timeline().snapshots(
+            (None if start_at is None else floor_hour(start_at), end_at) for start_at, end_at in windows
+        )
+
+    def snapshot(self, start_at: datetime | None, end_at: datetime | None) -> StatsSnapshot:
+        return self.snapshots([(start_at, end_at)])[0]
+
+
+stats_index = StatsIndex()
@@ -0,0 +1,114 @@
+import logging
+from asyncio import sleep
+from collections.abc import Callable
+from time import monotonic
+
+from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+
+from bot.controllers.base import escape_markdown_v2, refactor_string
+from bot.internal.consts import MARKDOWN_CHUNK_LIMIT
+
+logger = logging.getLogger(__name__)
+
+CUT_SEPARATORS = ("\n\n", "\n", " ")
+
+
+class TelegramStreamWriter:
+    """
+    Writes a streamed AI answer into Telegram by editing the last sent message.
+    Completed lines are rendered with refactor_string, the unfinished tail is fully escaped,
+    so every intermediate edit is valid MarkdownV2. Edits are throttled to one per edit_interval
+    and a new message is started once the rendered text would exceed the chunk limit.
+    """
+
+    def __init__(
+        self,
+        message: Message,
+        *,
+        limit: int = MARKDOWN_CHUNK_LIMIT,
+        edit_interval: float = 1.0,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.message = message
+        self.limit = limit
+        self.edit_interval = edit_interval
+        self.clock = clock
+        self.sent_messages: list[Message] = []
+        self._raw = ""
+        self._current: Message | None = None
+        self._last_rendered = ""
+        self._last_edit_at = 0.0
+        self._retry_until = 0.0
+
+    @staticmethod
+    def render(raw: str) -> str:
+        head, separator, tail = raw.rpartition("\n")
+        rendered_head = refactor_string(head + separator) if separator else ""
+        return rendered_head + separator + escape_markdown_v2(tail)
+
+    async def feed(self, delta: str) -> None:
+        self._raw += delta
+        while len(self.render(self._raw)) > self.limit:
+            await self._rollover()
+        await self._maybe_edit()
+
+    async def finish(self) -> list[Message]:
+        while len(refactor_string(self._raw)) > self.limit:
+            await self._rollover()
+        final_text = refactor_string(self._raw)
+        if final_text.strip() and final_text != self._last_rendered:
+            await self._publish(final_text, final=True)
+        return self.sent_messages
+
+    def _find_cut(self) -> int:
+        for separator in CUT_SEPARATORS:
+            position = self._raw.rfind(separator, 0, self.limit + 1)
+            while position > 0:
+                if len(refactor_string(self._raw[:position])) <= self.limit:
+                    return position
+                position = self._raw.rfind(separator, 0, position)
+        # escaping at most doubles the length, headers add two stars
+        return max(self.limit // 2 - 2, 1)
+
+    async def _rollover(self) -> None:
+        cut = self._find_cut()
+        head, self._raw = self._raw[:cut], self._raw[cut:].lstrip("\n ")
+        await self._publish(refactor_string(head), final=True)
+        self._current = None
+        self._last_rendered = ""
+
+    async def _maybe_edit(self) -> None:
+        rendered = self.render(self._raw)
+        if not rendered.strip() or rendered == self._last_rendered:
+            return
+        now = self.clock()
+        if now < self._retry_until:
+            return
+        if self._current is not None and now - self._last_edit_at < self.edit_interval:
+            return
+        await self._publish(rendered, final=False)
+
+    async def _publish(self, text: str, *, final: bool) -> None:
+        try:
+            if self._current is None:
+                self._current = await self.message.answer(text, parse_mode=ParseMode.MARKDOWN_V2)
+                self.sent_messages.append(self._current)
+            else:
+                await self._current.edit_text(text, parse_mode=ParseMode.MARKDOWN_V2)
+        except TelegramRetryAfter as e:
+            if not final:
+                self._retry_until = self.clock() + e.retry_after
+                return
+            await sleep(e.retry_after)
+            await self._publish(text, final=final)
+            return
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                if final:
+                    raise
+                logger.warning("Skipping streamed edit rejected by Telegram: %s", e)
+                return
+        self._last_rendered = text
+        self._last_edit_at = self.clock()
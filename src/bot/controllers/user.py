@@ -8,6 +8,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.config import Settings
+from bot.internal.enums import AIPriority
 from bot.internal.lexicon import ORDER, QUESTIONS
 from database.models import User as BotUser
 from database.models import UserCounters
@@ -117,3 +118,9 @@ def check_action_limit(user: BotUser, settings: Settings) -> bool:
     if user.tg_id in settings.bot.ADMINS:
         return True
     return user.is_subscribed or user.action_count < settings.bot.ACTIONS_THRESHOLD
+
+
+def ai_priority(user: BotUser, settings: Settings) -> AIPriority:
+    if user.is_subscribed or user.tg_id in settings.bot.ADMINS:
+        return AIPriority.HIGH
+    return AIPriority.NORMAL
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Callable
+from time import monotonic
+from typing import Any
+
+from redis.asyncio import Redis
+from sqlalchemy import event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from bot.controllers.user import get_user_from_db_by_tg_id
+from database.models import User
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_CHANNEL = "user_cache:invalidate"
+CHANGED_USERS_KEY = "user_cache_changed_tg_ids"
+USER_COLUMNS = tuple(column.key for column in sa_inspect(User).column_attrs)
+
+
+class UserCache:
+    """
+    TTL + LRU cache of `users` rows by tg_id, stored as plain column values.
+    A hit is attached to the request session with merge(load=False): no SELECT is emitted and
+    changes made by the handler are still flushed by the unit of work.
+    Every commit that wrote a User drops it here and, over Redis pub/sub, on the other replicas;
+    the TTL bounds staleness for changes made outside the ORM or missed while unsubscribed.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: float = 30.0,
+        redis: Redis | None = None,
+        channel: str = USER_CACHE_CHANNEL,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.redis = redis
+        self.channel = channel
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._invalidations = 0
+        self._publish_tasks: set[asyncio.Task[None]] = set()
+
+    def configure(self, redis: Redis | None, *, maxsize: int | None = None, ttl: float | None = None) -> None:
+        self.redis = redis
+        if maxsize is not None:
+            self.maxsize = maxsize
+        if ttl is not None:
+            self.ttl = ttl
+        self.clear()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._invalidations += 1
+
+    def get_values(self, tg_id: int) -> dict[str, Any] | None:
+        entry = self._entries.get(tg_id)
+        if entry is None:
+            return None
+        expires_at, values = entry
+        if expires_at <= self.clock():
+            del self._entries[tg_id]
+            return None
+        self._entries.move_to_end(tg_id)
+        return values
+
+    def put(self, user: User) -> None:
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        loaded = sa_inspect(user).dict
+        if any(column not in loaded for column in USER_COLUMNS):
+            return
+        self._entries[user.tg_id] = (self.clock() + self.ttl, {column: loaded[column] for column in USER_COLUMNS})
+        self._entries.move_to_end(user.tg_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate_local(self, *tg_ids: int) -> None:
+        self._invalidations += 1
+        for tg_id in tg_ids:
+            self._entries.pop(tg_id, None)
+
+    async def invalidate(self, *tg_ids: int) -> None:
+        """Drop users here and on every other replica; call it after changing users outside the ORM."""
+        self.invalidate_local(*tg_ids)
+        await self._publish(tg_ids)
+
+    async def _publish(self, tg_ids: tuple[int, ...]) -> None:
+        if self.redis is None or not tg_ids:
+            return
+        try:
+            await self.redis.publish(self.channel, ",".join(map(str, tg_ids)))
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to publish user cache invalidation for %s", tg_ids, exc_info=True)
+
+    def invalidate_committed(self, tg_ids: set[int]) -> None:
+        """Session hook: the local drop is synchronous, the broadcast to other replicas runs in the background."""
+        self.invalidate_local(*tg_ids)
+        if self.redis is None:
+            return
+        task = asyncio.get_running_loop().create_task(self._publish(tuple(tg_ids)))
+        self._publish_tasks.add(task)
+        task.add_done_callback(self._publish_tasks.discard)
+
+    async def get_user(self, tg_id: int, db_session: AsyncSession) -> User | None:
+        values = self.get_values(tg_id)
+        if values is not None:
+            self.hits += 1
+            cached_user = User(**values)
+            make_transient_to_detached(cached_user)
+            return await db_session.merge(cached_user, load=False)
+        self.misses += 1
+        invalidations = self._invalidations
+        user = await get_user_from_db_by_tg_id(tg_id, db_session)
+        # An invalidation that arrived during the SELECT may be newer than the row we read.
+        if user is not None and invalidations == self._invalidations:
+            self.put(user)
+        return user
+
+    async def listen(self, retry_delay: float = 1.0) -> None:
+        """Apply invalidations published by other replicas; the cache is flushed after every reconnect."""
+        if self.redis is None:
+            return
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    self.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.invalidate_local(*(int(tg_id) for tg_id in message["data"].split(",")))
+            except Exception:  # noqa: BLE001
+                logger.warning("User cache subscription failed, resubscribing", exc_info=True)
+                self.clear()
+                await asyncio.sleep(retry_delay)
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, _flush_context: Any) -> None:
+    changed = session.info.setdefault(CHANGED_USERS_KEY, set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, User):
+            changed.add(instance.tg_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    changed = session.info.pop(CHANGED_USERS_KEY, None)
+    if changed:
+        user_cache.invalidate_committed(changed)
+
@@ -4,7 +4,9 @@ from io import BytesIO
 
 from aiogram.types import Message
 
+from bot.ai_admission import AIBusyError
 from bot.ai_client import AIClient
+from bot.internal.enums import AIPriority
 
 
 async def convert_to_mp3(audio: bytes) -> bytes:
@@ -34,7 +36,9 @@ async def convert_to_mp3(audio: bytes) -> bytes:
         return stdout
 
 
-async def process_voice(message: Message, openai_client: AIClient) -> str | None:
+async def process_voice(
+    message: Message, openai_client: AIClient, priority: AIPriority = AIPriority.NORMAL
+) -> str | None:
     try:
         voice = message.voice
         file_info = await message.bot.get_file(voice.file_id)
@@ -45,11 +49,10 @@ async def process_voice(message: Message, openai_client: AIClient) -> str | None
         audio_stream = BytesIO(mp3_audio)
         audio_stream.name = "audio.mp3"
 
-        transcription_response = await openai_client.client.audio.transcriptions.create(
-            file=audio_stream, model="whisper-1", response_format="text", language="ru"
-        )
-        return transcription_response.strip()
+        return await openai_client.transcribe(audio_stream, priority=priority)
 
+    except AIBusyError:
+        raise
     except Exception:
         logging.exception("Unexpected transcription error")
         await message.reply("Произошла непредвиденная ошибка при распознавании. Пожалуйста, попробуйте позже.")
@@ -58,7 +61,7 @@ async def process_voice(message: Message, openai_client: AIClient) -> str | None
 
 async def extract_text_from_message(message: Message, openai_client: AIClient) -> str | None:
     if message.voice:
-        return await process_voice(message, openai_client)
+        return await process_voice(message, openai_client, AIPriority.LOW)
     if message.text:
         return message.text.strip()
     await message.reply("Пожалуйста, ответьте текстом или голосовым сообщением.")
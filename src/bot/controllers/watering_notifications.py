@@ -1,20 +1,76 @@
+import asyncio
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from logging import getLogger
+from time import monotonic
 
 from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.controllers.garden import get_due_plants, mark_notified, should_notify
+from bot.controllers.garden import (
+    claim_due_plants,
+    get_due_plants,
+    get_watering_schedule_rows,
+    mark_notified,
+    release_claimed_plants,
+    should_notify,
+)
+from bot.controllers.watering_schedule import FAILED_REMINDER_RETRY_SECONDS, WateringSchedule, schedule_due_at
 from bot.internal.keyboards import garden_plant_kb
 from bot.internal.lexicon import garden_text
+from bot.internal.throttling import TELEGRAM_GLOBAL_RATE, TELEGRAM_PER_CHAT_INTERVAL, ChatPacer, TokenBucket
 
 logger = getLogger(__name__)
 
+# Only these failures may go through on a later tick; any other error (chat not found, deleted chat) is final.
+RETRYABLE_SEND_ERRORS = (TelegramRetryAfter, TelegramNetworkError, TelegramServerError)
+
+
+@dataclass
+class DispatchReport:
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    max_backlog: int = 0
+    started_at: float = field(default_factory=monotonic)
+    finished_at: float | None = None
+    max_lag_seconds: float = 0.0
+    total_lag_seconds: float = 0.0
+    failed_plant_ids: list[int] = field(default_factory=list)
+
+    def observe_lag(self, lag: float) -> None:
+        self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        self.total_lag_seconds += lag
+
+    def as_dict(self) -> dict[str, float | int]:
+        duration = (self.finished_at or monotonic()) - self.started_at
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "max_backlog": self.max_backlog,
+            "duration_s": round(duration, 3),
+            "throughput_per_s": round(self.sent / duration, 2) if duration > 0 else float(self.sent),
+            "avg_lag_s": round(self.total_lag_seconds / self.sent, 3) if self.sent else 0.0,
+            "max_lag_s": round(self.max_lag_seconds, 3),
+        }
+
 
 class NotificationDispatcher:
     async def send_watering_reminder(self, *, chat_id: int, plant_id: int, plant_name: str) -> None:
         raise NotImplementedError
 
+    async def drain(self) -> DispatchReport | None:
+        """Wait until every accepted reminder is delivered. Synchronous dispatchers have nothing to drain."""
+        return None
+
 
 class TelegramNotificationDispatcher(NotificationDispatcher):
     def __init__(self, bot: Bot) -> None:
@@ -29,9 +85,250 @@ class TelegramNotificationDispatcher(NotificationDispatcher):
         )
 
 
+class ThrottledNotificationDispatcher(NotificationDispatcher):
+    """
+    Bounded-concurrency pipeline in front of another dispatcher.
+    send_watering_reminder only enqueues and blocks while the queue is full (backpressure);
+    workers respect a global token bucket, per-chat pacing and Telegram RetryAfter answers.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        dispatcher: NotificationDispatcher,
+        *,
+        rate: float = TELEGRAM_GLOBAL_RATE,
+        concurrency: int = 10,
+        queue_size: int = 1000,
+        per_chat_interval: float = TELEGRAM_PER_CHAT_INTERVAL,
+        max_retries: int = 3,
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate)
+        self.pacer = ChatPacer(per_chat_interval)
+        self.queue: asyncio.Queue[tuple[float, dict[str, int | str]]] = asyncio.Queue(maxsize=queue_size)
+        self.report = DispatchReport()
+        self._workers: list[asyncio.Task] = []
+
+    @property
+    def backlog(self) -> int:
+        return self.queue.qsize()
+
+    @property
+    def is_saturated(self) -> bool:
+        return self.queue.full()
+
+    def _ensure_workers(self) -> None:
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def send_watering_reminder(self, *, chat_id: int, plant_id: int, plant_name: str) -> None:
+        self._ensure_workers()
+        await self.queue.put((monotonic(), {"chat_id": chat_id, "plant_id": plant_id, "plant_name": plant_name}))
+        self.report.max_backlog = max(self.report.max_backlog, self.queue.qsize())
+
+    async def _deliver(self, job: dict[str, int | str]) -> bool:
+        """Plants whose reminder failed with a RETRYABLE_SEND_ERRORS error are kept in report.failed_plant_ids."""
+        for attempt in range(self.max_retries + 1):
+            await self.pacer.wait(job["chat_id"])
+            await self.bucket.acquire()
+            try:
+                await self.dispatcher.send_watering_reminder(**job)
+            except TelegramRetryAfter as e:
+                if attempt >= self.max_retries:
+                    break
+                self.report.retried += 1
+                self.bucket.pause(e.retry_after)
+                logger.warning("Telegram flood control, pausing reminders for %ss", e.retry_after)
+            except TelegramForbiddenError:
+                logger.info("User %s blocked the bot, reminder for plant %s dropped", job["chat_id"], job["plant_id"])
+                return False
+            except RETRYABLE_SEND_ERRORS:
+                logger.warning("Failed to send watering reminder for plant %s", job["plant_id"], exc_info=True)
+                break
+            except Exception:  # noqa: BLE001
+                logger.warning("Watering reminder for plant %s dropped", job["plant_id"], exc_info=True)
+                return False
+            else:
+                return True
+        self.report.failed_plant_ids.append(job["plant_id"])
+        return False
+
+    async def _worker(self) -> None:
+        while True:
+            enqueued_at, job = await self.queue.get()
+            try:
+                if await self._deliver(job):
+                    self.report.sent += 1
+                    self.report.observe_lag(monotonic() - enqueued_at)
+                else:
+                    self.report.failed += 1
+            finally:
+                self.queue.task_done()
+
+    async def drain(self) -> DispatchReport:
+        await self.queue.join()
+        report, self.report = self.report, DispatchReport()
+        report.finished_at = monotonic()
+        self.pacer.clear()
+        return report
+
+    async def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
 class WateringNotificationService:
-    def __init__(self, dispatcher: NotificationDispatcher) -> None:
+    def __init__(self, dispatcher: NotificationDispatcher, schedule: WateringSchedule | None = None) -> None:
         self.dispatcher = dispatcher
+        self.schedule = schedule
+
+    async def _reschedule_claimed(self, claimed: list[Row], now: datetime) -> None:
+        if self.schedule is None:
+            return
+        try:
+            await self.schedule.apply(
+                (plant.id, schedule_due_at(plant.next_watering_at, now, now)) for plant in claimed
+            )
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to reschedule claimed plants", exc_info=True)
+
+    async def _reschedule_unclaimed(self, db_session: AsyncSession, now: datetime) -> None:
+        """Move plants that were due in the schedule but not claimed (inactive user, already reminded, raced)."""
+        if self.schedule is None:
+            return
+        try:
+            due_ids = await self.schedule.due_plant_ids(now)
+            if not due_ids:
+                return
+            rows = {row.id: row for row in await get_watering_schedule_rows(db_session, now, due_ids)}
+            await self.schedule.apply(
+                (
+                    plant_id,
+                    schedule_due_at(
+                        rows[plant_id].next_watering_at,
+                        rows[plant_id].last_notification_at,
+                        now,
+                        notifications_enabled=rows[plant_id].notifications_enabled,
+                        is_active=rows[plant_id].is_active,
+                        recheck=True,
+                    )
+                    if plant_id in rows
+                    else None,
+                )
+                for plant_id in due_ids
+            )
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to reschedule unclaimed plants", exc_info=True)
+
+    async def _release_failed(
+        self,
+        db_session: AsyncSession,
+        plant_ids: list[int],
+        now: datetime,
+        test_repeat_minutes: int | None,
+    ) -> None:
+        if not plant_ids:
+            return
+        await release_claimed_plants(db_session, plant_ids, now, test_repeat_minutes=test_repeat_minutes)
+        await db_session.commit()
+        logger.warning("Released %s plants with undelivered watering reminders", len(plant_ids))
+        if self.schedule is None:
+            return
+        retry_at = now + timedelta(seconds=FAILED_REMINDER_RETRY_SECONDS)
+        try:
+            await self.schedule.apply((plant_id, retry_at) for plant_id in plant_ids)
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to reschedule released plants", exc_info=True)
+
+    async def _send_claimed(self, plant: Row, failed_ids: list[int]) -> bool:
+        """Send one claimed reminder; a plant whose send may succeed later is added to `failed_ids`."""
+        try:
+            await self.dispatcher.send_watering_reminder(
+                chat_id=plant.user_tg_id,
+                plant_id=plant.id,
+                plant_name=plant.name,
+            )
+        except TelegramForbiddenError:
+            logger.info("User %s blocked the bot, reminder for plant %s dropped", plant.user_tg_id, plant.id)
+        except RETRYABLE_SEND_ERRORS:
+            logger.warning("Failed to send watering reminder for plant %s", plant.id, exc_info=True)
+            failed_ids.append(plant.id)
+        except Exception:  # noqa: BLE001
+            logger.warning("Watering reminder for plant %s dropped", plant.id, exc_info=True)
+        else:
+            return True
+        return False
+
+    async def resync_schedule(self, db_session: AsyncSession, now: datetime) -> int:
+        """Rebuild the schedule from the database; covers changes made while Redis was unavailable."""
+        if self.schedule is None:
+            return 0
+        rows = await get_watering_schedule_rows(db_session, now)
+        entries = []
+        for row in rows:
+            due_at = schedule_due_at(
+                row.next_watering_at,
+                row.last_notification_at,
+                now,
+                notifications_enabled=row.notifications_enabled,
+                is_active=row.is_active,
+            )
+            if due_at is not None:
+                entries.append((row.id, due_at))
+        count = await self.schedule.replace_all(entries)
+        logger.info("watering schedule rebuilt with %s plants", count)
+        return count
+
+    async def notify_due_plants(
+        self,
+        *,
+        db_session: AsyncSession,
+        now: datetime,
+        test_repeat_minutes: int | None = None,
+        batch_size: int = 100,
+    ) -> int:
+        """
+        Claim due plants batch by batch and send their reminders.
+        Each claim is committed before sending, so parallel workers split the load and a worker that
+        crashes mid-batch does not cause duplicates: unsent reminders of a claimed batch go out the next day.
+        Plants whose reminder failed with a retryable error (flood control, network, Telegram server) are released
+        once the batch is done and retried on a later tick; other failures are dropped like blocked chats.
+        """
+        sent_count = 0
+        failed_ids: list[int] = []
+        while True:
+            claimed = await claim_due_plants(
+                db_session,
+                now,
+                limit=batch_size,
+                test_repeat_minutes=test_repeat_minutes,
+            )
+            await db_session.commit()
+            if not claimed:
+                break
+            await self._reschedule_claimed(claimed, now)
+            for plant in claimed:
+                if await self._send_claimed(plant, failed_ids):
+                    sent_count += 1
+            if len(claimed) < batch_size:
+                break
+
+        await self._reschedule_unclaimed(db_session, now)
+        report = await self.dispatcher.drain()
+        if report is not None:
+            failed_ids.extend(report.failed_plant_ids)
+        await self._release_failed(db_session, failed_ids, now, test_repeat_minutes)
+        if report is not None:
+            logger.info("watering tick", extra=report.as_dict())
+            return report.sent
+        if sent_count:
+            logger.info("Sent %s watering reminders", sent_count)
+        return sent_count
 
     async def notify_user_due_plants(
         self,
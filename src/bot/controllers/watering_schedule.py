@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+WATERING_SCHEDULE_KEY = "watering:schedule"
+WATERING_WAKEUP_KEY = "watering:wakeup"
+RECHECK_DELAY_SECONDS = 5
+FAILED_REMINDER_RETRY_SECONDS = 300
+ZADD_CHUNK_SIZE = 1000
+
+
+def next_day_start(now: datetime) -> datetime:
+    return now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+
+def schedule_due_at(  # noqa: PLR0913
+    next_watering_at: datetime | None,
+    last_notification_at: datetime | None,
+    now: datetime,
+    *,
+    notifications_enabled: bool = True,
+    is_active: bool = True,
+    recheck: bool = False,
+) -> datetime | None:
+    """
+    When the worker has to look at a plant next, or None if it never has to.
+    Plants of inactive users and plants already reminded today are parked until tomorrow.
+    With recheck=True a plant that is still due (its claim raced an uncommitted change) is retried shortly.
+    """
+    if not notifications_enabled or next_watering_at is None:
+        return None
+    tomorrow = next_day_start(now)
+    if not is_active:
+        return max(next_watering_at, tomorrow)
+    day_start = tomorrow - timedelta(days=1)
+    if last_notification_at is not None and last_notification_at >= day_start:
+        return max(next_watering_at, tomorrow)
+    if recheck and next_watering_at <= now:
+        return now + timedelta(seconds=RECHECK_DELAY_SECONDS)
+    return next_watering_at
+
+
+class WateringSchedule:
+    """
+    Due times of garden plants in a Redis sorted set (member: plant id, score: unix timestamp).
+    The database stays the source of truth: the set only tells the worker when to run the claim query.
+    Without Redis every method is a no-op and the worker falls back to fixed-interval polling.
+    """
+
+    def __init__(
+        self,
+        redis: Redis | None = None,
+        key: str = WATERING_SCHEDULE_KEY,
+        wakeup_key: str = WATERING_WAKEUP_KEY,
+    ) -> None:
+        self.redis = redis
+        self.key = key
+        self.wakeup_key = wakeup_key
+
+    def configure(self, redis: Redis | None) -> None:
+        self.redis = redis
+
+    async def schedule(self, plant_id: int, due_at: datetime | None) -> None:
+        if self.redis is None:
+            return
+        if due_at is None:
+            await self.unschedule(plant_id)
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zadd(self.key, {str(plant_id): due_at.timestamp()})
+                pipe.zrange(self.key, 0, 0)
+                _, head = await pipe.execute()
+            if head and head[0] == str(plant_id):
+                await self.redis.lpush(self.wakeup_key, 1)
+                await self.redis.ltrim(self.wakeup_key, 0, 0)
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to schedule watering for plant %s", plant_id, exc_info=True)
+
+    async def unschedule(self, plant_id: int) -> None:
+        if self.redis is None:
+            return
+        try:
+            await self.redis.zrem(self.key, str(plant_id))
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to unschedule watering for plant %s", plant_id, exc_info=True)
+
+    async def apply(self, entries: Iterable[tuple[int, datetime | None]]) -> None:
+        if self.redis is None:
+            return
+        entries = list(entries)
+        to_add = {str(plant_id): due_at.timestamp() for plant_id, due_at in entries if due_at is not None}
+        to_remove = [str(plant_id) for plant_id, due_at in entries if due_at is None]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if to_add:
+                pipe.zadd(self.key, to_add)
+            if to_remove:
+                pipe.zrem(self.key, *to_remove)
+            await pipe.execute()
+
+    async def replace_all(self, entries: Iterable[tuple[int, datetime]]) -> int:
+        """Rebuild the set from scratch and swap it in atomically."""
+        if self.redis is None:
+            return 0
+        tmp_key = f"{self.key}:rebuild"
+        await self.redis.delete(tmp_key)
+        count = 0
+        chunk: dict[str, float] = {}
+        for plant_id, due_at in entries:
+            chunk[str(plant_id)] = due_at.timestamp()
+            if len(chunk) >= ZADD_CHUNK_SIZE:
+                await self.redis.zadd(tmp_key, chunk)
+                count += len(chunk)
+                chunk = {}
+        if chunk:
+            await self.redis.zadd(tmp_key, chunk)
+            count += len(chunk)
+        if count:
+            await self.redis.rename(tmp_key, self.key)
+        else:
+            await self.redis.delete(self.key)
+        return count
+
+    async def seconds_until_next(self, now: datetime) -> float | None:
+        if self.redis is None:
+            return None
+        head = await self.redis.zrange(self.key, 0, 0, withscores=True)
+        if not head:
+            return None
+        return max(head[0][1] - now.timestamp(), 0.0)
+
+    async def due_plant_ids(self, now: datetime) -> list[int]:
+        if self.redis is None:
+            return []
+        members = await self.redis.zrangebyscore(self.key, "-inf", now.timestamp())
+        return [int(member) for member in members]
+
+    async def wait_for_change(self, max_wait: float) -> bool:
+        """Sleep up to max_wait seconds; return early (True) when a sooner due time was scheduled."""
+        if max_wait <= 0:
+            return False
+        if self.redis is None:
+            await asyncio.sleep(max_wait)
+            return False
+        return bool(await self.redis.blpop([self.wakeup_key], timeout=max_wait))
+
+
+watering_schedule = WateringSchedule()
@@ -4,13 +4,15 @@ from logging import getLogger
 from aiogram import F, Router
 from aiogram.enums import ParseMode
 from aiogram.fsm.context import FSMContext
-from aiogram.types import FSInputFile, Message
+from aiogram.types import Message
 from aiogram.utils.chat_action import ChatActionSender
 from openai import BadRequestError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.ai_admission import AIBusyError
 from bot.ai_client import AIClient
 from bot.config import Settings
+from bot.controllers.analytics import analytics
 from bot.controllers.base import (
     refactor_string,
     validate_image_limit,
@@ -18,14 +20,19 @@ from bot.controllers.base import (
 )
 from bot.controllers.dialog_log import log_bot_response, log_user_request
 from bot.controllers.gpt import get_or_create_ai_thread
+from bot.controllers.log_channel import log_channel
 from bot.controllers.statistics import build_stat_message
-from bot.controllers.user import check_action_limit
+from bot.controllers.streaming import TelegramStreamWriter
+from bot.controllers.user import ai_priority, check_action_limit
 from bot.controllers.voice import process_voice
 
 #  from bot.handlers.base import extract_health_score
-from bot.internal.enums import AIState
+from bot.internal.consts import MARKDOWN_CHUNK_LIMIT
+from bot.internal.enums import AIPriority, AIState
 from bot.internal.keyboards import refresh_pictures_kb, subscription_kb
 from bot.internal.lexicon import replies
+from bot.internal.media import media_registry
+from database.database_connector import db_released
 from database.models import User
 
 router = Router()
@@ -37,7 +44,7 @@ async def increment_action_count_if_needed(user: User, settings: Settings, db_se
         db_session.add(user)
         await db_session.flush()
 
-def split_markdown_message(text: str, limit: int = 3500) -> list[str]: # noqa: C901
+def split_markdown_message(text: str, limit: int = MARKDOWN_CHUNK_LIMIT) -> list[str]: # noqa: C901
     """
     Split MarkdownV2 text into chunks below limit, trying to cut on paragraph/line boundaries.
     Avoid cutting inside italic spans (*...*) and avoid leaving trailing backslashes.
@@ -119,7 +126,7 @@ async def ai_assistant_photo_handler(
     forced_user_text: str | None = None,
 ):
     if not check_action_limit(user, settings):
-        await message.forward(settings.bot.CHAT_LOG_ID)
+        log_channel.forward(message)
         await message.answer_photo(
             FSInputFile(path="src/bot/data/greetings.png"),
             replies["action_limit_exceeded"],
@@ -127,7 +134,7 @@ async def ai_assistant_photo_handler(
         )
         log_text = replies["action_limit_exceeded_log"].format(username=user.username)
         logger.info(log_text)
-        await message.bot.send_message(settings.bot.CHAT_LOG_ID, log_text)
+        log_channel.post(log_text)
         return
 
     if not await validate_message_length(message, state):
@@ -136,7 +143,7 @@ async def ai_assistant_photo_handler(
         return
 
     thread_id = await get_or_create_ai_thread(user, openai_client, db_session)
-    await message.forward(settings.bot.CHAT_LOG_ID)
+    log_channel.forward(message)
 
     async with ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
         response, thread_id = await openai_client.get_response(thread_id, message.text, message, user.fullname)
@@ -150,7 +157,7 @@ async def ai_assistant_photo_handler(
             msg_answer = await message.answer(chunk, parse_mode=ParseMode.MARKDOWN_V2)
             sent_messages.append(msg_answer)
         for msg in sent_messages:
-            await msg.forward(settings.bot.CHAT_LOG_ID)
+            log_channel.forward(msg)
     if not user.is_subscribed and user.tg_id not in settings.bot.ADMINS:
         user.action_count += 1
     db_session.add(user)
@@ -165,40 +172,92 @@ async def ai_assistant_voice_handler(
     db_session: AsyncSession,
 ):
     if not check_action_limit(user, settings):
-        await message.forward(settings.bot.CHAT_LOG_ID)
-        await message.answer_photo(
-            photo = FSInputFile(path="src/bot/data/greetings.png"),
+        log_channel.forward(message)
+        await media_registry.answer_photo(
+            message,
+            "src/bot/data/greetings.png",
             caption=replies["action_limit_exceeded"],
             reply_markup=subscription_kb(),
         )
         log_text = replies["action_limit_exceeded_log"].format(username=user.username)
         logger.info(log_text)
-        await message.bot.send_message(settings.bot.CHAT_LOG_ID, log_text)
+        log_channel.post(log_text)
         logger.info(build_stat_message("Paywall_view", user.tg_id))
+        analytics.track("Paywall_view", user.tg_id)
         return
     thread_id = await get_or_create_ai_thread(user, openai_client, db_session)
-    await message.forward(settings.bot.CHAT_LOG_ID)
+    log_channel.forward(message)
     async with ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
-        transcription = await process_voice(message, openai_client)
-        user_request_log = await log_user_request(user, transcription, db_session)
-        response, thread_id = await openai_client.get_response(thread_id, transcription, message, user.fullname)
+        async with db_released(db_session):
+            transcription = await process_voice(message, openai_client, ai_priority(user, settings))
+        user_request_log_id = await log_user_request(user, transcription, db_session)
+        async with db_released(db_session):
+            response, thread_id = await openai_client.get_response(
+                thread_id, transcription, message, user.fullname, priority=ai_priority(user, settings)
+            )
         if response is None:
             return
         user.ai_thread = thread_id
         db_session.add(user)
         cleaned_response = refactor_string(response)
-        await log_bot_response(user, cleaned_response, db_session, user_request_log.id)
+        await log_bot_response(user, cleaned_response, db_session, user_request_log_id)
         sent_messages = []
         for chunk in split_markdown_message(cleaned_response):
             msg_answer = await message.answer(chunk, parse_mode=ParseMode.MARKDOWN_V2)
             sent_messages.append(msg_answer)
         for msg in sent_messages:
-            await msg.forward(settings.bot.CHAT_LOG_ID)
+            log_channel.forward(msg)
     await increment_action_count_if_needed(user, settings, db_session)
 
 
+async def answer_photo_with_ai(  # noqa: PLR0913
+    message: Message,
+    openai_client: AIClient,
+    user: User,
+    db_session: AsyncSession,
+    thread_id: str | None,
+    user_text: str,
+    priority: AIPriority,
+) -> bool:
+    """Download the photo, ask the AI about it and send the answer; False if the AI gave no answer."""
+    photo = message.photo[-1]
+    async with db_released(db_session):
+        file_info = await message.bot.get_file(photo.file_id)
+        file_bytes = await message.bot.download_file(file_info.file_path)
+    image_bytes = file_bytes.read()
+
+    prompt_text = (
+        f"{user_text}\n\nОпиши, что на изображении, и ответь пользователю с учётом текущего контекста диалога."
+    )
+    user_request_log_id = await log_user_request(user, user_text, db_session)
+
+    async with db_released(db_session):
+        response, thread_id = await openai_client.get_response_with_image(
+            thread_id=thread_id,
+            text=prompt_text,
+            image_bytes=image_bytes,
+            message=message,
+            fullname=user.fullname,
+            priority=priority,
+        )
+
+    if response is None:
+        return False
+    user.ai_thread = thread_id
+    db_session.add(user)
+    cleaned_response = refactor_string(response)
+    await log_bot_response(user, cleaned_response, db_session, user_request_log_id)
+    sent_messages = []
+    for chunk in split_markdown_message(cleaned_response):
+        msg_answer = await message.answer(chunk, parse_mode=ParseMode.MARKDOWN_V2)
+        sent_messages.append(msg_answer)
+    for msg in sent_messages:
+        log_channel.forward(msg)
+    return True
+
+
 @router.message(AIState.IN_AI_DIALOG, F.photo)
-async def ai_assistant_photo_handler(  # noqa: PLR0913, C901
+async def ai_assistant_photo_handler(  # noqa: PLR0913
     message: Message,
     state: FSMContext,
     openai_client: AIClient,
@@ -208,16 +267,18 @@ async def ai_assistant_photo_handler(  # noqa: PLR0913, C901
     forced_user_text: str | None = None,
 ):
     if not check_action_limit(user, settings):
-        await message.forward(settings.bot.CHAT_LOG_ID)
-        await message.answer_photo(
-            photo=FSInputFile(path="src/bot/data/greetings.png"),
+        log_channel.forward(message)
+        await media_registry.answer_photo(
+            message,
+            "src/bot/data/greetings.png",
             caption=replies["action_limit_exceeded"],
             reply_markup=subscription_kb(),
         )
         log_text = replies["action_limit_exceeded_log"].format(username=user.username)
         logger.info(log_text)
-        await message.bot.send_message(settings.bot.CHAT_LOG_ID, log_text)
+        log_channel.post(log_text)
         logger.info(build_stat_message("Paywall_view", user.tg_id))
+        analytics.track("Paywall_view", user.tg_id)
         return
     if message.media_group_id is not None:
         await message.answer(
@@ -225,19 +286,17 @@ async def ai_assistant_photo_handler(  # noqa: PLR0913, C901
         )
         return
     if user.tg_id not in settings.bot.ADMINS and not await validate_image_limit(user.tg_id, settings, db_session):
-        await message.answer_photo(
-            photo=FSInputFile(path="src/bot/data/not_happy.png"),
+        await media_registry.answer_photo(
+            message,
+            "src/bot/data/not_happy.png",
             caption=replies["photo_limit_exceeded"],
             reply_markup=refresh_pictures_kb(),
         )
-        await message.forward(settings.bot.CHAT_LOG_ID)
-        await message.bot.send_message(
-            settings.bot.CHAT_LOG_ID,
-            replies["pictures_limit_exceeded_log"].format(username=user.username),
-        )
+        log_channel.forward(message)
+        log_channel.post(replies["pictures_limit_exceeded_log"].format(username=user.username))
         return
     thread_id = await get_or_create_ai_thread(user, openai_client, db_session)
-    await message.forward(settings.bot.CHAT_LOG_ID)
+    log_channel.forward(message)
     user_text = (
         forced_user_text
         if forced_user_text is not None
@@ -256,37 +315,11 @@ async def ai_assistant_photo_handler(  # noqa: PLR0913, C901
 
     async with ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
         try:
-            photo = message.photo[-1]
-            file_info = await message.bot.get_file(photo.file_id)
-
-            file_bytes = await message.bot.download_file(file_info.file_path)
-            image_bytes = file_bytes.read()
-
-            prompt_text = (
-                f"{user_text}\n\nОпиши, что на изображении, и ответь пользователю с учётом текущего контекста диалога."
-            )
-            user_request_log = await log_user_request(user, user_text, db_session)
-
-            response, thread_id = await openai_client.get_response_with_image(
-                thread_id=thread_id,
-                text=prompt_text,
-                image_bytes=image_bytes,
-                message=message,
-                fullname=user.fullname,
+            answered = await answer_photo_with_ai(
+                message, openai_client, user, db_session, thread_id, user_text, ai_priority(user, settings)
             )
-
-            if response is None:
+            if not answered:
                 return
-            user.ai_thread = thread_id
-            db_session.add(user)
-            cleaned_response = refactor_string(response)
-            await log_bot_response(user, cleaned_response, db_session, user_request_log.id)
-            sent_messages = []
-            for chunk in split_markdown_message(cleaned_response):
-                msg_answer = await message.answer(chunk, parse_mode=ParseMode.MARKDOWN_V2)
-                sent_messages.append(msg_answer)
-            for msg in sent_messages:
-                await msg.forward(settings.bot.CHAT_LOG_ID)
 
         except BadRequestError as e:
             logger.exception("OpenAI API Error")
@@ -297,6 +330,8 @@ async def ai_assistant_photo_handler(  # noqa: PLR0913, C901
                     "Ошибка при обработке изображения. "
                     "Убедитесь, что изображение корректного формата (jpg, png) и попробуйте снова."
                 )
+        except AIBusyError:
+            raise
         except Exception:
             logger.exception("Unexpected error")
             await message.answer("Произошла непредвиденная ошибка. Пожалуйста, попробуйте позже.")
@@ -314,16 +349,18 @@ async def ai_assistant_text_handler( # noqa: PLR0913
     db_session: AsyncSession,
 ):
     if not check_action_limit(user, settings):
-        await message.forward(settings.bot.CHAT_LOG_ID)
-        await message.answer_photo(
-            photo = FSInputFile(path="src/bot/data/greetings.png"),
-            caption = replies["action_limit_exceeded"],
+        log_channel.forward(message)
+        await media_registry.answer_photo(
+            message,
+            "src/bot/data/greetings.png",
+            caption=replies["action_limit_exceeded"],
             reply_markup=subscription_kb(),
         )
         log_text = replies["action_limit_exceeded_log"].format(username=user.username)
         logger.info(log_text)
-        await message.bot.send_message(settings.bot.CHAT_LOG_ID, log_text)
+        log_channel.post(log_text)
         logger.info(build_stat_message("Paywall_view", user.tg_id))
+        analytics.track("Paywall_view", user.tg_id)
         return
 
     if not await validate_message_length(message, state):
@@ -332,23 +369,34 @@ async def ai_assistant_text_handler( # noqa: PLR0913
         return
 
     thread_id = await get_or_create_ai_thread(user, openai_client, db_session)
-    await message.forward(settings.bot.CHAT_LOG_ID)
+    log_channel.forward(message)
 
     async with ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
-        user_request_log = await log_user_request(user, message.text, db_session)
-        response, thread_id = await openai_client.get_response(thread_id, message.text, message, user.fullname)
+        user_request_log_id = await log_user_request(user, message.text, db_session)
+        sent_messages = []
+        async with db_released(db_session):
+            if settings.gpt.STREAM_RESPONSES:
+                writer = TelegramStreamWriter(message, edit_interval=settings.gpt.STREAM_EDIT_INTERVAL_SECONDS)
+                response, thread_id = await openai_client.stream_response(
+                    thread_id, message.text, message, user.fullname, writer.feed, priority=ai_priority(user, settings)
+                )
+                sent_messages = await writer.finish()
+            else:
+                response, thread_id = await openai_client.get_response(
+                    thread_id, message.text, message, user.fullname, priority=ai_priority(user, settings)
+                )
         if response is None:
             return
         user.ai_thread = thread_id
         db_session.add(user)
         cleaned_response = refactor_string(response)
-        await log_bot_response(user, cleaned_response, db_session, user_request_log.id)
-        sent_messages = []
-        for chunk in split_markdown_message(cleaned_response):
-            msg_answer = await message.answer(chunk, parse_mode=ParseMode.MARKDOWN_V2)
-            sent_messages.append(msg_answer)
+        await log_bot_response(user, cleaned_response, db_session, user_request_log_id)
+        if not sent_messages:
+            for chunk in split_markdown_message(cleaned_response):
+                msg_answer = await message.answer(chunk, parse_mode=ParseMode.MARKDOWN_V2)
+                sent_messages.append(msg_answer)
         for msg in sent_messages:
-            await msg.forward(settings.bot.CHAT_LOG_ID)
+            log_channel.forward(msg)
     await increment_action_count_if_needed(user, settings, db_session)
 
 
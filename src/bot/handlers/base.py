@@ -5,7 +5,7 @@ from random import choice
 from aiogram import F, Router
 from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
-from aiogram.types import FSInputFile, LabeledPrice, Message
+from aiogram.types import LabeledPrice, Message
 from aiogram.utils.chat_action import ChatActionSender
 from dateutil.relativedelta import relativedelta
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -20,8 +20,10 @@ from bot.controllers.user import (
     update_user_expiration,
 )
 from bot.controllers.voice import extract_text_from_message
-from bot.internal.enums import AIState, Form, PaidEntity
+from bot.internal.enums import AIPriority, AIState, Form, PaidEntity
 from bot.internal.lexicon import ORDER, REACTIONS, payment_text
+from bot.internal.media import media_registry
+from database.database_connector import db_released
 from database.models import Payment, User
 
 router = Router()
@@ -50,7 +52,7 @@ async def form_handler(
     question_index = data.get("question_index", choice(list(REACTIONS[field].keys()))) # noqa: S311
     reaction = REACTIONS[field][question_index].format(**{field: user_answer})
 
-    async with ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
+    async with db_released(db_session), ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
         await imitate_typing()
         await message.answer(reaction)
         await imitate_typing()
@@ -61,11 +63,15 @@ async def form_handler(
             # if not user.ai_thread:
             #     await openai_client.apply_context_to_thread(user, user_context, db_session)
             # else:
-            await openai_client.apply_context_to_thread(user, user_context, db_session, use_existing_thread=True)
-            await imitate_typing()
-            msg = await message.answer_photo(
-                FSInputFile(path="src/bot/data/magic_wand.png"),
-                payment_text["capability"],
+            await openai_client.apply_context_to_thread(
+                user, user_context, db_session, use_existing_thread=True, priority=AIPriority.LOW
+            )
+            async with db_released(db_session):
+                await imitate_typing()
+            msg = await media_registry.answer_photo(
+                message,
+                "src/bot/data/magic_wand.png",
+                caption=payment_text["capability"],
             )
             await msg.pin(disable_notification=True)
             await imitate_typing()
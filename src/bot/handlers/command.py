@@ -1,4 +1,4 @@
-from asyncio import sleep
+from asyncio import to_thread
 from datetime import UTC, datetime, timedelta
 from html import escape
 from logging import getLogger
@@ -6,23 +6,29 @@ from logging import getLogger
 from aiogram import F, Router
 from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, FSInputFile, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 from dateutil.relativedelta import relativedelta
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.config import Settings
+from bot.controllers.analytics import analytics, build_period_snapshots
 from bot.controllers.base import imitate_typing
+from bot.controllers.broadcast import (
+    create_broadcast_job,
+    format_broadcast_progress,
+    get_broadcast_job,
+    set_broadcast_status,
+)
 from bot.controllers.statistics import (
     build_stat_message,
-    build_stats_snapshot,
-    iter_stat_events,
     list_stat_log_paths,
+    stats_index,
 )
 from bot.controllers.user import ask_next_question, get_user_counter, has_active_subscription
-from bot.internal.enums import AIState, Form, SupportState
+from bot.internal.enums import AIState, BroadcastStatus, Form, SupportState
 from bot.internal.keyboards import share_contact_kb, support_kb, support_request_kb
 from bot.internal.lexicon import WELCOME_BY_SOURCE, replies, support_text
+from bot.internal.media import media_registry
 from bot.onboarding.start_variants import ONBOARDING_VARIANTS
 from database.models import User, UserCounters
 
@@ -52,6 +58,7 @@ async def command_handler( # noqa: PLR0913 C901 PLR0912
     match command.command:
         case "start":
             logger.info(build_stat_message("Start_bot", user.tg_id))
+            analytics.track("Start_bot", user.tg_id)
             current_state = raw_state
 
             if current_state in {
@@ -91,7 +98,7 @@ async def command_handler( # noqa: PLR0913 C901 PLR0912
                 )
                 variant = "onboarding_3"
             if cfg.get("photo") and variant != "onboarding_3":
-                await message.answer_photo(FSInputFile(cfg["photo"]))
+                await media_registry.answer_photo(message, cfg["photo"])
 
             if cfg.get("text"):
                 await message.answer(cfg["text"].format(fullname=user.fullname))
@@ -130,20 +137,22 @@ async def command_handler( # noqa: PLR0913 C901 PLR0912
                     await state.set_state(AIState.IN_AI_DIALOG) """
 
         case "support":
-            picture = FSInputFile(path="src/bot/data/with_book.png")
+            picture = "src/bot/data/with_book.png"
             if user.is_subscribed and user.expired_at and user.expired_at > datetime.now(user.expired_at.tzinfo):
                 current_date = datetime.now(user.expired_at.tzinfo)
                 days = (user.expired_at.date() - current_date.date()).days
                 user_counter: UserCounters = await get_user_counter(user.tg_id, db_session)
                 photos = settings.bot.PICTURES_THRESHOLD - user_counter.image_count
-                await message.answer_photo(
-                    photo=picture,
+                await media_registry.answer_photo(
+                    message,
+                    picture,
                     caption=support_text["subscribed"].format(days=days, photos=photos),
                     reply_markup=support_kb(is_subscribed=True),
                 )
             else:
-                await message.answer_photo(
-                    photo=picture,
+                await media_registry.answer_photo(
+                    message,
+                    picture,
                     caption=support_text["unsubscribed"].format(
                         actions=(settings.bot.ACTIONS_THRESHOLD - user.action_count)),
                     reply_markup=support_kb(is_subscribed=False),
@@ -248,7 +257,9 @@ async def stats_handler(
 
     now = datetime.now().astimezone()
     current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    events = iter_stat_events(list_stat_log_paths())
+    since = await analytics.tracking_since()
+    if since is None or stats_index.refreshed_at is None or stats_index.refreshed_at <= since:
+        await to_thread(stats_index.refresh, list_stat_log_paths())
     periods = [
         ("За все время", None, now),
         ("За последние 2 месяца", now - relativedelta(months=2), now),
@@ -257,8 +268,12 @@ async def stats_handler(
     ]
 
     sections: list[str] = ["📊 Статистика"]
-    for title, start_at, end_at in periods:
-        stats = build_stats_snapshot(events, start_at, end_at)
+    snapshots = await build_period_snapshots(
+        [(start_at, end_at) for _, start_at, end_at in periods],
+        since,
+        stats_index,
+    )
+    for (title, _, _), stats in zip(periods, snapshots, strict=True):
         sections.append(
             "\n".join(
                 [
@@ -276,6 +291,17 @@ async def stats_handler(
     await message.answer("\n".join(sections))
 
 
+async def start_broadcast(message: Message, db_session: AsyncSession, **content: str | None) -> None:
+    job = await create_broadcast_job(message.chat.id, db_session, **content)
+    if not job.total:
+        await set_broadcast_status(job, BroadcastStatus.FINISHED, db_session)
+        await message.answer("Пользователи не найдены")
+        return
+    progress_message = await message.answer(format_broadcast_progress(job))
+    job.progress_message_id = progress_message.message_id
+    await db_session.flush()
+
+
 @router.message(Command("broadcast"))
 async def broadcast_handler(
     message: Message,
@@ -295,32 +321,8 @@ async def broadcast_handler(
         )
         return
 
-    result = await db_session.execute(
-        select(User.tg_id)
-    )
-    user_ids: list[int] = result.scalars().all()
+    await start_broadcast(message, db_session, text=text)
 
-    if not user_ids:
-        await message.answer("Пользователи не найдены")
-        return
-
-    sent = 0
-    failed = 0
-
-    for user_id in user_ids:
-        try:
-            await message.bot.send_message(user_id, text)
-            sent += 1
-            await sleep(0.05)
-        except Exception: # noqa: BLE001
-            failed += 1
-
-    await message.answer(
-        "📢 <b>Рассылка завершена</b>\n\n"
-        f"👥 Всего пользователей: {len(user_ids)}\n"
-        f"✅ Отправлено: {sent}\n"
-        f"❌ Ошибок: {failed}"
-    )
 
 @router.message(Command("broadcast_photo"))
 async def broadcast_photo_handler(
@@ -342,30 +344,29 @@ async def broadcast_photo_handler(
 
     photo = message.reply_to_message.photo[-1]
     caption = message.reply_to_message.caption or ""
+    await start_broadcast(message, db_session, text=caption, photo_file_id=photo.file_id)
 
-    result = await db_session.execute(
-        select(User.tg_id)
-    )
-    user_ids = result.scalars().all()
 
-    sent = 0
-    failed = 0
+@router.message(Command("broadcast_pause", "broadcast_resume", "broadcast_status"))
+async def broadcast_control_handler(
+    message: Message,
+    command: CommandObject,
+    settings: Settings,
+    db_session: AsyncSession,
+) -> None:
+    if message.from_user.id not in settings.bot.ADMINS:
+        await message.answer("❌ У вас нет прав на рассылку")
+        return
 
-    for user_id in user_ids:
-        try:
-            await message.bot.send_photo(
-                chat_id=user_id,
-                photo=photo.file_id,
-                caption=caption,
-            )
-            sent += 1
-            await sleep(0.05)
-        except Exception: # noqa: BLE001
-            failed += 1
-
-    await message.answer(
-        "📢 <b>Рассылка с картинкой завершена</b>\n\n"
-        f"👥 Всего: {len(user_ids)}\n"
-        f"✅ Отправлено: {sent}\n"
-        f"❌ Ошибок: {failed}"
-    )
+    job_id = int(command.args) if command.args and command.args.strip().isdigit() else None
+    job = await get_broadcast_job(job_id, db_session)
+    if job is None:
+        await message.answer("Рассылка не найдена")
+        return
+
+    match command.command:
+        case "broadcast_pause" if job.status == BroadcastStatus.RUNNING:
+            await set_broadcast_status(job, BroadcastStatus.PAUSED, db_session)
+        case "broadcast_resume" if job.status == BroadcastStatus.PAUSED:
+            await set_broadcast_status(job, BroadcastStatus.RUNNING, db_session)
+    await message.answer(format_broadcast_progress(job))
@@ -1,16 +1,36 @@
 import logging
 import traceback
+from contextlib import suppress
 from html import escape
 
 import aiogram
 from aiogram import Router
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import ExceptionTypeFilter
 from aiogram.types import ErrorEvent
 
+from bot.ai_admission import AIBusyError
 from bot.config import Settings
+from bot.internal.lexicon import replies
 
 router = Router()
 
 
+@router.errors(ExceptionTypeFilter(AIBusyError))
+async def ai_busy_handler(error_event: ErrorEvent):
+    """OpenAI admission refused the request: tell the user right away instead of alerting admins."""
+    update = error_event.update
+    logging.warning("AI busy reply", extra={"error": str(error_event.exception)})
+    if update.callback_query is not None:
+        with suppress(TelegramBadRequest):
+            await update.callback_query.answer()
+        message = update.callback_query.message
+    else:
+        message = update.message
+    if message is not None:
+        await message.answer(replies["ai_busy"])
+
+
 @router.errors()
 async def error_handler(error_event: ErrorEvent, bot: aiogram.Bot, settings: Settings):
     exc_info = error_event.exception
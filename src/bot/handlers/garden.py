@@ -11,8 +11,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, FSInputFile, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.ai_client import AIClient
-from bot.config import Settings
+from bot.ai_client import AIClient, is_image_error_reply
 from bot.controllers.garden import (
     GARDEN_STATUS_CRITICAL,
     GARDEN_STATUS_HEALTHY,
@@ -33,10 +32,12 @@ from bot.controllers.garden import (
 )
 from bot.controllers.garden_log import log_garden_action
 from bot.controllers.gpt import get_or_create_ai_thread
+from bot.controllers.image_analysis_cache import CachedAnalysis, image_analysis_cache
+from bot.controllers.log_channel import log_channel
 from bot.controllers.statistics import build_stat_message
 from bot.controllers.user import has_active_subscription
 from bot.internal.callbacks import GardenCallbackFactory
-from bot.internal.enums import AIState, GardenAction, GardenState
+from bot.internal.enums import AIPriority, AIState, GardenAction, GardenState
 from bot.internal.keyboards import (
     dialog_menu_kb,
     garden_add_choice_kb,
@@ -51,6 +52,8 @@ from bot.internal.keyboards import (
     subscription_kb,
 )
 from bot.internal.lexicon import garden_text
+from bot.internal.media import media_registry
+from database.database_connector import db_released
 from database.models import GardenPlant, User
 
 router = Router()
@@ -151,7 +154,6 @@ async def post_payment_stay_dialog(
     callback: CallbackQuery,
     state: FSMContext,
     user: User,
-    settings: Settings,
     db_session: AsyncSession,
 ) -> None:
     await callback.answer()
@@ -160,9 +162,8 @@ async def post_payment_stay_dialog(
     await db_session.flush()
     decision_text = "Остаться в IN_AI_DIALOG"
     logger.info("%s | decision=%s", build_stat_message("Postpay_choice", user.tg_id), decision_text)
-    await callback.message.bot.send_message(
-        settings.bot.CHAT_LOG_ID,
-        f"[postpay_choice] user={user.tg_id} @{user.username} decision={decision_text} action_count={user.action_count}",
+    log_channel.post(
+        f"[postpay_choice] user={user.tg_id} @{user.username} decision={decision_text} action_count={user.action_count}"
     )
     await callback.message.answer(
         "Отлично, остаёмся в режиме диалога 💬",
@@ -175,7 +176,6 @@ async def post_payment_open_garden_stub(
     callback: CallbackQuery,
     state: FSMContext,
     user: User,
-    settings: Settings,
     db_session: AsyncSession,
 ) -> None:
     await callback.answer()
@@ -184,17 +184,17 @@ async def post_payment_open_garden_stub(
     await db_session.flush()
     decision_text = "Перейти в сад"
     logger.info("%s | decision=%s", build_stat_message("Postpay_choice", user.tg_id), decision_text)
-    await callback.message.bot.send_message(
-        settings.bot.CHAT_LOG_ID,
-        f"[postpay_choice] user={user.tg_id} @{user.username} decision={decision_text} action_count={user.action_count}",
+    log_channel.post(
+        f"[postpay_choice] user={user.tg_id} @{user.username} decision={decision_text} action_count={user.action_count}"
     )
     caption = (
         "Я автоматически создал раздел 🏡 Мой сад и бережно перенес твое растение туда. "
         "Теперь я помню его историю болезней и график полива.\n\n"
         "Хочешь добавить сюда остальных зеленых жильцов, или пока займемся этим?"
     )
-    await callback.message.answer_photo(
-        photo=FSInputFile(path="src/bot/data/pitomnik.png"),
+    await media_registry.answer_photo(
+        callback.message,
+        "src/bot/data/pitomnik.png",
         caption=caption,
         reply_markup=garden_welcome_kb(),
     )
@@ -287,15 +287,11 @@ async def open_garden_by_command(
     message: Message,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     if not await ensure_garden_access(message, user):
         return
-    await log_garden_action(
-        message=message,
-        state=None,
+    log_garden_action(
         user=user,
-        settings=settings,
         action="open_garden",
         user_message="/garden",
         bot_response="Показан список растений",
@@ -308,17 +304,13 @@ async def open_garden(
     callback: CallbackQuery,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await clear_callback_markup(callback)
     if not await ensure_garden_access(callback.message, user):
         return
-    await log_garden_action(
-        message=callback.message,
-        state=None,
+    log_garden_action(
         user=user,
-        settings=settings,
         action="open_garden",
         user_message="callback:garden_open",
         bot_response="Показан список растений",
@@ -330,15 +322,11 @@ async def open_garden_from_dialog_menu(
     message: Message,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     if not await ensure_garden_access(message, user):
         return
-    await log_garden_action(
-        message=message,
-        state=None,
+    log_garden_action(
         user=user,
-        settings=settings,
         action="open_garden",
         user_message="🏡 Мой сад",
         bot_response="Показан список растений",
@@ -352,18 +340,15 @@ async def add_garden_plant_prompt(
     callback: CallbackQuery,
     state: FSMContext,
     user: User,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await clear_callback_markup(callback)
     if not await ensure_garden_access(callback.message, user):
         return
     await state.set_state(GardenState.WAITING_ADD_PLANT_CHOICE)
-    await log_garden_action(
-        message=callback.message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="start_add_plant",
         user_message="callback:add_plant",
         bot_response="Показан выбор сценария добавления",
@@ -378,7 +363,6 @@ async def add_garden_plant_with_photo(
     callback: CallbackQuery,
     state: FSMContext,
     user: User,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await clear_callback_markup(callback)
@@ -390,11 +374,9 @@ async def add_garden_plant_with_photo(
         garden_health_status=GARDEN_STATUS_HEALTHY,
     )
     await state.set_state(GardenState.WAITING_NEW_PLANT_PHOTO)
-    await log_garden_action(
-        message=callback.message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="choose_add_with_photo",
         user_message="callback:add_with_photo",
         bot_response="Запрошено фото растения",
@@ -407,18 +389,15 @@ async def add_garden_plant_without_photo(
     callback: CallbackQuery,
     state: FSMContext,
     user: User,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await clear_callback_markup(callback)
     if not await ensure_garden_access(callback.message, user):
         return
     await state.set_state(GardenState.WAITING_PLANT_NAME)
-    await log_garden_action(
-        message=callback.message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="choose_add_without_photo",
         user_message="callback:add_without_photo",
         bot_response=garden_text["add_prompt"],
@@ -434,19 +413,11 @@ async def garden_add_photo_received(
     user: User,
     db_session: AsyncSession,
     openai_client: AIClient,
-    settings: Settings,
 ) -> None:
     if not await ensure_garden_access(message, user, state=state, clear_state_on_denied=True):
         return
 
     photo = message.photo[-1]
-    file_info = await message.bot.get_file(photo.file_id)
-    file_bytes = await message.bot.download_file(file_info.file_path)
-    image_bytes = file_bytes.read()
-    extension = Path(file_info.file_path or "").suffix or ".jpg"
-    GARDEN_PHOTO_STORAGE_DIR.mkdir(parents=True, exist_ok=True)
-    photo_path = GARDEN_PHOTO_STORAGE_DIR / f"{user.tg_id}_{uuid4().hex}{extension}"
-    photo_path.write_bytes(image_bytes)
     thread_id = await get_or_create_ai_thread(user, openai_client, db_session)
     prompt = (
         "Проанализируй растение на фото и ответь СТРОГО в таком формате без пояснений:\n"
@@ -455,31 +426,49 @@ async def garden_add_photo_received(
         "WATER_DAYS: <целое число дней полива>\n"
         "Никакого дополнительного текста."
     )
-    await log_garden_action(
-        message=message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="garden_ai_request",
         user_message="[photo]",
         bot_response="Фото отправлено в AI на анализ вида, состояния и частоты полива",
     )
-    ai_result_raw, thread_id = await openai_client.get_response_with_image(
-        thread_id=thread_id,
-        text=prompt,
-        image_bytes=image_bytes,
-        message=message,
-        fullname=user.fullname,
-    )
+    photo_path: str | None = None
+
+    async def analyse(image_bytes: bytes, telegram_path: str | None) -> CachedAnalysis | None:
+        nonlocal photo_path, thread_id
+        extension = Path(telegram_path or "").suffix or ".jpg"
+        GARDEN_PHOTO_STORAGE_DIR.mkdir(parents=True, exist_ok=True)
+        stored_path = GARDEN_PHOTO_STORAGE_DIR / f"{user.tg_id}_{uuid4().hex}{extension}"
+        stored_path.write_bytes(image_bytes)
+        photo_path = str(stored_path)
+        response, thread_id = await openai_client.get_response_with_image(
+            thread_id=thread_id,
+            text=prompt,
+            image_bytes=image_bytes,
+            message=message,
+            fullname=user.fullname,
+            priority=AIPriority.HIGH,
+        )
+        if not response or is_image_error_reply(response):
+            return None
+        return CachedAnalysis(response, photo_path)
+
+    # a resent photo reuses the stored file and the earlier answer
+    async with db_released(db_session):
+        cached, _ = await image_analysis_cache.analyse_photo(
+            message.bot, photo.file_id, photo.file_unique_id, user.tg_id, prompt, analyse, kind="garden"
+        )
+    if cached is not None:
+        photo_path = cached.file_path
+    ai_result_raw = cached.text if cached else None
     ai_result = parse_garden_ai_result(ai_result_raw)
     guessed_plant = ai_result["name"]
     health_status = str(ai_result["health_status"])
     watering_days = int(ai_result["watering_days"])
-    await log_garden_action(
-        message=message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="garden_ai_response",
         plant_name=str(guessed_plant) if guessed_plant else None,
         details=f"health={health_status}; watering_days={watering_days}",
@@ -488,7 +477,7 @@ async def garden_add_photo_received(
     user.ai_thread = thread_id
     db_session.add(user)
     await state.update_data(
-        garden_photo_file_path=str(photo_path),
+        garden_photo_file_path=photo_path,
         garden_photo_analysis=(
             f"AI-определение по фото: {guessed_plant or 'не получено'}\n"
             f"AI-оценка здоровья: {health_status}\n"
@@ -498,11 +487,9 @@ async def garden_add_photo_received(
         garden_watering_interval_days=watering_days,
     )
     if not guessed_plant:
-        await log_garden_action(
-            message=message,
-            state=state,
+        log_garden_action(
+            current_state=await state.get_state(),
             user=user,
-            settings=settings,
             action="photo_processed_fallback_to_manual_name",
             details=f"health={health_status}; watering_days={watering_days}",
             user_message="[photo]",
@@ -513,11 +500,9 @@ async def garden_add_photo_received(
         return
 
     await state.update_data(garden_guessed_plant=guessed_plant)
-    await log_garden_action(
-        message=message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="photo_processed_guess_ready",
         plant_name=guessed_plant,
         details=f"health={health_status}; watering_days={watering_days}",
@@ -534,17 +519,14 @@ async def garden_confirm_guess_yes(
     callback: CallbackQuery,
     state: FSMContext,
     user: User,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     data = await state.get_data()
     guessed = data.get("garden_guessed_plant", "растение")
     await state.set_state(GardenState.WAITING_PLANT_NAME)
-    await log_garden_action(
-        message=callback.message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="confirm_species_yes",
         plant_name=str(guessed),
         user_message="callback:confirm_guess_yes",
@@ -558,15 +540,12 @@ async def garden_confirm_guess_no(
     callback: CallbackQuery,
     state: FSMContext,
     user: User,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await state.set_state(GardenState.WAITING_PLANT_NAME)
-    await log_garden_action(
-        message=callback.message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="confirm_species_no",
         user_message="callback:confirm_guess_no",
         bot_response="Запрошено ручное название растения",
@@ -578,15 +557,12 @@ async def garden_confirm_guess_retake(
     callback: CallbackQuery,
     state: FSMContext,
     user: User,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await state.set_state(GardenState.WAITING_NEW_PLANT_PHOTO)
-    await log_garden_action(
-        message=callback.message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="retake_photo",
         user_message="callback:confirm_guess_retake",
         bot_response="Запрошено новое фото растения",
@@ -604,7 +580,6 @@ async def add_garden_plant(
     message: Message,
     state: FSMContext,
     user: User,
-    settings: Settings,
 ) -> None:
     if not await ensure_garden_access(message, user, state=state, clear_state_on_denied=True):
         return
@@ -621,11 +596,9 @@ async def add_garden_plant(
     )
     recommendation = format_watering_recommendation_days(max(1, water_days))
     await state.set_state(GardenState.WAITING_WATERING_INTERVAL_CONFIRM)
-    await log_garden_action(
-        message=message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="set_plant_name",
         plant_name=plant_name,
         details=f"recommended_watering_days={max(1, water_days)}",
@@ -642,18 +615,15 @@ async def add_garden_plant(
             callback: CallbackQuery,
             state: FSMContext,
             user: User,
-            settings: Settings,
     ) -> None:
         await callback.answer()
         await clear_callback_markup(callback)
         await state.set_state(GardenState.WAITING_LAST_WATERED_DATE)
         data = await state.get_data()
         plant_name = data.get("garden_pending_plant_name")
-        await log_garden_action(
-            message=callback.message,
-            state=state,
+        log_garden_action(
+            current_state=await state.get_state(),
             user=user,
-            settings=settings,
             action="confirm_watering_interval_yes",
             plant_name=str(plant_name) if plant_name else None,
             details=f"watering_days={data.get('garden_watering_interval_days', 7)}",
@@ -669,18 +639,15 @@ async def add_garden_plant(
             callback: CallbackQuery,
             state: FSMContext,
             user: User,
-            settings: Settings,
     ) -> None:
         await callback.answer()
         await clear_callback_markup(callback)
         await state.set_state(GardenState.WAITING_WATERING_INTERVAL_DAYS)
         data = await state.get_data()
         plant_name = data.get("garden_pending_plant_name")
-        await log_garden_action(
-            message=callback.message,
-            state=state,
+        log_garden_action(
+            current_state=await state.get_state(),
             user=user,
-            settings=settings,
             action="choose_change_watering_interval",
             plant_name=str(plant_name) if plant_name else None,
             user_message="callback:confirm_watering_change",
@@ -695,7 +662,6 @@ async def garden_set_watering_interval_days(
     message: Message,
     state: FSMContext,
     user: User,
-    settings: Settings,
 ) -> None:
     raw_value = (message.text or "").strip()
     if not raw_value.isdigit():
@@ -711,11 +677,9 @@ async def garden_set_watering_interval_days(
     await state.set_state(GardenState.WAITING_LAST_WATERED_DATE)
     data = await state.get_data()
     plant_name = data.get("garden_pending_plant_name")
-    await log_garden_action(
-        message=message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="set_watering_interval_days",
         plant_name=str(plant_name) if plant_name else None,
         details=f"watering_days={days}",
@@ -735,7 +699,6 @@ async def add_garden_plant_last_watered(
     state: FSMContext,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     if not await ensure_garden_access(message, user, state=state, clear_state_on_denied=True):
         return
@@ -800,11 +763,8 @@ async def add_garden_plant_last_watered(
     await db_session.flush()
 
     await state.clear()
-    await log_garden_action(
-        message=message,
-        state=None,
+    log_garden_action(
         user=user,
-        settings=settings,
         action="plant_added",
         plant_name=plant_name,
         details=(
@@ -845,7 +805,6 @@ async def view_plant_photo(
     callback_data: GardenCallbackFactory,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await clear_callback_markup(callback)
@@ -854,11 +813,8 @@ async def view_plant_photo(
         await callback.message.answer(garden_text["not_found"])
         return
     photo = await get_primary_plant_photo(plant.id, db_session)
-    await log_garden_action(
-        message=callback.message,
-        state=None,
+    log_garden_action(
         user=user,
-        settings=settings,
         action="view_plant_photo",
         plant_name=plant.name,
         user_message=f"callback:view_photo:{plant.id}",
@@ -884,7 +840,6 @@ async def request_plant_photo_update(
     state: FSMContext,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await clear_callback_markup(callback)
@@ -894,11 +849,9 @@ async def request_plant_photo_update(
         return
     await state.update_data(garden_update_photo_plant_id=plant.id)
     await state.set_state(GardenState.WAITING_PLANT_PHOTO_UPDATE)
-    await log_garden_action(
-        message=callback.message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="request_photo_update",
         plant_name=plant.name,
         user_message=f"callback:update_photo:{plant.id}",
@@ -915,7 +868,6 @@ async def update_plant_photo(
     state: FSMContext,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     if not await ensure_garden_access(message, user, state=state, clear_state_on_denied=True):
         return
@@ -943,11 +895,8 @@ async def update_plant_photo(
     )
     await add_history_entry(plant.id, f"Фото обновлено ({datetime.now(UTC):%d.%m})", db_session)
     await state.clear()
-    await log_garden_action(
-        message=message,
-        state=None,
+    log_garden_action(
         user=user,
-        settings=settings,
         action="update_plant_photo",
         plant_name=plant.name,
         user_message="[photo]",
@@ -968,7 +917,6 @@ async def mark_watered(
     callback_data: GardenCallbackFactory,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await clear_callback_markup(callback)
@@ -981,11 +929,8 @@ async def mark_watered(
             f"Сегодня «{plant.name}» уже был полит(а) 💧\n"
             "Дважды за день поливать нельзя — это плохо для растения."
         )
-        await log_garden_action(
-            message=callback.message,
-            state=None,
+        log_garden_action(
             user=user,
-            settings=settings,
             action="mark_watered_blocked_same_day",
             plant_name=plant.name,
             user_message=f"callback:watered:{callback_data.plant_id}",
@@ -994,11 +939,8 @@ async def mark_watered(
         await callback.message.answer(warning_text)
         return
     await mark_plant_watered(plant, db_session)
-    await log_garden_action(
-        message=callback.message,
-        state=None,
+    log_garden_action(
         user=user,
-        settings=settings,
         action="mark_watered",
         plant_name=plant.name,
         details=f"next_watering={format_next_watering(plant)}",
@@ -1015,7 +957,6 @@ async def plant_settings(
     callback_data: GardenCallbackFactory,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await clear_callback_markup(callback)
@@ -1023,11 +964,8 @@ async def plant_settings(
     if not plant:
         await callback.message.answer(garden_text["not_found"])
         return
-    await log_garden_action(
-        message=callback.message,
-        state=None,
+    log_garden_action(
         user=user,
-        settings=settings,
         action="open_plant_settings",
         plant_name=plant.name,
         user_message=f"callback:settings:{plant.id}",
@@ -1064,7 +1002,6 @@ async def rename_plant_handler(
     state: FSMContext,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     if not await ensure_garden_access(message, user, state=state, clear_state_on_denied=True):
         return
@@ -1082,11 +1019,8 @@ async def rename_plant_handler(
     old_name = plant.name
     await rename_plant(plant, new_name, db_session)
     await state.clear()
-    await log_garden_action(
-        message=message,
-        state=None,
+    log_garden_action(
         user=user,
-        settings=settings,
         action="rename_plant",
         plant_name=new_name,
         details=f"old_name={old_name}",
@@ -1103,7 +1037,6 @@ async def toggle_notifications(
     callback_data: GardenCallbackFactory,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await clear_callback_markup(callback)
@@ -1113,11 +1046,8 @@ async def toggle_notifications(
         return
     await toggle_plant_notifications(plant, db_session)
     status_text = garden_text["notifications_on"] if plant.notifications_enabled else garden_text["notifications_off"]
-    await log_garden_action(
-        message=callback.message,
-        state=None,
+    log_garden_action(
         user=user,
-        settings=settings,
         action="toggle_notifications",
         plant_name=plant.name,
         details=f"notifications_enabled={plant.notifications_enabled}",
@@ -1137,7 +1067,6 @@ async def delete_confirm(
     callback_data: GardenCallbackFactory,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await clear_callback_markup(callback)
@@ -1145,11 +1074,8 @@ async def delete_confirm(
     if not plant:
         await callback.message.answer(garden_text["not_found"])
         return
-    await log_garden_action(
-        message=callback.message,
-        state=None,
+    log_garden_action(
         user=user,
-        settings=settings,
         action="delete_confirm",
         plant_name=plant.name,
         user_message=f"callback:delete_confirm:{callback_data.plant_id}",
@@ -1167,7 +1093,6 @@ async def delete_plant_handler(
     callback_data: GardenCallbackFactory,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await clear_callback_markup(callback)
@@ -1177,11 +1102,8 @@ async def delete_plant_handler(
         return
     plant_name = plant.name
     await delete_plant(plant, db_session)
-    await log_garden_action(
-        message=callback.message,
-        state=None,
+    log_garden_action(
         user=user,
-        settings=settings,
         action="delete_plant",
         plant_name=plant_name,
         user_message=f"callback:delete:{callback_data.plant_id}",
@@ -1209,7 +1131,6 @@ async def back_handler(
     state: FSMContext,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ) -> None:
     await callback.answer()
     await clear_callback_markup(callback)
@@ -1219,11 +1140,9 @@ async def back_handler(
             await show_plant_detail(callback.message, plant, db_session)
             return
     await state.set_state(AIState.IN_AI_DIALOG)
-    await log_garden_action(
-        message=callback.message,
-        state=state,
+    log_garden_action(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         action="back_to_dialog",
         user_message="callback:back",
         bot_response="Возврат в режим диалога",
@@ -1,18 +1,15 @@
-import asyncio
 import re
-import tempfile
 from asyncio import sleep
 from datetime import UTC, datetime, timedelta
 from logging import getLogger
-from pathlib import Path
 
 from aiogram import F, Router
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.types import (
+    BufferedInputFile,
     CallbackQuery,
-    FSInputFile,
     InlineKeyboardButton,
     InlineKeyboardMarkup,
     Message,
@@ -21,21 +18,27 @@ from aiogram.utils.chat_action import ChatActionSender
 from sqlalchemy import desc, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.ai_client import AIClient
+from bot.ai_client import AIClient, is_image_error_reply
 from bot.config import Settings
+from bot.controllers.analytics import analytics
 from bot.controllers.base import (
     validate_image_limit,
 )
 from bot.controllers.gpt import get_or_create_ai_thread
+from bot.controllers.image_analysis_cache import CachedAnalysis, image_analysis_cache
+from bot.controllers.log_channel import log_channel
 from bot.controllers.onboarding_log import log_onboarding_step
 from bot.controllers.payments import add_payment_to_db, get_subscription_payment
 from bot.controllers.statistics import build_stat_message
 from bot.controllers.user import check_action_limit
-from bot.handlers.pdf_generator import generate_plan_pdf
-from bot.internal.enums import AIState
+from bot.handlers.pdf_generator import plan_pdf_renderer
+from bot.internal.delayed_jobs import delayed_jobs
+from bot.internal.enums import AIPriority, AIState
 from bot.internal.keyboards import payment_link_kb, refresh_pictures_kb, subscription_kb
 from bot.internal.lexicon import payment_text, replies
+from bot.internal.media import media_registry
 from bot.middlewares.user_limit import settings
+from database.database_connector import db_released
 from database.models import OneTimePurchase, PlantAnalysis, User
 
 router = Router()
@@ -45,7 +48,8 @@ ONBOARDING_LOW_SCORE_THRESHOLD = 5
 ONBOARDING_RESCUE_SCORE_THRESHOLD = 5
 CITY_LETTERS_RATIO_THRESHOLD = 0.6
 MIN_CITY_LETTERS = 2
-BACKGROUND_TASKS: set[asyncio.Task[None]] = set()
+HOME_REMINDER_JOB = "onboarding_home_reminder"
+PLAN_READY_CAPTION = "📄 Твой персональный план ухода готов 🌱"
 
 async def safe_callback_answer(callback: CallbackQuery) -> None:
     try:
@@ -268,14 +272,12 @@ async def enter_waiting_plant_photo(message, state: FSMContext):
 
 
 @router.callback_query(F.data == "onb:send_photo")
-async def onb_send_photo(callback: CallbackQuery, state: FSMContext, user: User, settings: Settings):
+async def onb_send_photo(callback: CallbackQuery, state: FSMContext, user: User):
     await callback.message.edit_reply_markup(reply_markup=None)
     prompt_text = await enter_waiting_plant_photo(callback.message, state)
-    await log_onboarding_step(
-        message=callback.message,
-        state=state,
+    log_onboarding_step(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         step="button_send_photo",
         user_message=f"callback:{callback.data}",
         bot_response=prompt_text,
@@ -284,7 +286,7 @@ async def onb_send_photo(callback: CallbackQuery, state: FSMContext, user: User,
 
 
 @router.callback_query(F.data == "onb:demo")
-async def onb_demo(callback: CallbackQuery, state: FSMContext, user: User, settings: Settings):
+async def onb_demo(callback: CallbackQuery, state: FSMContext, user: User):
     await safe_callback_answer(callback)
     await callback.message.edit_reply_markup(reply_markup=None)
     demo_image_path = "src/bot/data/demo_image_1.jpg"
@@ -307,16 +309,18 @@ async def onb_demo(callback: CallbackQuery, state: FSMContext, user: User, setti
     Продолжение полива без просушки приведёт к массовому сбросу листьев, растение рискует погибнуть за 1–2 месяца.
     """
 
-    await callback.message.answer_photo(
-        photo = FSInputFile(demo_image_path),
-        caption = text
+    await media_registry.answer_photo(
+        callback.message,
+        demo_image_path,
+        caption=text,
     )
     await sleep(15)
     text = "А вот что с ним стало буквально через месяц нашего ухода!"
     demo_image_path = "src/bot/data/demo_image_2.jpg"
-    await callback.message.answer_photo(
-        photo=FSInputFile(demo_image_path),
-        caption=text
+    await media_registry.answer_photo(
+        callback.message,
+        demo_image_path,
+        caption=text,
     )
     await sleep(3)
         # await callback.message.answer(
@@ -338,11 +342,9 @@ async def onb_demo(callback: CallbackQuery, state: FSMContext, user: User, setti
     # WAITING_HOME_TIME -> (home_time:0) -> WAITING_PLANT_PHOTO
     # WAITING_HOME_TIME -> (home_time:2/4) -> WAITING_CONFIRM_HOME -> (home:yes) -> WAITING_PLANT_PHOTO
     await state.set_state(AIState.WAITING_HOME_TIME)
-    await log_onboarding_step(
-        message=callback.message,
-        state=state,
+    log_onboarding_step(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         step="demo_shown_wait_home_time",
         user_message=f"callback:{callback.data}",
         bot_response=home_time_prompt
@@ -353,7 +355,7 @@ async def onb_demo(callback: CallbackQuery, state: FSMContext, user: User, setti
     AIState.WAITING_HOME_TIME,
     F.data.in_({"home_time:0", "home_time:2", "home_time:4"})
 )
-async def handle_home_time(callback: CallbackQuery, state: FSMContext, user: User, settings: Settings):
+async def handle_home_time(callback: CallbackQuery, state: FSMContext, user: User):
     await safe_callback_answer(callback)
     await callback.message.edit_reply_markup(reply_markup=None)
 
@@ -369,11 +371,9 @@ async def handle_home_time(callback: CallbackQuery, state: FSMContext, user: Use
     response_text = (
         "Отлично! Тогда начинаем прямо сейчас 😊" if hours == 0 else f"Отлично! Напомню через {hours} часа 😊")
     await callback.message.answer(response_text)
-    await log_onboarding_step(
-        message=callback.message,
-        state=state,
+    log_onboarding_step(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         step="home_time_selected",
         extra=f"hours={hours}",
         user_message=f"callback:{callback.data}",
@@ -387,19 +387,16 @@ async def handle_home_time(callback: CallbackQuery, state: FSMContext, user: Use
         await state.set_state(AIState.WAITING_PLANT_PHOTO)
     else:
         await state.set_state(AIState.WAITING_CONFIRM_HOME)
-        task = asyncio.create_task(
-            schedule_reminder(callback.message.bot, callback.message.chat.id, remind_at)
+        await delayed_jobs.schedule(
+            HOME_REMINDER_JOB,
+            remind_at,
+            job_id=f"{HOME_REMINDER_JOB}:{callback.message.chat.id}",
+            chat_id=callback.message.chat.id,
         )
-        BACKGROUND_TASKS.add(task)
-        task.add_done_callback(BACKGROUND_TASKS.discard)
 
 
-
-async def schedule_reminder(bot, chat_id: int, remind_at: datetime):
-    delay = (remind_at - datetime.now(UTC)).total_seconds()
-
-    if delay > 0:
-        await asyncio.sleep(delay)
+@delayed_jobs.register(HOME_REMINDER_JOB)
+async def send_home_reminder(bot, chat_id: int):
     confirm_home_kb = InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text="✅ Да, я дома", callback_data="home:yes")]
@@ -414,13 +411,11 @@ async def schedule_reminder(bot, chat_id: int, remind_at: datetime):
 
 
 @router.callback_query(StateFilter(AIState.WAITING_HOME_TIME, AIState.WAITING_CONFIRM_HOME), F.data == "home:yes")
-async def confirm_home(callback: CallbackQuery, state: FSMContext, user: User, settings: Settings):
+async def confirm_home(callback: CallbackQuery, state: FSMContext, user: User):
     prompt_text = await enter_waiting_plant_photo(callback.message, state)
-    await log_onboarding_step(
-        message=callback.message,
-        state=state,
+    log_onboarding_step(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         step="home_confirmed_send_photo",
         user_message=f"callback:{callback.data}",
         bot_response=prompt_text,
@@ -495,7 +490,7 @@ async def waiting_plant_photo_voice(message: Message):
     )
 
 @router.message(AIState.WAITING_PLANT_PHOTO, F.photo)
-async def handle_plant_photo(  # noqa: PLR0911, PLR0913, PLR0915
+async def handle_plant_photo(  # noqa: C901, PLR0911, PLR0913, PLR0915
     message: Message,
     state: FSMContext,
     openai_client: AIClient,
@@ -507,56 +502,68 @@ async def handle_plant_photo(  # noqa: PLR0911, PLR0913, PLR0915
         await show_subscription_paywall(
             message=message,
             user=user,
-            settings=settings,
         )
         return
 
     if user.tg_id not in settings.bot.ADMINS and not await validate_image_limit(user.tg_id, settings, db_session):
-        await message.answer_photo(
-            photo=FSInputFile(path="src/bot/data/not_happy.png"),
+        await media_registry.answer_photo(
+            message,
+            "src/bot/data/not_happy.png",
             caption=replies["photo_limit_exceeded"],
             reply_markup=refresh_pictures_kb(),
         )
-        await message.forward(settings.bot.CHAT_LOG_ID)
-        await message.bot.send_message(
-            settings.bot.CHAT_LOG_ID,
-            replies["pictures_limit_exceeded_log"].format(username=user.username),
-        )
+        log_channel.forward(message)
+        log_channel.post(replies["pictures_limit_exceeded_log"].format(username=user.username))
         return
-    await message.forward(settings.bot.CHAT_LOG_ID)
+    log_channel.forward(message)
     state_data = await state.get_data()
     if not state_data.get("onboarding_first_photo_counted"):
         user.action_count += 1
         db_session.add(user)
         await state.update_data(onboarding_first_photo_counted=True)
         logger.info(build_stat_message("Photo_upload", user.tg_id))
+        analytics.track("Photo_upload", user.tg_id)
 
     # 1️⃣ Получаем / создаём AI-thread
     thread_id = await get_or_create_ai_thread(user, openai_client, db_session)
 
-    # 2️⃣ Забираем bytes изображения
+    # 2️⃣ Скачиваем фото и отправляем в AI, если этот снимок ещё не разбирали
     photo = message.photo[-1]
-    file_info = await message.bot.get_file(photo.file_id)
-    file_bytes = await message.bot.download_file(file_info.file_path)
-    image_bytes = file_bytes.read()
 
-    # 3️⃣ Отправляем фото в AI
-    async with ChatActionSender.typing(
-        bot=message.bot,
-        chat_id=message.chat.id
-    ):
+    async def analyse(image_bytes: bytes, _telegram_path: str | None) -> CachedAnalysis | None:
+        nonlocal thread_id
         response, thread_id = await openai_client.get_response_with_image(
             thread_id=thread_id,
             text=PHOTO_ANALYSIS_USER_TEXT,
             image_bytes=image_bytes,
             message=message,
             fullname=user.fullname,
+            priority=AIPriority.LOW,
+        )
+        if not response or is_image_error_reply(response):
+            return None
+        return CachedAnalysis(response)
+
+    # 3️⃣ Отправляем фото в AI
+    async with db_released(db_session), ChatActionSender.typing(
+        bot=message.bot,
+        chat_id=message.chat.id
+    ):
+        cached, _ = await image_analysis_cache.analyse_photo(
+            message.bot,
+            photo.file_id,
+            photo.file_unique_id,
+            user.tg_id,
+            PHOTO_ANALYSIS_USER_TEXT,
+            analyse,
+            kind="onboarding",
         )
         user.ai_thread = thread_id
         db_session.add(user)
+    response = cached.text if cached else None
 
     # 4️⃣ Если AI вернул ошибку или пустой ответ — остаёмся в WAITING_PLANT_PHOTO
-    if not response or response.startswith(("Превышены лимиты", "Ошибка при обработке изображения")):
+    if not response:
         await message.answer(
             "Не получилось проанализировать фото 😔\n"
             "Попробуй сфотографировать растение ещё раз при хорошем дневном свете 📸"
@@ -610,6 +617,7 @@ async def handle_plant_photo(  # noqa: PLR0911, PLR0913, PLR0915
     db_session.add(analysis)
     await db_session.commit()
     logger.info(build_stat_message("Diagnosis_result", user.tg_id))
+    analytics.track("Diagnosis_result", user.tg_id)
 
     scenario = "rescue" if score <= ONBOARDING_RESCUE_SCORE_THRESHOLD else "growth"
     await state.update_data(onboarding_scenario=scenario, health_score=score)
@@ -628,11 +636,9 @@ async def handle_plant_photo(  # noqa: PLR0911, PLR0913, PLR0915
             "Чтобы я рассчитал уход под твой климат, напиши свой город 🌍"
         )
     await message.answer(follow_up_text)
-    await log_onboarding_step(
-        message=message,
-        state=state,
+    log_onboarding_step(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         step="photo_analyzed",
         extra=f"score={score} scenario={scenario}",
         user_message="[photo]",
@@ -671,7 +677,6 @@ async def handle_city(
     state: FSMContext,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
 ):
     city = normalize_city_input(message.text)
     if not city:
@@ -689,11 +694,9 @@ async def handle_city(
         response_text = await show_rescue_screen(message, city)
     else:
         response_text = await show_growth_screen(message, city)
-    await log_onboarding_step(
-        message=message,
-        state=state,
+    log_onboarding_step(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         step="city_received_waiting_city",
         extra=f"city={city} scenario={scenario}",
         user_message=message.text,
@@ -718,12 +721,11 @@ async def handle_city_sticker_fallback(message: Message):
 
 
 @router.callback_query(F.data == "skip")
-async def handle_skip_onboarding( # noqa: PLR0913
+async def handle_skip_onboarding(
     callback: CallbackQuery,
     state: FSMContext,
     user: User,
     db_session: AsyncSession,
-    settings: Settings,
     openai_client=None):
     #  ️Устанавливаем action_count = 3
     if user.ai_thread and openai_client:
@@ -743,11 +745,9 @@ async def handle_skip_onboarding( # noqa: PLR0913
         "или отправить фото растения 📸"
     )
     await callback.message.answer(skip_text)
-    await log_onboarding_step(
-        message=callback.message,
-        state=state,
+    log_onboarding_step(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         step="skip_onboarding",
         user_message=f"callback:{callback.data}",
         bot_response=skip_text,
@@ -759,12 +759,12 @@ async def handle_skip_onboarding( # noqa: PLR0913
 async def show_subscription_paywall(
     message: Message,
     user: User,
-    settings: Settings,
 ):
-    await message.forward(settings.bot.CHAT_LOG_ID)
+    log_channel.forward(message)
 
-    await message.answer_photo(
-        FSInputFile(path="src/bot/data/greetings.png"),
+    await media_registry.answer_photo(
+        message,
+        "src/bot/data/greetings.png",
         caption=replies["action_limit_exceeded"],
         reply_markup=subscription_kb(),
     )
@@ -774,17 +774,14 @@ async def show_subscription_paywall(
     )
     logger.info(log_text)
 
-    await message.bot.send_message(
-        settings.bot.CHAT_LOG_ID,
-        log_text,
-    )
+    log_channel.post(log_text)
     logger.info(build_stat_message("Paywall_view", user.tg_id))
+    analytics.track("Paywall_view", user.tg_id)
 
 @router.callback_query(F.data.in_(["pay:rescue", "pay:growth"]))
 async def handle_paywall_from_onboarding(
     callback: CallbackQuery,
     user: User,
-    settings: Settings,
     db_session: AsyncSession,
     openai_client=None
 ):
@@ -796,13 +793,9 @@ async def handle_paywall_from_onboarding(
     await show_subscription_paywall(
         message=callback.message,
         user=user,
-        settings=settings,
     )
-    await log_onboarding_step(
-        message=callback.message,
-        state=None,
+    log_onboarding_step(
         user=user,
-        settings=settings,
         step="paywall_from_onboarding",
         extra=f"callback={callback.data}",
         user_message=f"callback:{callback.data}",
@@ -837,35 +830,56 @@ async def build_rescue_plan(
         await message.answer("Ошибка: не найден AI-диалог 😔")
         return
 
-    # download photo
-    file_info = await message.bot.get_file(analysis.tg_file_id)
-    file_bytes = await message.bot.download_file(file_info.file_path)
-    image_bytes = file_bytes.read()
+    # the plan of an analysis does not change: resend the uploaded document
+    if analysis.plan_file_id:
+        try:
+            await message.answer_document(analysis.plan_file_id, caption=PLAN_READY_CAPTION)
+        except TelegramBadRequest:
+            logger.warning("Stored plan file_id rejected by Telegram, rebuilding plan %s", analysis.id)
+            analysis.plan_file_id = None
+        else:
+            return
 
-    # OpenAI
-    response, _ = await openai_client.get_response_with_image(
-        thread_id=analysis.thread_id,
-        text=PLAN_99_TEXT,
-        image_bytes=image_bytes,
-        message=message,
-        fullname=user.fullname,
-    )
+    async def analyse(image_bytes: bytes, _telegram_path: str | None) -> CachedAnalysis | None:
+        response, _ = await openai_client.get_response_with_image(
+            thread_id=analysis.thread_id,
+            text=PLAN_99_TEXT,
+            image_bytes=image_bytes,
+            message=message,
+            fullname=user.fullname,
+            priority=AIPriority.HIGH,
+        )
+        if not response or is_image_error_reply(response):
+            return None
+        return CachedAnalysis(response)
+
+    # download photo and ask OpenAI, unless a plan for this photo is cached
+    cached, _ = await image_analysis_cache.analyse_photo(
+        message.bot,
+        analysis.tg_file_id,
+        analysis.tg_file_unique_id,
+        user.tg_id,
+        PLAN_99_TEXT,
+        analyse,
+        kind="rescue_plan",
+    )
+    response = cached.text if cached else None
+
+    if response is None:
+        await message.answer("Не удалось подготовить план, попробуй ещё раз чуть позже 😔")
+        return
 
     # PDF
-    tmp_dir = Path(tempfile.gettempdir())
-    pdf_path = tmp_dir / f"plan_{analysis.id}.pdf"
-
-    generate_plan_pdf(
-        response_text=response,
-        output_path=str(pdf_path),
-        title=f"Протокол Реанимации №{analysis.id}",
-    )
+    pdf_bytes = await plan_pdf_renderer.render(response, f"Протокол Реанимации №{analysis.id}")
 
     # send to user
-    await message.answer_document(
-        FSInputFile(pdf_path),
-        caption="📄 Твой персональный план ухода готов 🌱"
+    sent = await message.answer_document(
+        BufferedInputFile(pdf_bytes, filename=f"plan_{analysis.id}.pdf"),
+        caption=PLAN_READY_CAPTION,
     )
+    if sent.document:
+        analysis.plan_file_id = sent.document.file_id
+        await db_session.flush()
 
 
 
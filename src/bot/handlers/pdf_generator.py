@@ -1,8 +1,15 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+from io import BytesIO
 from pathlib import Path
 
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
@@ -18,6 +25,30 @@ FONT_PATH = FONTS_DIR / "DejaVuSans.ttf"
 BG_IMAGE_PATH = BACKGROUNDS_DIR / "plant_plan_bg.png"
 
 
+# Binary PDF streams: ASCII85-encoding the full-page background took most of the render time.
+rl_config.useA85 = 0
+
+# ─── ASSETS (LOADED ONCE PER PROCESS) ─────────────────────
+
+@cache
+def register_font() -> None:
+    if not FONT_PATH.exists():
+        raise FileNotFoundError(f"Font not found: {FONT_PATH}")
+    pdfmetrics.registerFont(TTFont("DejaVu", str(FONT_PATH)))
+
+
+@cache
+def load_background() -> ImageReader | None:
+    if not BG_IMAGE_PATH.exists():
+        return None
+    return ImageReader(str(BG_IMAGE_PATH))
+
+
+def init_pdf_worker() -> None:
+    register_font()
+    load_background()
+
+
 # ─── PDF ──────────────────────────────────────────────────
 
 def generate_plan_pdf(
@@ -27,14 +58,15 @@ def generate_plan_pdf(
 ):
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(render_plan_pdf(response_text, title))
 
-    if not FONT_PATH.exists():
-        raise FileNotFoundError(f"Font not found: {FONT_PATH}")
 
-    pdfmetrics.registerFont(TTFont("DejaVu", str(FONT_PATH)))
+def render_plan_pdf(response_text: str, title: str) -> bytes:
+    register_font()
+    output = BytesIO()
 
     doc = SimpleDocTemplate(
-        str(output_path),
+        output,
         pagesize=A4,
         leftMargin=25 * mm,
         rightMargin=25 * mm,
@@ -121,10 +153,12 @@ def generate_plan_pdf(
 
     # ─── BACKGROUND ────────────────────────────────────────
 
-    def draw_background(canvas):
-        if BG_IMAGE_PATH.exists():
+    background = load_background()
+
+    def draw_background(canvas, _doc):
+        if background is not None:
             canvas.drawImage(
-                str(BG_IMAGE_PATH),
+                background,
                 0,
                 0,
                 width=A4[0],
@@ -138,3 +172,44 @@ def generate_plan_pdf(
         onFirstPage=draw_background,
         onLaterPages=draw_background,
     )
+    return output.getvalue()
+
+
+# ─── WORKER POOL ──────────────────────────────────────────
+
+class PlanPDFRenderer:
+    """
+    Renders plan PDFs off the event loop. With workers > 0 rendering runs in a process pool
+    (spawned, so workers do not inherit the bot's threads and sockets) whose processes load
+    the font and background once; with workers=0 it runs in a thread.
+    """
+
+    def __init__(self, workers: int = 1) -> None:
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    def configure(self, workers: int) -> None:
+        self.workers = workers
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_pdf_worker,
+            )
+        return self._executor
+
+    async def render(self, response_text: str, title: str) -> bytes:
+        if self.workers <= 0:
+            return await asyncio.to_thread(render_plan_pdf, response_text, title)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), render_plan_pdf, response_text, title)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+plan_pdf_renderer = PlanPDFRenderer()
@@ -2,4 +2,5 @@ from datetime import timedelta
 
 ONE_HOUR = 3600
 MAX_MESSAGE_LENGTH = 3900
+MARKDOWN_CHUNK_LIMIT = 3500
 BLOCK_DURATION = timedelta(seconds=3)
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from typing import Any
+from uuid import uuid4
+
+from aiogram import Bot
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+DELAYED_JOBS_PREFIX = "delayed_jobs"
+
+JobHandler = Callable[..., Awaitable[None]]
+
+# Atomically move due job ids from the schedule to the processing set with a lease deadline
+# and return their data; ids whose data is gone (cancelled) are dropped.
+CLAIM_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+local jobs = {}
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[1], id)
+    local raw = redis.call('HGET', KEYS[3], id)
+    if raw then
+        redis.call('ZADD', KEYS[2], ARGV[3], id)
+        table.insert(jobs, raw)
+    end
+end
+return jobs
+"""
+
+# Put jobs whose lease expired (the replica died mid-job) back into the schedule,
+# unless the id was scheduled again meanwhile.
+REQUEUE_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('ZADD', KEYS[1], 'NX', ARGV[1], id)
+end
+return #ids
+"""
+
+# Finish a run: drop its lease, and its data only if the id was not scheduled again while it ran.
+COMPLETE_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+local raw = redis.call('HGET', KEYS[2], ARGV[1])
+if raw and (cjson.decode(raw)['token'] or '') == ARGV[2] then
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+class DelayedJobs:
+    """
+    Persistent delayed sends drained by every bot replica.
+    Jobs live in Redis: "<prefix>:due" (zset id -> run_at), "<prefix>:processing" (zset id -> lease deadline)
+    and "<prefix>:data" (hash id -> json). Claiming is a single Lua call, so one job runs on one replica;
+    a job whose replica died is re-queued after its lease expires (at-least-once delivery).
+    Every schedule call stores a new run token, so finishing an old run never deletes a newer job with the same id.
+    Without Redis jobs run as in-process asyncio tasks, as before.
+    """
+
+    def __init__(self, redis: Redis | None = None, prefix: str = DELAYED_JOBS_PREFIX) -> None:
+        self.redis = redis
+        self.bot: Bot | None = None
+        self.due_key = f"{prefix}:due"
+        self.processing_key = f"{prefix}:processing"
+        self.data_key = f"{prefix}:data"
+        self.handlers: dict[str, JobHandler] = {}
+        self._local_tasks: dict[str, asyncio.Task[None]] = {}
+
+    def configure(self, redis: Redis | None, bot: Bot | None = None) -> None:
+        self.redis = redis
+        self.bot = bot
+
+    def register(self, name: str) -> Callable[[JobHandler], JobHandler]:
+        def decorator(handler: JobHandler) -> JobHandler:
+            self.handlers[name] = handler
+            return handler
+
+        return decorator
+
+    async def schedule(self, name: str, run_at: datetime, *, job_id: str | None = None, **payload: Any) -> str:
+        """Schedule handler `name` to run at run_at with payload; an existing job with the same id is replaced."""
+        if name not in self.handlers:
+            raise ValueError(f"Unknown delayed job: {name!r}")
+        job = {"id": job_id or str(uuid4()), "name": name, "payload": payload, "token": uuid4().hex}
+        if self.redis is None:
+            self._schedule_local(job, run_at)
+            return job["id"]
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.data_key, job["id"], json.dumps(job, ensure_ascii=False))
+            pipe.zadd(self.due_key, {job["id"]: run_at.timestamp()})
+            await pipe.execute()
+        logger.info("Delayed job %s scheduled at %s", job["id"], run_at.isoformat())
+        return job["id"]
+
+    async def cancel(self, job_id: str) -> None:
+        if self.redis is None:
+            task = self._local_tasks.pop(job_id, None)
+            if task is not None:
+                task.cancel()
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.due_key, job_id)
+            pipe.hdel(self.data_key, job_id)
+            await pipe.execute()
+
+    def _schedule_local(self, job: dict[str, Any], run_at: datetime) -> None:
+        previous = self._local_tasks.pop(job["id"], None)
+        if previous is not None:
+            previous.cancel()
+
+        async def run_later() -> None:
+            delay = (run_at - datetime.now(UTC)).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.run_job(job)
+
+        task = asyncio.create_task(run_later())
+        self._local_tasks[job["id"]] = task
+
+        def forget(done: asyncio.Task[None]) -> None:
+            if self._local_tasks.get(job["id"]) is done:
+                del self._local_tasks[job["id"]]
+
+        task.add_done_callback(forget)
+
+    async def run_job(self, job: dict[str, Any]) -> None:
+        handler = self.handlers.get(job["name"])
+        if handler is None:
+            logger.error("No handler registered for delayed job %s (%s)", job["id"], job["name"])
+            return
+        try:
+            await handler(self.bot, **job["payload"])
+        except Exception:
+            logger.exception("Delayed job %s (%s) failed", job["id"], job["name"])
+
+    async def claim_due(self, now: datetime, limit: int, lease_seconds: float) -> list[dict[str, Any]]:
+        raw_jobs = await self.redis.eval(
+            CLAIM_SCRIPT,
+            3,
+            self.due_key,
+            self.processing_key,
+            self.data_key,
+            now.timestamp(),
+            limit,
+            now.timestamp() + lease_seconds,
+        )
+        return [json.loads(raw) for raw in raw_jobs]
+
+    async def complete(self, job: dict[str, Any]) -> bool:
+        """Return False when the job was scheduled again or cancelled while it ran."""
+        return bool(
+            await self.redis.eval(
+                COMPLETE_SCRIPT, 2, self.processing_key, self.data_key, job["id"], job.get("token", "")
+            )
+        )
+
+    async def requeue_expired(self, now: datetime) -> int:
+        return await self.redis.eval(REQUEUE_SCRIPT, 2, self.due_key, self.processing_key, now.timestamp())
+
+    async def _seconds_until_next(self, now: datetime) -> float | None:
+        head = await self.redis.zrange(self.due_key, 0, 0, withscores=True)
+        if not head:
+            return None
+        return max(head[0][1] - now.timestamp(), 0.0)
+
+    async def run(self, *, poll_interval: float = 1.0, batch_size: int = 100, lease_seconds: float = 300) -> None:
+        """Drain due jobs forever; safe to run on every replica at once."""
+        if self.redis is None:
+            return
+        while True:
+            try:
+                now = datetime.now(UTC)
+                requeued = await self.requeue_expired(now)
+                if requeued:
+                    logger.warning("Re-queued %s delayed jobs with expired lease", requeued)
+                jobs = await self.claim_due(now, batch_size, lease_seconds)
+                for job in jobs:
+                    await self.run_job(job)
+                    await self.complete(job)
+                if len(jobs) == batch_size:
+                    continue
+                delay = await self._seconds_until_next(datetime.now(UTC))
+                await asyncio.sleep(poll_interval if delay is None else min(delay, poll_interval))
+            except Exception:  # noqa: BLE001
+                logger.warning("Delayed jobs loop failed, retrying", exc_info=True)
+                await asyncio.sleep(poll_interval)
+
+
+delayed_jobs = DelayedJobs()
@@ -1,4 +1,4 @@
-from enum import StrEnum, auto
+from enum import IntEnum, StrEnum, auto
 
 from aiogram.fsm.state import State, StatesGroup
 
@@ -65,6 +65,20 @@ class Stage(StrEnum):
     DEV = auto()
     PROD = auto()
 
+
+class BroadcastStatus(StrEnum):
+    RUNNING = auto()
+    PAUSED = auto()
+    FINISHED = auto()
+    CANCELLED = auto()
+
+
+class BroadcastOutcome(StrEnum):
+    SENT = auto()
+    BLOCKED = auto()
+    DEACTIVATED = auto()
+    FAILED = auto()
+
 class GardenAction(StrEnum):
     OPEN = auto()
     ADD = auto()
@@ -86,3 +100,11 @@ class GardenAction(StrEnum):
     DELETE = auto()
     BACK = auto()
     BACK_TO_LIST = auto()
+
+
+class AIPriority(IntEnum):
+    """Lower value is admitted to OpenAI first."""
+
+    HIGH = 0  # paid subscribers, garden analysis, paid plans
+    NORMAL = 1  # free-tier dialog
+    LOW = 2  # onboarding demo
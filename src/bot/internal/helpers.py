@@ -1,14 +1,33 @@
+import atexit
+import copy
 import json
 import logging.config
+import queue
 import sys
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
 from pydantic_settings import SettingsConfigDict
 
 from bot.internal.enums import Stage
-from bot.log_context import LogContextFilter
+from bot.log_context import LogContextFilter, SamplingFilter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+# Per-update records written by the middlewares; the only ones subject to sampling.
+SAMPLED_LOG_MESSAGES = ("middleware start", "middleware end", "handler start", "handler end")
+
+_listener: QueueListener | None = None
+
+
+def dump_log_json(payload: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload, default=str).decode()
+    return json.dumps(payload, ensure_ascii=False, default=str)
 
 
 class CustomFormatter(logging.Formatter):
@@ -49,7 +68,20 @@ class JsonFormatter(logging.Formatter):
             "error.message": error_message,
             "error.stack": error_stack,
         }
-        return json.dumps(payload, ensure_ascii=False)
+        return dump_log_json(payload)
+
+
+class LogQueueHandler(QueueHandler):
+    """
+    Hands records to the QueueListener thread. Only the message is rendered here, so later changes
+    to the arguments do not leak into it; formatting (and tracebacks) happen on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
 
 main_template = {
@@ -62,13 +94,51 @@ error_template = {
 }
 
 
-def setup_logs(app_name: str, stage: Stage):
+def setup_logs(app_name: str, stage: Stage, *, queued: bool = False, handler_sample_rate: float = 1.0):
+    """
+    Configure root logging. With queued=True the root keeps a single LogQueueHandler and the real
+    handlers run on a QueueListener thread, so formatting and I/O leave the event loop.
+    """
+    global _listener  # noqa: PLW0603
     Path("logs").mkdir(parents=True, exist_ok=True)
-    logging_config = get_logging_config(app_name, stage)
+    stop_logs()
+    logging_config = get_logging_config(app_name, stage, handler_sample_rate=handler_sample_rate)
     logging.config.dictConfig(logging_config)
+    if queued:
+        _listener = enqueue_root_handlers()
+        atexit.register(stop_logs)
+
+
+def stop_logs() -> None:
+    """Write out records still queued for the listener thread and stop it."""
+    global _listener  # noqa: PLW0603
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 
-def get_logging_config(app_name: str, stage: Stage):
+def enqueue_root_handlers() -> QueueListener:
+    """
+    Move the root handlers behind a queue. Their filters run on the calling thread instead:
+    LogContextFilter reads context variables, which the listener thread does not see.
+    """
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    queue_handler = LogQueueHandler(queue.SimpleQueue())
+    queue_handler.setLevel(min(handler.level for handler in handlers))
+    for handler in handlers:
+        for log_filter in handler.filters:
+            if log_filter not in queue_handler.filters:
+                queue_handler.addFilter(log_filter)
+        handler.filters = []
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def get_logging_config(app_name: str, stage: Stage, handler_sample_rate: float = 1.0):
     formatter = "json" if stage == Stage.PROD else "main"
     error_formatter = "json" if stage == Stage.PROD else "errors"
     return {
@@ -94,6 +164,11 @@ def get_logging_config(app_name: str, stage: Stage):
                 "()": LogContextFilter,
                 "service": app_name,
             },
+            "sampling": {
+                "()": SamplingFilter,
+                "messages": SAMPLED_LOG_MESSAGES,
+                "rate": handler_sample_rate,
+            },
         },
         "handlers": {
             "stdout": {
@@ -101,14 +176,14 @@ def get_logging_config(app_name: str, stage: Stage):
                 "level": "INFO",
                 "formatter": formatter,
                 "stream": sys.stdout,
-                "filters": ["log_context"],
+                "filters": ["log_context", "sampling"],
             },
             "stderr": {
                 "class": "logging.StreamHandler",
                 "level": "WARNING",
                 "formatter": error_formatter,
                 "stream": sys.stderr,
-                "filters": ["log_context"],
+                "filters": ["log_context", "sampling"],
             },
             "file": {
                 "()": RotatingFileHandler,
@@ -118,7 +193,7 @@ def get_logging_config(app_name: str, stage: Stage):
                 "maxBytes": 50000000,
                 "backupCount": 3,
                 "encoding": "utf-8",
-                "filters": ["log_context"],
+                "filters": ["log_context", "sampling"],
             },
         },
         "loggers": {
@@ -60,7 +60,9 @@ replies = {
                             "<b>Варианты:</b>\n"
                             "🔸 Напишите нам на suslikaibot@gmail.com — может, мы договоримся!\n"
                             "🔸 Или подождите немного: новые места появятся, как только наш сад вырастет.\n"
-                            "Спасибо за терпение! 🌳"
+                            "Спасибо за терпение! 🌳",
+    "ai_busy": "Суслик сейчас отвечает очень многим садоводам сразу 🐹🌿\n"
+               "Пожалуйста, повтори запрос через минуту — я обязательно помогу!",
 }
 
 space_question = {
@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+MEDIA_REGISTRY_KEY = "media:file_ids"
+
+
+class MediaRegistry:
+    """
+    Uploads static bot images once and sends them by Telegram file_id afterwards.
+    File ids are stored in Redis under "<path>:<sha256>", so a changed file gets a new key and is re-uploaded.
+    Without Redis the registry still caches file ids in process memory.
+    """
+
+    def __init__(self, redis: Redis | None = None, key: str = MEDIA_REGISTRY_KEY) -> None:
+        self.redis = redis
+        self.key = key
+        self._file_ids: dict[str, str] = {}
+        self._digests: dict[str, tuple[int, int, str]] = {}
+
+    def configure(self, redis: Redis | None) -> None:
+        self.redis = redis
+
+    def _digest(self, path: str) -> str | None:
+        file_path = Path(path)
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None
+        cached = self._digests.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        digest = hashlib.sha256(file_path.read_bytes()).hexdigest()
+        self._digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    async def _cache_key(self, path: str) -> str | None:
+        digest = await asyncio.to_thread(self._digest, path)
+        if digest is None:
+            return None
+        return f"{path}:{digest}"
+
+    async def get_file_id(self, cache_key: str) -> str | None:
+        file_id = self._file_ids.get(cache_key)
+        if file_id or self.redis is None:
+            return file_id
+        try:
+            file_id = await self.redis.hget(self.key, cache_key)
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to read media file_id from redis", exc_info=True)
+            return None
+        if file_id:
+            self._file_ids[cache_key] = file_id
+        return file_id
+
+    async def set_file_id(self, cache_key: str, file_id: str) -> None:
+        self._file_ids[cache_key] = file_id
+        if self.redis is None:
+            return
+        try:
+            await self.redis.hset(self.key, cache_key, file_id)
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to store media file_id in redis", exc_info=True)
+
+    async def forget(self, cache_key: str) -> None:
+        self._file_ids.pop(cache_key, None)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.hdel(self.key, cache_key)
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to drop media file_id from redis", exc_info=True)
+
+    @staticmethod
+    def _extract_file_id(sent: Any) -> str | None:
+        photo = getattr(sent, "photo", None)
+        if photo:
+            return photo[-1].file_id
+        document = getattr(sent, "document", None)
+        if document:
+            return document.file_id
+        return None
+
+    async def _send(self, send, path: str, **kwargs: Any) -> Any:
+        cache_key = await self._cache_key(path)
+        if cache_key is None:
+            return await send(FSInputFile(path), **kwargs)
+
+        file_id = await self.get_file_id(cache_key)
+        if file_id:
+            try:
+                return await send(file_id, **kwargs)
+            except TelegramBadRequest:
+                logger.warning("Cached file_id rejected by Telegram, re-uploading %s", path)
+                await self.forget(cache_key)
+
+        sent = await send(FSInputFile(path), **kwargs)
+        new_file_id = self._extract_file_id(sent)
+        if new_file_id:
+            await self.set_file_id(cache_key, new_file_id)
+            logger.info("Uploaded media %s, cached file_id", path)
+        return sent
+
+    async def answer_photo(self, message: Message, path: str, **kwargs: Any) -> Message | None:
+        return await self._send(lambda photo, **kw: message.answer_photo(photo=photo, **kw), path, **kwargs)
+
+    async def send_photo(self, bot: Bot, chat_id: int, path: str, **kwargs: Any) -> Message | None:
+        return await self._send(lambda photo, **kw: bot.send_photo(chat_id, photo, **kw), path, **kwargs)
+
+
+media_registry = MediaRegistry()
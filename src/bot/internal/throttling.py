@@ -0,0 +1,72 @@
+import asyncio
+from collections.abc import Callable
+from time import monotonic
+
+TELEGRAM_GLOBAL_RATE = 25.0
+TELEGRAM_PER_CHAT_INTERVAL = 1.0
+
+
+class TokenBucket:
+    """
+    Async token bucket: at most `rate` acquisitions per second with bursts up to `capacity`.
+    `pause` blocks every caller for a while, e.g. after Telegram answered with RetryAfter.
+    """
+
+    def __init__(
+        self,
+        rate: float = TELEGRAM_GLOBAL_RATE,
+        capacity: float | None = None,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, self.clock() + seconds)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = self.clock()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ChatPacer:
+    """Reserves send slots per chat so messages to one chat are at least `interval` seconds apart."""
+
+    def __init__(self, interval: float = TELEGRAM_PER_CHAT_INTERVAL, clock: Callable[[], float] = monotonic) -> None:
+        self.interval = interval
+        self.clock = clock
+        self._next_slot: dict[int, float] = {}
+
+    def reserve(self, chat_id: int) -> float:
+        """Return how long the caller has to wait before sending to chat_id."""
+        now = self.clock()
+        slot = max(now, self._next_slot.get(chat_id, now))
+        self._next_slot[chat_id] = slot + self.interval
+        return slot - now
+
+    async def wait(self, chat_id: int) -> None:
+        delay = self.reserve(chat_id)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def clear(self) -> None:
+        now = self.clock()
+        self._next_slot = {chat_id: slot for chat_id, slot in self._next_slot.items() if slot > now}
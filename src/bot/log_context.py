@@ -1,4 +1,6 @@
 import logging
+import random
+import zlib
 from contextvars import ContextVar
 from dataclasses import dataclass
 from typing import Any
@@ -12,6 +14,8 @@ class LogContext:
     operation: str | None = None
 
 
+CRC32_MAX = 0xFFFFFFFF
+
 _log_context: ContextVar[LogContext | None] = ContextVar("log_context", default=None)
 
 
@@ -72,3 +76,24 @@ class LogContextFilter(logging.Filter):
         record.operation = context.operation or "-"
         record.duration_ms = getattr(record, "duration_ms", None)
         return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only `rate` of the INFO-and-below records whose message template is in `messages`.
+    The decision is made per correlation id, so the start and end records of one update
+    are kept or dropped together; warnings and errors are never sampled out.
+    """
+
+    def __init__(self, messages: tuple[str, ...] = (), rate: float = 1.0):
+        super().__init__()
+        self._messages = frozenset(messages)
+        self._threshold = int(max(0.0, min(rate, 1.0)) * CRC32_MAX)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self._threshold >= CRC32_MAX or record.levelno > logging.INFO or record.msg not in self._messages:
+            return True
+        correlation_id = get_log_context().correlation_id
+        if correlation_id is None:
+            return random.random() * CRC32_MAX < self._threshold  # noqa: S311
+        return zlib.crc32(correlation_id.encode()) < self._threshold
@@ -1,17 +1,26 @@
 import logging
-from asyncio import run
+from asyncio import Task, create_task, gather, run
+from datetime import UTC, datetime
 from pathlib import Path
 
 import sentry_sdk
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.redis import RedisStorage
 from redis.asyncio import Redis
-from yookassa import Configuration
 
+from bot.ai_admission import AIAdmission
 from bot.ai_client import AIClient
-from bot.config import get_settings
+from bot.config import Settings, get_settings
+from bot.controllers.analytics import analytics
+from bot.controllers.broadcast import BroadcastWorker
+from bot.controllers.dialog_log import dialog_log_writer
+from bot.controllers.image_analysis_cache import image_analysis_cache
+from bot.controllers.log_channel import log_channel
+from bot.controllers.user_cache import user_cache
+from bot.controllers.watering_schedule import watering_schedule
 from bot.handlers.ai import router as ai_router
 from bot.handlers.base import router as base_router
 from bot.handlers.command import router as commands_router
@@ -19,20 +28,31 @@ from bot.handlers.errors import router as error_router
 from bot.handlers.garden import router as garden_router
 from bot.handlers.onboarding_callbacks import router as onboarding_callbacks_router
 from bot.handlers.payment import router as payment_router
+from bot.handlers.pdf_generator import plan_pdf_renderer
+from bot.internal.delayed_jobs import delayed_jobs
 from bot.internal.enums import Stage
 from bot.internal.helpers import setup_logs
+from bot.internal.media import media_registry
 from bot.internal.notify_admin import on_shutdown, on_startup
 from bot.middlewares.auth import AuthMiddleware
+from bot.middlewares.fsm_tracking import FSMTrackingMiddleware
 from bot.middlewares.logging import LoggingMiddleware
 from bot.middlewares.session import DBSessionMiddleware
 from bot.middlewares.updates_dumper import UpdatesDumperMiddleware
 from bot.middlewares.user_limit import UserLimitMiddleware
-from database.database_connector import get_db
+from bot.payment_gateway import get_payment_gateway
+from database.database_connector import DatabaseConnector, get_db
+from database.partitions import ensure_partitions
 
 
 async def main():
     settings = get_settings()
-    setup_logs("suslik_robot", settings.bot.STAGE)
+    setup_logs(
+        "suslik_robot",
+        settings.bot.STAGE,
+        queued=settings.bot.LOG_QUEUED,
+        handler_sample_rate=settings.bot.LOG_HANDLER_SAMPLE_RATE,
+    )
     if settings.bot.SENTRY_DSN and settings.bot.STAGE == Stage.PROD:
         sentry_sdk.init(
             dsn=settings.bot.SENTRY_DSN.get_secret_value(),
@@ -65,6 +85,15 @@ async def main():
         model=settings.gpt.MODEL.get_secret_value(),
         system_prompt=system_prompt,
         vector_store_id=settings.gpt.VECTOR_STORE_ID.get_secret_value() if settings.gpt.VECTOR_STORE_ID else None,
+        base_url=settings.gpt.BASE_URL,
+        admission=AIAdmission(
+            max_concurrency=settings.gpt.MAX_CONCURRENT_REQUESTS,
+            rpm=settings.gpt.REQUESTS_PER_MINUTE,
+            tpm=settings.gpt.TOKENS_PER_MINUTE,
+            queue_timeout=settings.gpt.QUEUE_TIMEOUT_SECONDS,
+            max_queue=settings.gpt.MAX_QUEUED_REQUESTS,
+        ),
+        expected_output_tokens=settings.gpt.EXPECTED_OUTPUT_TOKENS,
     )
     redis_client = Redis(
         host=settings.redis.HOST,
@@ -74,14 +103,67 @@ async def main():
         password=settings.redis.PASSWORD.get_secret_value(),
         decode_responses=True,
     )
-    Configuration.configure(settings.shop.ID, settings.shop.API_KEY.get_secret_value())
     storage = RedisStorage(redis_client)
-    dispatcher = Dispatcher(storage=storage, settings=settings, openai_client=openai_client)
     db = get_db(settings)
-    db_session_middleware = DBSessionMiddleware(db)
-    dispatcher.update.outer_middleware(UpdatesDumperMiddleware(debug_mode=settings.bot.STAGE == Stage.DEV))
+    try:
+        async with db.engine.begin() as conn:
+            await ensure_partitions(conn, datetime.now(UTC).date(), months_ahead=1)
+    except Exception:  # noqa: BLE001
+        logging.warning("Failed to ensure dialog log partitions", exc_info=True)
+    configure_services(settings, bot, redis_client, db)
+    dispatcher = build_dispatcher(settings, storage, db, openai_client)
     dispatcher.startup.register(on_startup)
     dispatcher.shutdown.register(on_shutdown)
+    logging.info("suslik robot started")
+    background_tasks = start_background_tasks(settings, bot, db)
+    try:
+        await dispatcher.start_polling(bot, skip_updates=True)
+    finally:
+        await stop_background_tasks(background_tasks)
+
+
+def configure_services(settings: Settings, bot: Bot, redis_client: Redis, db: DatabaseConnector) -> None:
+    media_registry.configure(redis_client)
+    watering_schedule.configure(redis_client)
+    analytics.configure(redis_client)
+    user_cache.configure(
+        redis_client,
+        maxsize=settings.bot.USER_CACHE_SIZE,
+        ttl=settings.bot.USER_CACHE_TTL_SECONDS,
+    )
+    log_channel.configure(
+        bot,
+        settings.bot.CHAT_LOG_ID,
+        max_queue=settings.bot.LOG_CHANNEL_QUEUE_SIZE,
+        flush_interval=settings.bot.LOG_CHANNEL_FLUSH_SECONDS,
+    )
+    delayed_jobs.configure(redis_client, bot)
+    plan_pdf_renderer.configure(settings.bot.PDF_RENDER_WORKERS)
+    image_analysis_cache.configure(
+        redis_client,
+        maxsize=settings.bot.IMAGE_ANALYSIS_CACHE_SIZE,
+        ttl=settings.bot.IMAGE_ANALYSIS_CACHE_TTL_SECONDS,
+    )
+    if settings.bot.DIALOG_LOG_WRITE_BEHIND:
+        dialog_log_writer.configure(
+            db,
+            batch_size=settings.bot.DIALOG_LOG_BATCH_SIZE,
+            flush_interval=settings.bot.DIALOG_LOG_FLUSH_SECONDS,
+        )
+
+
+def build_dispatcher(
+    settings: Settings,
+    storage: BaseStorage,
+    db: DatabaseConnector,
+    openai_client: AIClient,
+) -> Dispatcher:
+    """Dispatcher with the production middleware chain and routers (also used by tests/bench_dispatcher.py)."""
+    dispatcher = Dispatcher(storage=storage, settings=settings, openai_client=openai_client)
+    db_session_middleware = DBSessionMiddleware(db, release_on_io=settings.db.release_connection_on_io)
+    dispatcher.update.outer_middleware(UpdatesDumperMiddleware(debug_mode=settings.bot.STAGE == Stage.DEV))
+    dispatcher.message.middleware(FSMTrackingMiddleware())
+    dispatcher.callback_query.middleware(FSMTrackingMiddleware())
     dispatcher.message.middleware(db_session_middleware)
     dispatcher.callback_query.middleware(db_session_middleware)
     dispatcher.message.middleware(AuthMiddleware())
@@ -99,8 +181,36 @@ async def main():
         # onboarding_callbacks_router,
         error_router,
     )
-    logging.info("suslik robot started")
-    await dispatcher.start_polling(bot, skip_updates=True)
+    return dispatcher
+
+
+def start_background_tasks(settings: Settings, bot: Bot, db: DatabaseConnector) -> list[Task]:
+    broadcast_worker = BroadcastWorker(
+        bot,
+        db,
+        rate=settings.bot.BROADCAST_SEND_RATE,
+        concurrency=settings.bot.BROADCAST_CONCURRENCY,
+    )
+    return [
+        create_task(delayed_jobs.run()),
+        create_task(broadcast_worker.run()),
+        create_task(analytics.run(settings.bot.ANALYTICS_FLUSH_SECONDS)),
+        create_task(user_cache.listen()),
+        create_task(dialog_log_writer.run()),
+        create_task(log_channel.run()),
+    ]
+
+
+async def stop_background_tasks(background_tasks: list[Task]) -> None:
+    # the dialog log writer stops on its own so that a batch being written is not lost
+    await dialog_log_writer.close()
+    for task in background_tasks:
+        task.cancel()
+    await gather(*background_tasks, return_exceptions=True)
+    await analytics.flush()
+    await log_channel.close()
+    await get_payment_gateway().close()
+    plan_pdf_renderer.close()
 
 
 def run_main():
@@ -8,6 +8,7 @@ from asyncpg.exceptions import UniqueViolationError
 from sqlalchemy.exc import IntegrityError
 
 from bot.controllers.user import add_user_to_db, get_user_from_db_by_tg_id
+from bot.controllers.user_cache import user_cache
 
 logger = logging.getLogger(__name__)
 class AuthMiddleware(BaseMiddleware):
@@ -19,7 +20,7 @@ class AuthMiddleware(BaseMiddleware):
     ) -> Any:
         logger.info("middleware start", extra={"middleware": "AuthMiddleware"})
         db_session = data["db_session"]
-        user = await get_user_from_db_by_tg_id(event.from_user.id, db_session)
+        user = await user_cache.get_user(event.from_user.id, db_session)
         data["is_new_user"] = False
         if not user:
             data["is_new_user"] = True
@@ -0,0 +1,52 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.types import TelegramObject
+
+
+class TrackedFSMContext(FSMContext):
+    """
+    FSMContext that answers get_state from memory: it starts from the raw_state aiogram has already
+    read for the update and follows every set_state/clear made through it. Writes still go to storage.
+    State changed in storage by anyone else during the update (another context, another process)
+    is not seen; aiogram's own raw_state has the same limitation.
+    """
+
+    def __init__(self, storage: BaseStorage, key: StorageKey, state: str | None = None) -> None:
+        super().__init__(storage=storage, key=key)
+        self.initial_state = state
+        self.current_state = state
+
+    @classmethod
+    def wrap(cls, context: FSMContext, raw_state: str | None) -> "TrackedFSMContext":
+        return cls(context.storage, context.key, raw_state)
+
+    @property
+    def changed(self) -> bool:
+        return self.current_state != self.initial_state
+
+    async def get_state(self) -> str | None:
+        return self.current_state
+
+    async def set_state(self, state: StateType = None) -> None:
+        await super().set_state(state)
+        self.current_state = state.state if isinstance(state, State) else state
+
+
+class FSMTrackingMiddleware(BaseMiddleware):
+    """Replace the update's FSMContext with a TrackedFSMContext; register it before other middlewares."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        context = data.get("state")
+        if context is not None and not isinstance(context, TrackedFSMContext):
+            data["state"] = TrackedFSMContext.wrap(context, data.get("raw_state"))
+        return await handler(event, data)
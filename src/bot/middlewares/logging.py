@@ -8,7 +8,8 @@ from uuid import uuid4
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
 
-from bot.log_context import reset_log_context, set_log_context
+from bot.log_context import get_log_context, reset_log_context, set_log_context
+from bot.middlewares.fsm_tracking import TrackedFSMContext
 
 if TYPE_CHECKING:
     from aiogram.fsm.context import FSMContext
@@ -26,8 +27,8 @@ class LoggingMiddleware(BaseMiddleware):
         name = self._get_name(handler)
         user = data.get("event_from_user")
         fsm_context: FSMContext | None = data.get("state")
-        state_before = await fsm_context.get_state() if fsm_context else None
-        correlation_id = self._get_correlation_id(event)
+        state_before = await self._get_state(fsm_context, data)
+        correlation_id = get_log_context().correlation_id or self._get_correlation_id(event)
         token = set_log_context(
             correlation_id=correlation_id,
             user_id=getattr(user, "id", None),
@@ -45,7 +46,7 @@ class LoggingMiddleware(BaseMiddleware):
             )
             raise
         finally:
-            state_after = await fsm_context.get_state() if fsm_context else None
+            state_after = await self._get_state(fsm_context, data)
             if state_before != state_after:
                 logger.info(
                     "fsm transition",
@@ -57,6 +58,12 @@ class LoggingMiddleware(BaseMiddleware):
             )
             reset_log_context(token)
 
+    async def _get_state(self, fsm_context: "FSMContext | None", data: dict[str, Any]) -> str | None:
+        # A TrackedFSMContext (see FSMTrackingMiddleware) knows the state without a storage read.
+        if isinstance(fsm_context, TrackedFSMContext):
+            return fsm_context.current_state
+        return await fsm_context.get_state() if fsm_context else data.get("raw_state")
+
     def _get_name(self, handler):
         while isinstance(handler, functools.partial):
             handler = handler.args[0]
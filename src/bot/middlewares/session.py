@@ -5,13 +5,14 @@ from typing import Any
 from aiogram import BaseMiddleware
 from aiogram.types import Message
 
-from database.database_connector import DatabaseConnector
+from database.database_connector import RELEASE_ON_IO_KEY, DatabaseConnector
 
 logger = logging.getLogger(__name__)
 
 class DBSessionMiddleware(BaseMiddleware):
-    def __init__(self, db: DatabaseConnector):
+    def __init__(self, db: DatabaseConnector, *, release_on_io: bool = False):
         self.db = db
+        self.release_on_io = release_on_io
 
     async def __call__(
         self,
@@ -21,6 +22,7 @@ class DBSessionMiddleware(BaseMiddleware):
     ) -> Any:
         logger.info("middleware start", extra={"middleware": "DBSessionMiddleware"})
         async with self.db.session_factory() as db_session:
+            db_session.info[RELEASE_ON_IO_KEY] = self.release_on_io
             data["db_session"] = db_session
             try:
                 res = await handler(event, data)
@@ -33,5 +35,8 @@ class DBSessionMiddleware(BaseMiddleware):
             else:
                 return res
             finally:
-                logger.info("middleware end", extra={"middleware": "DBSessionMiddleware"})
+                logger.info(
+                    "middleware end",
+                    extra={"middleware": "DBSessionMiddleware", "pool_wait": self.db.pool_wait_stats.snapshot()},
+                )
 
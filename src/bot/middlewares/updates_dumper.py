@@ -6,6 +6,8 @@ from aiogram import BaseMiddleware
 from aiogram.dispatcher.event.bases import UNHANDLED
 from aiogram.types import TelegramObject, Update
 
+from bot.log_context import reset_log_context, set_log_context
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,26 +52,30 @@ class UpdatesDumperMiddleware(BaseMiddleware):
     ) -> Any:
         event_type = self._extract_event_type(event)
         user_id = self._extract_user_id(event)
-
-        logger.info(
-            "inbound update",
-            extra={
-                "update_id": event.update_id,
-                "event_type": event_type,
-                "user_id": user_id,
-            },
-        )
-        if self.debug_mode:
-            logger.debug(
-                "inbound update payload",
+        # The outermost middleware binds the correlation id, so the inner middlewares' records carry it too.
+        token = set_log_context(correlation_id=f"tg-{event.update_id}", user_id=user_id)
+        try:
+            logger.info(
+                "inbound update",
                 extra={
                     "update_id": event.update_id,
                     "event_type": event_type,
                     "user_id": user_id,
-                    "payload": event.model_dump_json(exclude_unset=True),
                 },
             )
-        res = await handler(event, data)
-        if res is UNHANDLED:
-            logger.info("UNHANDLED")
-        return res
+            if self.debug_mode:
+                logger.debug(
+                    "inbound update payload",
+                    extra={
+                        "update_id": event.update_id,
+                        "event_type": event_type,
+                        "user_id": user_id,
+                        "payload": event.model_dump_json(exclude_unset=True),
+                    },
+                )
+            res = await handler(event, data)
+            if res is UNHANDLED:
+                logger.info("UNHANDLED")
+            return res
+        finally:
+            reset_log_context(token)
@@ -5,10 +5,11 @@ from logging import getLogger
 from random import randint
 
 from aiogram import Router
-from aiogram.types import FSInputFile, InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.chat_action import ChatActionSender
 
 from bot.controllers.onboarding_log import log_onboarding_step
+from bot.internal.media import media_registry
 
 router = Router()
 logger = getLogger(__name__)
@@ -27,7 +28,7 @@ async def onboarding_1(  # noqa: PLR0913
 ):
     start_file_path = "src/bot/data/start.png"
 
-    await message.answer_photo(FSInputFile(path=start_file_path))
+    await media_registry.answer_photo(message, start_file_path)
 
     async with ChatActionSender.typing(
         bot=message.bot,
@@ -76,7 +77,6 @@ async def onboarding_3( # noqa: PLR0913
     state,
     user,
     db_session,
-    settings,
     imitate_typing,
     AIState, # noqa: N803
     **_ignored,
@@ -101,11 +101,9 @@ async def onboarding_3( # noqa: PLR0913
     await db_session.flush()
     await state.update_data(wait_reason="onboarding_plant_photo")
     await state.set_state(AIState.WAITING_PLANT_PHOTO)
-    await log_onboarding_step(
-        message=message,
-        state=state,
+    log_onboarding_step(
+        current_state=await state.get_state(),
         user=user,
-        settings=settings,
         step="start_screen_shown",
     )
     # await state.set_state(AIState.IN_AI_DIALOG)
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from functools import cache
+from typing import Any, Protocol
+from uuid import uuid4
+
+import aiohttp
+from yookassa.domain.response import PaymentResponse
+
+from bot.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+YOOKASSA_API_URL = "https://api.yookassa.ru/v3"
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+
+class PaymentGatewayError(Exception):
+    def __init__(self, message: str, status: int | None = None, payload: dict[str, Any] | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.payload = payload or {}
+
+
+class PaymentGateway(Protocol):
+    async def create_payment(self, payload: dict[str, Any], idempotence_key: str | None = None) -> PaymentResponse:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class YooKassaGateway:
+    """
+    Async YooKassa client on a pooled aiohttp session.
+    Every create call carries an Idempotence-Key; transport errors and 5xx are retried with the same key,
+    so a retry can never create a second payment.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        shop_id: int | str,
+        secret_key: str,
+        *,
+        base_url: str = YOOKASSA_API_URL,
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        max_retries: int = 2,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self._auth = aiohttp.BasicAuth(str(shop_id), secret_key)
+        self._session: aiohttp.ClientSession | None = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                auth=self._auth,
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _post(self, path: str, payload: dict[str, Any], idempotence_key: str) -> dict[str, Any]:
+        session = self._get_session()
+        attempt = 0
+        while True:
+            try:
+                async with session.post(
+                    f"{self.base_url}{path}",
+                    json=payload,
+                    headers={"Idempotence-Key": idempotence_key},
+                ) as response:
+                    try:
+                        body = await response.json(content_type=None) or {}
+                    except ValueError:
+                        body = {}
+                    if response.status < 300:  # noqa: PLR2004
+                        return body
+                    if response.status not in RETRYABLE_STATUSES or attempt >= self.max_retries:
+                        raise PaymentGatewayError(
+                            f"YooKassa responded {response.status}: {body.get('description', body)}",
+                            status=response.status,
+                            payload=body,
+                        )
+            except (aiohttp.ClientError, TimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise PaymentGatewayError(f"YooKassa request failed: {e!r}") from e
+            attempt += 1
+            logger.warning("Retrying YooKassa request %s (attempt=%s)", path, attempt)
+            await asyncio.sleep(0.5 * attempt)
+
+    async def create_payment(self, payload: dict[str, Any], idempotence_key: str | None = None) -> PaymentResponse:
+        body = await self._post("/payments", payload, idempotence_key or str(uuid4()))
+        return PaymentResponse(body)
+
+
+@cache
+def get_payment_gateway() -> YooKassaGateway:
+    settings = get_settings()
+    return YooKassaGateway(
+        settings.shop.ID,
+        settings.shop.API_KEY.get_secret_value(),
+        base_url=settings.shop.API_URL,
+        timeout=settings.shop.REQUEST_TIMEOUT_SECONDS,
+    )
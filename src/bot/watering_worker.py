@@ -1,18 +1,21 @@
 import logging
 from asyncio import run, sleep
 from datetime import UTC, datetime
+from time import monotonic
 
 from aiogram import Bot
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
+from redis.asyncio import Redis
 from sentry_sdk import init as sentry_init
 
 from bot.config import get_settings
-from bot.controllers.user import get_all_users_with_active_subscription
 from bot.controllers.watering_notifications import (
     TelegramNotificationDispatcher,
+    ThrottledNotificationDispatcher,
     WateringNotificationService,
 )
+from bot.controllers.watering_schedule import watering_schedule
 from bot.internal.enums import Stage
 from bot.internal.helpers import setup_logs
 from database.database_connector import get_db
@@ -23,9 +26,27 @@ DEFAULT_WORKER_INTERVAL_SECONDS = 60
 DEFAULT_TEST_REPEAT_MINUTES = 0
 
 
+async def wait_until_due(max_wait: float, fallback_interval: int) -> bool:
+    """
+    Sleep until the earliest scheduled due time, a sooner due time being scheduled, or max_wait.
+    Returns True when plants are due. If Redis is unavailable it degrades to fixed-interval polling.
+    """
+    try:
+        delay = await watering_schedule.seconds_until_next(datetime.now(UTC))
+        if delay is not None and delay <= 0:
+            return True
+        timeout = max_wait if delay is None else min(delay, max_wait)
+        await watering_schedule.wait_for_change(timeout)
+    except Exception:  # noqa: BLE001
+        logger.warning("Watering schedule unavailable, polling every %ss", fallback_interval, exc_info=True)
+        await sleep(fallback_interval)
+        return True
+    return False
+
+
 async def main() -> None:
     settings = get_settings()
-    setup_logs("watering_worker", settings.bot.STAGE)
+    setup_logs("watering_worker", settings.bot.STAGE, queued=settings.bot.LOG_QUEUED)
 
     if settings.bot.SENTRY_DSN and settings.bot.STAGE == Stage.PROD:
         sentry_init(
@@ -39,33 +60,51 @@ async def main() -> None:
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
     db = get_db(settings)
-    notification_service = WateringNotificationService(TelegramNotificationDispatcher(bot))
+    dispatcher = ThrottledNotificationDispatcher(
+        TelegramNotificationDispatcher(bot),
+        rate=settings.bot.WATERING_SEND_RATE,
+        concurrency=settings.bot.WATERING_SEND_CONCURRENCY,
+    )
+    redis_client = Redis(
+        host=settings.redis.HOST,
+        port=settings.redis.PORT,
+        db=settings.redis.DB,
+        username=settings.redis.USERNAME,
+        password=settings.redis.PASSWORD.get_secret_value(),
+        decode_responses=True,
+    )
+    watering_schedule.configure(redis_client)
+    notification_service = WateringNotificationService(dispatcher, watering_schedule)
 
     worker_interval_seconds = int(getattr(settings.bot, "WATERING_WORKER_INTERVAL_SECONDS", DEFAULT_WORKER_INTERVAL_SECONDS))
     test_repeat_minutes = int(getattr(settings.bot, "WATERING_TEST_REPEAT_MINUTES", DEFAULT_TEST_REPEAT_MINUTES))
 
     logger.info(
-        "watering worker started (interval=%ss, test_repeat_minutes=%s)",
+        "watering worker started (fallback_interval=%ss, test_repeat_minutes=%s)",
         worker_interval_seconds,
         test_repeat_minutes,
     )
 
+    next_resync_at = 0.0
     while True:
-        utcnow = datetime.now(UTC)
+        if monotonic() >= next_resync_at:
+            try:
+                async with db.session_factory() as session:
+                    await notification_service.resync_schedule(session, datetime.now(UTC))
+            except Exception:  # noqa: BLE001
+                logger.warning("Failed to rebuild watering schedule", exc_info=True)
+            next_resync_at = monotonic() + settings.bot.WATERING_SCHEDULE_RESYNC_SECONDS
+
+        if not await wait_until_due(next_resync_at - monotonic(), worker_interval_seconds):
+            continue
+
         async with db.session_factory() as session:
-            users = await get_all_users_with_active_subscription(session)
-            for user in users:
-                sent_count = await notification_service.notify_user_due_plants(
-                    user_tg_id=user.tg_id,
-                    db_session=session,
-                    now=utcnow,
-                    test_repeat_minutes=test_repeat_minutes,
-                )
-                if sent_count:
-                    await sleep(0.1)
-            await session.commit()
-
-        await sleep(worker_interval_seconds)
+            await notification_service.notify_due_plants(
+                db_session=session,
+                now=datetime.now(UTC),
+                test_repeat_minutes=test_repeat_minutes,
+                batch_size=settings.bot.WATERING_WORKER_BATCH_SIZE,
+            )
 
 
 def run_main() -> None:
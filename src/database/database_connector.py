@@ -1,4 +1,8 @@
-from collections.abc import AsyncGenerator
+import logging
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from time import perf_counter
 
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -6,6 +10,65 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+RELEASE_ON_IO_KEY = "release_on_io"
+SLOW_POOL_WAIT_SECONDS = 0.1
+
+
+@dataclass
+class PoolWaitStats:
+    checkouts: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    slow_checkouts: int = 0
+
+    def observe(self, wait_seconds: float) -> None:
+        self.checkouts += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        if wait_seconds >= SLOW_POOL_WAIT_SECONDS:
+            self.slow_checkouts += 1
+
+    def snapshot(self) -> dict[str, float | int]:
+        avg_wait = self.total_wait_seconds / self.checkouts if self.checkouts else 0.0
+        return {
+            "checkouts": self.checkouts,
+            "slow_checkouts": self.slow_checkouts,
+            "avg_wait_ms": round(avg_wait * 1000, 2),
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+        }
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.slow_checkouts = 0
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that measures how long callers wait for a free connection."""
+
+    wait_stats: PoolWaitStats
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        started_at = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = perf_counter() - started_at
+            self.wait_stats.observe(waited)
+            if waited >= SLOW_POOL_WAIT_SECONDS:
+                logger.warning(
+                    "db pool wait",
+                    extra={"duration_ms": round(waited * 1000, 2), "pool_status": self.status()},
+                )
 
 
 class DatabaseConnector:
@@ -22,6 +85,7 @@ class DatabaseConnector:
             echo=echo,
             pool_size=pool_size,
             max_overflow=max_overflow,
+            poolclass=TimedAsyncQueuePool,
         )
         self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
             bind=self.engine,
@@ -30,6 +94,10 @@ class DatabaseConnector:
             expire_on_commit=False,
         )
 
+    @property
+    def pool_wait_stats(self) -> PoolWaitStats:
+        return self.engine.pool.wait_stats
+
     async def dispose(self) -> None:
         await self.engine.dispose()
 
@@ -38,6 +106,19 @@ class DatabaseConnector:
             yield session
 
 
+@asynccontextmanager
+async def db_released(db_session: AsyncSession) -> AsyncIterator[None]:
+    """
+    Unit-of-work boundary around external I/O (OpenAI, Telegram downloads, sleeps).
+    In release-on-io mode pending changes are committed so the connection goes back to the pool;
+    the session checks a connection out again on its next query.
+    """
+    info = getattr(db_session, "info", None) or {}
+    if info.get(RELEASE_ON_IO_KEY) and db_session.in_transaction():
+        await db_session.commit()
+    yield
+
+
 def get_db(settings) -> DatabaseConnector:
     return DatabaseConnector(
         url=settings.db.get_db_connection_string.get_secret_value(),
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import UTC, datetime
 from typing import ClassVar
 
 from sqlalchemy import (
@@ -7,15 +7,18 @@ from sqlalchemy import (
     BigInteger,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
     Text,
+    UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
-from bot.internal.enums import PaidEntity, PaymentType
+from bot.internal.enums import BroadcastOutcome, BroadcastStatus, PaidEntity, PaymentType
 
 
 class Base(DeclarativeBase):
@@ -91,6 +94,8 @@ class PlantAnalysis(Base):
 
     ai_response: Mapped[str] = mapped_column(Text, nullable=False)
     health_score: Mapped[int | None] = mapped_column(Integer)
+    # Telegram file_id of the rescue plan PDF sent for this analysis, so it is uploaded only once
+    plan_file_id: Mapped[str | None]
 
 class OneTimePurchase(Base):
     __tablename__ = "one_time_purchases"
@@ -103,6 +108,14 @@ class OneTimePurchase(Base):
 
 class GardenPlant(Base):
     __tablename__ = "garden_plants"
+    __table_args__ = (
+        Index(
+            "ix_garden_plants_due_watering",
+            "next_watering_at",
+            postgresql_where=text("notifications_enabled"),
+        ),
+        {"extend_existing": True},
+    )
 
     user_tg_id: Mapped[int] = mapped_column(
         BigInteger,
@@ -227,13 +240,30 @@ class PlantCareLog(Base):
     action: Mapped[str] = mapped_column(String(32), nullable=False)
     comment: Mapped[str | None] = mapped_column(Text)
 
+def _utc_now() -> datetime:
+    return datetime.now(UTC)
+
+
+# Dialog logs are range-partitioned by month on created_at (see database/partitions.py),
+# so created_at is part of the primary key and user_request_log_id cannot be a foreign key.
 class UserRequestLog(Base):
     __tablename__ = "user_request_logs"
+    __table_args__ = (
+        Index("ix_user_request_logs_user_tg_id_created_at", "user_tg_id", "created_at"),
+        {"extend_existing": True, "postgresql_partition_by": "RANGE (created_at)"},
+    )
 
+    # part of a composite key, so SQLAlchemy must be told the id comes from the sequence default
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+        default=_utc_now,
+        server_default=func.now(),
+    )
     user_tg_id: Mapped[int] = mapped_column(
         BigInteger,
         ForeignKey("users.tg_id", ondelete="CASCADE"),
-        index=True,
         nullable=False,
     )
     request_text: Mapped[str] = mapped_column(Text, nullable=False)
@@ -241,15 +271,56 @@ class UserRequestLog(Base):
 
 class BotResponseLog(Base):
     __tablename__ = "bot_response_logs"
+    __table_args__ = (
+        Index("ix_bot_response_logs_user_tg_id_created_at", "user_tg_id", "created_at"),
+        {"extend_existing": True, "postgresql_partition_by": "RANGE (created_at)"},
+    )
 
+    # part of a composite key, so SQLAlchemy must be told the id comes from the sequence default
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+        default=_utc_now,
+        server_default=func.now(),
+    )
     user_tg_id: Mapped[int] = mapped_column(
         BigInteger,
         ForeignKey("users.tg_id", ondelete="CASCADE"),
-        index=True,
         nullable=False,
     )
-    user_request_log_id: Mapped[int | None] = mapped_column(
-        ForeignKey("user_request_logs.id", ondelete="SET NULL"),
-        index=True,
-    )
+    user_request_log_id: Mapped[int | None] = mapped_column(Integer, index=True)
     response_text: Mapped[str] = mapped_column(Text, nullable=False)
+
+
+class BroadcastJob(Base):
+    __tablename__ = "broadcast_jobs"
+
+    admin_chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    progress_message_id: Mapped[int | None] = mapped_column(BigInteger)
+    text: Mapped[str | None] = mapped_column(Text)
+    photo_file_id: Mapped[str | None] = mapped_column(Text)
+    status: Mapped[BroadcastStatus] = mapped_column(default=BroadcastStatus.RUNNING)
+    cursor_tg_id: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    total: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    sent: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    blocked: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    failed: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+
+class BroadcastRecipient(Base):
+    __tablename__ = "broadcast_recipients"
+    __table_args__ = (
+        UniqueConstraint("job_id", "user_tg_id", name="uq_broadcast_recipients_job_user"),
+        {"extend_existing": True},
+    )
+
+    job_id: Mapped[int] = mapped_column(
+        ForeignKey("broadcast_jobs.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    user_tg_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    outcome: Mapped[BroadcastOutcome]
+    error: Mapped[str | None] = mapped_column(Text)
@@ -0,0 +1,135 @@
+import gzip
+import logging
+import re
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_LOG_TABLES = ("user_request_logs", "bot_response_logs")
+PARTITION_NAME_RE = re.compile(r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+# Tables alembic autogenerate must not treat as unknown: monthly and default partitions.
+PARTITION_TABLE_RE = re.compile(rf"^({'|'.join(PARTITIONED_LOG_TABLES)})_(p\d{{4}}_\d{{2}}|default)$")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def partition_bounds(month: date) -> str:
+    return f"FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> dict[date, str]:
+    """Monthly partitions attached to `table` by month; the default partition is not included."""
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table},
+    )
+    partitions = {}
+    for name in result.scalars():
+        match = PARTITION_NAME_RE.match(name)
+        if match and match["table"] == table:
+            partitions[date(int(match["year"]), int(match["month"]), 1)] = name
+    return partitions
+
+
+async def create_partition(conn: AsyncConnection, table: str, month: date) -> str:
+    """
+    Create the partition for `month`. Rows that already landed in the default partition
+    for that month are moved into it, otherwise Postgres refuses to create it.
+    """
+    name = partition_name(table, month)
+    bounds = partition_bounds(month)
+    lower, upper = f"{month.isoformat()} 00:00:00+00", f"{add_months(month, 1).isoformat()} 00:00:00+00"
+    has_stray_rows = await conn.scalar(
+        text(f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE created_at >= :lower AND created_at < :upper)"),  # noqa: S608
+        {"lower": lower, "upper": upper},
+    )
+    if not has_stray_rows:
+        await conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}"))
+        return name
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    await conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {table}_default "  # noqa: S608
+            "WHERE created_at >= :lower AND created_at < :upper RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"lower": lower, "upper": upper},
+    )
+    await conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    logger.warning("Moved rows of %s from the default partition into %s", month, name)
+    return name
+
+
+async def ensure_partitions(conn: AsyncConnection, today: date, months_ahead: int) -> list[str]:
+    """Make sure every log table has partitions for the current month and `months_ahead` months after it."""
+    created = []
+    current = month_start(today)
+    for table in PARTITIONED_LOG_TABLES:
+        existing = await list_partitions(conn, table)
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                created.append(await create_partition(conn, table, month))
+    return created
+
+
+async def archive_partition(conn: AsyncConnection, name: str, archive_dir: Path) -> Path:
+    """Dump a partition to <archive_dir>/<name>.csv.gz with COPY, through the raw asyncpg connection."""
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / f"{name}.csv.gz"
+    raw_connection = await conn.get_raw_connection()
+    with gzip.open(path, "wb") as archive:
+
+        async def write(chunk: bytes) -> None:
+            archive.write(chunk)
+
+        await raw_connection.driver_connection.copy_from_table(name, output=write, format="csv", header=True)
+    return path
+
+
+async def retire_partitions(
+    conn: AsyncConnection,
+    today: date,
+    retain_months: int,
+    archive_dir: Path | None,
+    *,
+    drop: bool = True,
+) -> list[str]:
+    """
+    Detach partitions that ended more than `retain_months` months ago; archive them to gzip files
+    when archive_dir is given and drop them unless drop=False (then they stay as plain tables).
+    """
+    oldest_kept = add_months(month_start(today), -retain_months)
+    retired = []
+    for table in PARTITIONED_LOG_TABLES:
+        for month, name in sorted((await list_partitions(conn, table)).items()):
+            if month >= oldest_kept:
+                continue
+            await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if archive_dir is not None:
+                path = await archive_partition(conn, name, archive_dir)
+                logger.info("Archived %s to %s", name, path)
+            if drop:
+                await conn.execute(text(f"DROP TABLE {name}"))
+            retired.append(name)
+    return retired
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from typing import cast
@@ -8,10 +9,14 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ParseMode
 from fastapi import FastAPI
+from redis.asyncio import Redis
 from starlette.datastructures import State
 
 from bot.config import get_settings
+from bot.controllers.analytics import analytics
+from bot.controllers.user_cache import user_cache
 from bot.internal.helpers import setup_logs
+from bot.internal.media import media_registry
 from database.database_connector import get_db
 from webapp.webhook import router
 
@@ -26,12 +31,30 @@ async def lifespan(app: FastAPI):
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
         session=session,
     )
+    redis_client = Redis(
+        host=settings.redis.HOST,
+        port=settings.redis.PORT,
+        db=settings.redis.DB,
+        username=settings.redis.USERNAME,
+        password=settings.redis.PASSWORD.get_secret_value(),
+        decode_responses=True,
+    )
+    media_registry.configure(redis_client)
+    analytics.configure(redis_client)
+    user_cache.configure(redis_client)
+    analytics_task = asyncio.create_task(analytics.run(settings.bot.ANALYTICS_FLUSH_SECONDS))
     me = await bot.get_me()
     app.state.bot_id = me.id
     app.state.bot = bot
     app.state.settings = settings
     app.state.db = db
     yield
+    analytics_task.cancel()
+    await analytics.flush()
+    analytics.configure(None)
+    user_cache.configure(None)
+    media_registry.configure(None)
+    await redis_client.aclose()
     await db.dispose()
     await session.close()
 
@@ -40,7 +63,7 @@ app = FastAPI(lifespan=lifespan)
 app.state = cast(State, app.state)
 
 
-setup_logs("yookassa_webhook", get_settings().bot.STAGE)
+setup_logs("yookassa_webhook", get_settings().bot.STAGE, queued=get_settings().bot.LOG_QUEUED)
 
 app.include_router(router, prefix="/webhook")
 
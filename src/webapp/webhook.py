@@ -5,7 +5,7 @@ from aiogram import Bot
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.storage.base import StorageKey
 from aiogram.fsm.storage.redis import RedisStorage
-from aiogram.types import FSInputFile, InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from dateutil.relativedelta import relativedelta
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel, ValidationError
@@ -16,6 +16,7 @@ from starlette.requests import Request
 from starlette.responses import JSONResponse
 
 from bot.config import Settings
+from bot.controllers.analytics import analytics
 from bot.controllers.payments import get_payment_from_db
 from bot.controllers.statistics import build_stat_message
 from bot.controllers.user import (
@@ -26,6 +27,7 @@ from bot.controllers.user import (
 from bot.internal.enums import PaidEntity
 from bot.internal.keyboards import garden_entry_kb
 from bot.internal.lexicon import garden_text, payment_text
+from bot.internal.media import media_registry
 from bot.log_context import bind_log_context, reset_log_context, set_log_context
 from database.models import OneTimePurchase, Payment, User
 from webapp.deps import get_bot, get_db_session, get_settings
@@ -105,6 +107,7 @@ async def yookassa_webhook( # noqa: C901 PLR0915 PLR0912
                 await db_session.flush()
                 if not was_paid:
                     logger.info(build_stat_message("Payment_success", payment.user_tg_id))
+                    analytics.track("Payment_success", payment.user_tg_id)
             else:
                 logger.warning(
                     "Received payment.succeeded webhook with non-succeeded status",
@@ -157,11 +160,10 @@ async def yookassa_webhook( # noqa: C901 PLR0915 PLR0912
                 if not payment_type:
                     user.is_autopayment_enabled = True
                     user.subscription_duration = entity
-                    await bot.send_photo(
+                    await media_registry.send_photo(
+                        bot,
                         payment.user_tg_id,
-                        FSInputFile(
-                            path="src/bot/data/gardener1.png",
-                        ),
+                        "src/bot/data/gardener1.png",
                         caption=text,
                         reply_markup=garden_entry_kb(),
                     )
@@ -199,9 +201,10 @@ async def yookassa_webhook( # noqa: C901 PLR0915 PLR0912
                     )
             elif entity == PaidEntity.PICTURES_COUNTER_REFRESH:
                 await reset_user_image_counter(payment.user_tg_id, db_session)
-                await bot.send_photo(
+                await media_registry.send_photo(
+                    bot,
                     payment.user_tg_id,
-                    FSInputFile(path="src/bot/data/taking_photo.png"),
+                    "src/bot/data/taking_photo.png",
                     caption=payment_text["refresh_pictures_limit_success"],
                 )
                 logger.info(
@@ -0,0 +1,422 @@
+"""
+Offline benchmark of the full update pipeline: synthetic updates go through the production Dispatcher
+(bot.main.build_dispatcher: every middleware and router) with Telegram, OpenAI and YooKassa replaced by
+local stand-ins with configurable latency. Postgres and Redis are the local ones from .env.
+
+Bench users get ids from --first-user-id on, are added to BOT_ADMINS for the run (so action limits
+and paywalls do not change the code path halfway through) and are deleted afterwards.
+The voice scenario needs ffmpeg in PATH, like the bot itself.
+
+    PYTHONPATH=src python tests/bench_dispatcher.py --updates 200 --concurrency 20 --save-baseline bench.json
+    PYTHONPATH=src python tests/bench_dispatcher.py --updates 200 --concurrency 20 --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import sys
+import time
+import wave
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.enums import ChatType, ParseMode
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.types import CallbackQuery, Chat, Message, PhotoSize, Update, Voice
+from aiogram.types import User as TgUser
+from aiohttp import web
+from redis.asyncio import Redis
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from yookassa_stub_server import build_app as build_yookassa_app
+
+from bot.config import get_settings
+from bot.internal.enums import AIState
+from bot.main import build_dispatcher, configure_services, start_background_tasks, stop_background_tasks
+from database.database_connector import get_db
+from database.models import OneTimePurchase, User
+
+MESSAGE_METHODS = {
+    "sendMessage",
+    "sendPhoto",
+    "sendDocument",
+    "sendVoice",
+    "forwardMessage",
+    "copyMessage",
+    "editMessageText",
+    "editMessageCaption",
+    "editMessageReplyMarkup",
+}
+
+
+def silent_wav(seconds: float = 1.0, rate: int = 8000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\0\0" * int(rate * seconds))
+    return buffer.getvalue()
+
+
+class TelegramStandIn(BaseSession):
+    """Answers Bot API calls locally after `latency` seconds; downloads return `file_payload`."""
+
+    def __init__(self, latency: float, download_latency: float, file_payload: bytes) -> None:
+        super().__init__()
+        self.latency = latency
+        self.download_latency = download_latency
+        self.file_payload = file_payload
+        self.calls: Counter[str] = Counter()
+        self._ids = itertools.count(1)
+
+    def _message(self, method: Any) -> dict[str, Any]:
+        message_id = next(self._ids)
+        result: dict[str, Any] = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": getattr(method, "chat_id", None) or 1, "type": "private"},
+            "text": getattr(method, "text", None) or "ok",
+        }
+        if method.__api_method__ == "sendPhoto":
+            result["photo"] = [
+                {"file_id": f"photo-{message_id}", "file_unique_id": f"u-{message_id}", "width": 1, "height": 1}
+            ]
+        if method.__api_method__ == "sendDocument":
+            result["document"] = {"file_id": f"doc-{message_id}", "file_unique_id": f"u-{message_id}"}
+        return result
+
+    def _result(self, bot: Bot, method: Any) -> Any:
+        name = method.__api_method__
+        if name in MESSAGE_METHODS:
+            return self._message(method)
+        if name == "forwardMessages":
+            return [{"message_id": next(self._ids)} for _ in method.message_ids]
+        if name == "getFile":
+            file_id = method.file_id
+            return {"file_id": file_id, "file_unique_id": file_id, "file_path": f"files/{file_id}"}
+        if name == "getMe":
+            return {"id": bot.id, "is_bot": True, "first_name": "bench"}
+        return True
+
+    async def make_request(self, bot: Bot, method: Any, timeout: int | None = None) -> Any:  # noqa: ASYNC109
+        del timeout
+        self.calls[method.__api_method__] += 1
+        await asyncio.sleep(self.latency)
+        content = json.dumps({"ok": True, "result": self._result(bot, method)})
+        return self.check_response(bot=bot, method=method, status_code=200, content=content).result
+
+    async def stream_content(self, url: str, *_args: Any, **_kwargs: Any) -> AsyncIterator[bytes]:
+        del url
+        self.calls["download"] += 1
+        await asyncio.sleep(self.download_latency)
+        yield self.file_payload
+
+    async def close(self) -> None:
+        return
+
+
+class OpenAIStandIn:
+    """Duck-typed AIClient: every call answers after `latency` seconds."""
+
+    def __init__(self, latency: float, answer: str) -> None:
+        self.latency = latency
+        self.answer = answer
+        self.calls: Counter[str] = Counter()
+        self._ids = itertools.count(1)
+
+    async def _reply(self, operation: str) -> tuple[str, str]:
+        self.calls[operation] += 1
+        await asyncio.sleep(self.latency)
+        return self.answer, f"resp_bench_{next(self._ids)}"
+
+    async def transcribe(self, *_args: Any, **_kwargs: Any) -> str:
+        self.calls["transcription"] += 1
+        await asyncio.sleep(self.latency / 2)
+        return "Как часто поливать фикус?"
+
+    async def get_response(self, *_args: Any, **_kwargs: Any) -> tuple[str, str]:
+        return await self._reply("get_response")
+
+    async def get_response_with_image(self, *_args: Any, **_kwargs: Any) -> tuple[str, str]:
+        return await self._reply("get_response_with_image")
+
+    async def stream_response(
+        self,
+        _ai_thread_id: str | None,
+        _text: str,
+        _message: Message,
+        _fullname: str,
+        on_delta: Callable[[str], Awaitable[None]],
+        *_args: Any,
+        **_kwargs: Any,
+    ) -> tuple[str, str]:
+        answer, response_id = await self._reply("stream_response")
+        for word in answer.split(" "):
+            await on_delta(word + " ")
+        return answer, response_id
+
+    async def apply_context_to_thread(
+        self,
+        user: User,
+        _context: str,
+        db_session: AsyncSession,
+        *_args: Any,
+        **_kwargs: Any,
+    ) -> str:
+        _, thread_id = await self._reply("apply_context_to_thread")
+        user.ai_thread = thread_id
+        user.is_context_added = True
+        db_session.add(user)
+        await db_session.flush()
+        return thread_id
+
+    async def delete_thread(self, *_args: Any, **_kwargs: Any) -> None:
+        self.calls["delete_thread"] += 1
+
+
+def tg_user(user_id: int) -> TgUser:
+    return TgUser(id=user_id, is_bot=False, first_name="Bench", username=f"bench_{user_id}")
+
+
+def make_message(user_id: int, message_id: int, **content: Any) -> Message:
+    return Message(
+        message_id=message_id,
+        date=int(time.time()),
+        chat=Chat(id=user_id, type=ChatType.PRIVATE),
+        from_user=tg_user(user_id),
+        **content,
+    )
+
+
+def text_update(text: str) -> Callable[[int, int], Update]:
+    return lambda user_id, seq: Update(update_id=seq, message=make_message(user_id, seq, text=text))
+
+
+def photo_update(user_id: int, seq: int) -> Update:
+    photo = PhotoSize(file_id=f"in-photo-{seq}", file_unique_id=f"in-u-{seq}", width=800, height=600)
+    return Update(update_id=seq, message=make_message(user_id, seq, photo=[photo]))
+
+
+def voice_update(user_id: int, seq: int) -> Update:
+    voice = Voice(file_id=f"in-voice-{seq}", file_unique_id=f"in-v-{seq}", duration=1)
+    return Update(update_id=seq, message=make_message(user_id, seq, voice=voice))
+
+
+def callback_update(data: str) -> Callable[[int, int], Update]:
+    def build(user_id: int, seq: int) -> Update:
+        callback = CallbackQuery(
+            id=str(seq),
+            from_user=tg_user(user_id),
+            chat_instance="bench",
+            data=data,
+            message=make_message(user_id, seq, text="menu"),
+        )
+        return Update(update_id=seq, callback_query=callback)
+
+    return build
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    state: str | None
+    build_update: Callable[[int, int], Update]
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("start", None, text_update("/start")),
+        Scenario("ai_text", AIState.IN_AI_DIALOG.state, text_update("Почему желтеют листья у фикуса?")),
+        Scenario("ai_photo", AIState.IN_AI_DIALOG.state, photo_update),
+        Scenario("ai_voice", AIState.IN_AI_DIALOG.state, voice_update),
+        Scenario("onboarding_callback", None, callback_update("onb:send_photo")),
+        Scenario("payment_callback", None, callback_update("pay:rescue_once")),
+    )
+}
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def run_scenario(  # noqa: PLR0913
+    scenario: Scenario,
+    dispatcher: Any,
+    bot: Bot,
+    storage: RedisStorage,
+    user_ids: list[int],
+    updates: int,
+    concurrency: int,
+    seq: itertools.count,
+) -> dict[str, Any]:
+    for user_id in user_ids:
+        await storage.set_state(StorageKey(bot_id=bot.id, chat_id=user_id, user_id=user_id), scenario.state)
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    # One update per user at a time, as aiogram's polling would deliver them.
+    user_locks = {user_id: asyncio.Lock() for user_id in user_ids}
+
+    async def feed(index: int) -> None:
+        nonlocal errors
+        user_id = user_ids[index % len(user_ids)]
+        async with semaphore, user_locks[user_id]:
+            update = scenario.build_update(user_id, next(seq))
+            started = time.perf_counter()
+            try:
+                await dispatcher.feed_update(bot, update)
+            except Exception:  # noqa: BLE001
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(feed(index) for index in range(updates)))
+    elapsed = time.perf_counter() - started
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def print_report(report: dict[str, Any], baseline: dict[str, Any] | None) -> list[str]:
+    """Print per-scenario numbers (with the change against the baseline) and return the regressions."""
+    regressions = []
+    header = f"{'scenario':<22}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'upd/s':>9}"
+    print(header)  # noqa: T201
+    for name, result in report["scenarios"].items():
+        print(  # noqa: T201
+            f"{name:<22}{result['count']:>7}{result['errors']:>8}{result['p50_ms']:>10}"
+            f"{result['p95_ms']:>10}{result['p99_ms']:>10}{result['throughput_per_s']:>9}"
+        )
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_per_s"):
+            if previous[metric]:
+                change = (result[metric] - previous[metric]) / previous[metric]
+                changes.append(f"{metric} {change:+.1%}")
+                worse = -change if metric == "throughput_per_s" else change
+                if worse > report["max_regression"]:
+                    regressions.append(f"{name} {metric} {change:+.1%}")
+        print(f"{'':<22}vs baseline: {', '.join(changes)}")  # noqa: T201
+    print(f"db pool: {report['pool']}")  # noqa: T201
+    print(f"telegram calls: {report['telegram_calls']}")  # noqa: T201
+    print(f"openai calls: {report['openai_calls']}")  # noqa: T201
+    return regressions
+
+
+async def bench(args: argparse.Namespace) -> dict[str, Any]:
+    yookassa_runner = web.AppRunner(build_yookassa_app(delay=args.yookassa_latency))
+    await yookassa_runner.setup()
+    await web.TCPSite(yookassa_runner, "127.0.0.1", args.yookassa_port).start()
+
+    settings = get_settings()
+    settings.shop.API_URL = f"http://127.0.0.1:{args.yookassa_port}/v3"
+    user_ids = list(range(args.first_user_id, args.first_user_id + args.users))
+    settings.bot.ADMINS.extend(user_ids)
+
+    telegram = TelegramStandIn(args.telegram_latency, args.download_latency, silent_wav())
+    bot = Bot(
+        token=settings.bot.TOKEN.get_secret_value(),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+        session=telegram,
+    )
+    openai_client = OpenAIStandIn(args.openai_latency, "Поливайте фикус раз в неделю. " * 20)
+    redis_client = Redis(
+        host=settings.redis.HOST,
+        port=settings.redis.PORT,
+        db=settings.redis.DB,
+        username=settings.redis.USERNAME,
+        password=settings.redis.PASSWORD.get_secret_value(),
+        decode_responses=True,
+    )
+    storage = RedisStorage(redis_client)
+    db = get_db(settings)
+    configure_services(settings, bot, redis_client, db)
+    dispatcher = build_dispatcher(settings, storage, db, openai_client)
+    background_tasks = start_background_tasks(settings, bot, db)
+    seq = itertools.count(1)
+    report: dict[str, Any] = {"scenarios": {}, "max_regression": args.max_regression}
+    try:
+        # Warm-up creates the bench users, so user creation is not part of the measured runs.
+        await run_scenario(
+            SCENARIOS["start"], dispatcher, bot, storage, user_ids, len(user_ids), args.concurrency, seq
+        )
+        db.pool_wait_stats.reset()
+        telegram.calls.clear()
+        openai_client.calls.clear()
+        for name in args.scenarios:
+            report["scenarios"][name] = await run_scenario(
+                SCENARIOS[name], dispatcher, bot, storage, user_ids, args.updates, args.concurrency, seq
+            )
+        report["pool"] = db.pool_wait_stats.snapshot()
+        report["telegram_calls"] = dict(telegram.calls)
+        report["openai_calls"] = dict(openai_client.calls)
+    finally:
+        await stop_background_tasks(background_tasks)
+        for user_id in user_ids:
+            await storage.set_state(StorageKey(bot_id=bot.id, chat_id=user_id, user_id=user_id), None)
+        async with db.session_factory() as session:
+            await session.execute(delete(OneTimePurchase).where(OneTimePurchase.user_id.in_(user_ids)))
+            await session.execute(delete(User).where(User.tg_id.in_(user_ids)))
+            await session.commit()
+        await db.dispose()
+        await redis_client.aclose()
+        await yookassa_runner.cleanup()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the dispatcher pipeline with local stand-ins")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--updates", type=int, default=200, help="Updates per scenario")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20)
+    # one_time_purchases.user_id is a 32-bit column, so bench ids stay below 2**31
+    parser.add_argument("--first-user-id", type=int, default=2_140_000_000)
+    parser.add_argument("--telegram-latency", type=float, default=0.05)
+    parser.add_argument("--download-latency", type=float, default=0.1)
+    parser.add_argument("--openai-latency", type=float, default=1.0)
+    parser.add_argument("--yookassa-latency", type=float, default=0.2)
+    parser.add_argument("--yookassa-port", type=int, default=8091)
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="Fail when a latency grows (or throughput drops) by more than this fraction against --baseline",
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(bench(args))
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    regressions = print_report(report, baseline)
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    if regressions:
+        print(f"Regressions over {args.max_regression:.0%}: {'; '.join(regressions)}")  # noqa: T201
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark of per-update logging overhead on the calling thread (the event loop in the bot).
+
+Each simulated update logs what LoggingMiddleware and a typical handler log: "handler start",
+one handler record and "handler end". Handlers write to a temporary logs/ directory and /dev/null.
+
+    PYTHONPATH=src python tests/bench_logging.py --updates 20000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from bot.internal import helpers
+from bot.internal.enums import Stage
+from bot.log_context import reset_log_context, set_log_context
+
+logger = logging.getLogger("bench")
+
+
+def simulate(updates: int) -> float:
+    started = time.perf_counter()
+    for update_id in range(updates):
+        token = set_log_context(correlation_id=f"tg-{update_id}", user_id=update_id % 1000, operation="handler")
+        logger.info("handler start", extra={"handler": "handler"})
+        logger.info("user %s asked for %s", update_id % 1000, "diagnosis")
+        logger.info("handler end", extra={"handler": "handler", "duration_ms": 1.25})
+        reset_log_context(token)
+    return time.perf_counter() - started
+
+
+def measure(title: str, stage: Stage, updates: int, *, queued: bool, sample_rate: float = 1.0) -> None:
+    helpers.setup_logs("bench", stage, queued=queued, handler_sample_rate=sample_rate)
+    elapsed = simulate(updates)
+    drain_started = time.perf_counter()
+    helpers.stop_logs()
+    drained = time.perf_counter() - drain_started
+    for handler in logging.getLogger().handlers:
+        handler.close()
+    print(
+        f"{title:<32} {elapsed / updates * 1e6:8.1f} us/update on caller, "
+        f"{(elapsed + drained) / updates * 1e6:8.1f} us/update total",
+        file=sys.__stdout__,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark per-update logging overhead")
+    parser.add_argument("--updates", type=int, default=20_000)
+    parser.add_argument("--no-orjson", action="store_true", help="Measure the stdlib json fallback")
+    args = parser.parse_args()
+    if args.no_orjson:
+        helpers.orjson = None
+
+    print(f"JSON encoder: {'orjson' if helpers.orjson else 'json'}", file=sys.__stdout__)
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull:  # noqa: PTH123
+        os.chdir(directory)
+        sys.stdout = sys.stderr = devnull
+        try:
+            measure("direct, text (DEV)", Stage.DEV, args.updates, queued=False)
+            measure("direct, json (PROD)", Stage.PROD, args.updates, queued=False)
+            measure("queued, json (PROD)", Stage.PROD, args.updates, queued=True)
+            measure("queued, json, 10% start/end", Stage.PROD, args.updates, queued=True, sample_rate=0.1)
+        finally:
+            sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark of /static aggregation on a synthetic log.
+
+    PYTHONPATH=src python tests/bench_stats_snapshots.py --lines 3000000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from bot.controllers.statistics import (
+    StatsIndex,
+    build_stat_message,
+    build_stats_snapshots,
+    day_windows,
+    iter_stat_events,
+)
+
+EVENTS = ("Start_bot", "Photo_upload", "Paywall_view", "Payment_success", "Diagnosis_result")
+
+
+def write_log(path: Path, lines: int, days: int) -> None:
+    rng = random.Random(42)  # noqa: S311
+    started_at = datetime.now(UTC) - timedelta(days=days)
+    step = timedelta(days=days) / lines
+    with path.open("w", encoding="utf-8") as log_file:
+        for number in range(lines):
+            timestamp = (started_at + step * number).strftime("%d.%m.%Y %H:%M:%S.%f%z")
+            if number % 4:
+                message = f"handler finished in {rng.random():.3f}s"
+            else:
+                message = build_stat_message(rng.choice(EVENTS), rng.randrange(100_000))
+            log_file.write(f"{timestamp} | {message}\n")
+
+
+def scan_per_window(events: list[tuple[datetime, str]], windows: list[tuple[datetime | None, datetime]]) -> None:
+    for start_at, end_at in windows:
+        counts = dict.fromkeys(EVENTS, 0)
+        for timestamp, event in events:
+            if (start_at is None or timestamp >= start_at) and timestamp < end_at and event in counts:
+                counts[event] += 1
+
+
+def measure(title: str, func) -> object:
+    started = time.perf_counter()
+    result = func()
+    print(f"{title:<45} {time.perf_counter() - started:8.3f}s")  # noqa: T201
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark /static aggregation")
+    parser.add_argument("--lines", type=int, default=3_000_000)
+    parser.add_argument("--days", type=int, default=180)
+    args = parser.parse_args()
+
+    now = datetime.now(UTC)
+    periods = [(None, now), (now - timedelta(days=60), now), (now - timedelta(days=30), now), (now - timedelta(days=7), now)]
+    daily = day_windows(now - timedelta(days=args.days), now)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = Path(tmp_dir) / "suslik_robot.log"
+        measure(f"write {args.lines} lines", lambda: write_log(log_path, args.lines, args.days))
+        events = measure("parse log (iter_stat_events)", lambda: iter_stat_events([log_path]))
+        measure("4 periods, one pass per period", lambda: scan_per_window(events, periods))
+        measure("4 periods, build_stats_snapshots", lambda: build_stats_snapshots(events, periods))
+        measure(f"{len(daily)} daily windows, build_stats_snapshots", lambda: build_stats_snapshots(events, daily))
+
+        index = StatsIndex(Path(tmp_dir) / "stats_index.json")
+        measure("StatsIndex first refresh", lambda: index.refresh([log_path]))
+        measure("StatsIndex refresh without new lines", lambda: index.refresh([log_path]))
+        measure("StatsIndex 4 periods", lambda: index.snapshots(periods))
+        measure(f"StatsIndex {len(daily)} daily windows", lambda: index.snapshots(daily))
+
+
+if __name__ == "__main__":
+    main()
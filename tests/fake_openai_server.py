@@ -0,0 +1,341 @@
+"""
+Local OpenAI Responses API stand-in for load tests and manual runs.
+
+Implements what AIClient uses: POST /v1/responses (plain, background and SSE streaming),
+GET/DELETE /v1/responses/{id} and POST /v1/audio/transcriptions. Answers are canned and follow
+the prompt: garden photos get NAME:/HEALTH:/WATER_DAYS:, onboarding diagnoses get a Health Score,
+plant snapshots get STATUS:/WATER_DAYS:/SPRAY_DAYS:/LIGHT:, everything else a care tip.
+
+    python tests/fake_openai_server.py --port 8090 --latency lognormal:1.5:0.4 --rate-limit-ratio 0.02
+    GPT_BASE_URL=http://127.0.0.1:8090/v1 bot-run
+
+Latency specs: "fixed:<s>", "uniform:<min>:<max>" or "lognormal:<median>:<sigma>".
+GET /stats returns request and error counters.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+from uuid import uuid4
+
+from aiohttp import web
+
+GARDEN_ANSWERS = (
+    "NAME: Фикус Бенджамина\nHEALTH: ПОМОЩЬ\nWATER_DAYS: 7",
+    "NAME: Монстера\nHEALTH: ЗДОРОВ\nWATER_DAYS: 10",
+    "NAME: Спатифиллум\nHEALTH: КРИТИЧЕСКОЕ\nWATER_DAYS: 4",
+)
+SNAPSHOT_ANSWERS = (
+    "STATUS: Активный рост\nWATER_DAYS: 7\nSPRAY_DAYS: 2\nLIGHT: Рассеянный свет",
+    "STATUS: Восстановление\nWATER_DAYS: 5\nSPRAY_DAYS: 3\nLIGHT: Полутень",
+)
+DIAGNOSIS_ANSWERS = (
+    (
+        "🌿 Растение: Фикус Бенджамина\n"
+        "📊 Health Score: 🟡 6/10 (Статус: Среднее)\n"
+        "⚠️ Листья желтеют снизу: похоже на перелив.\n"
+        "💧 Дай почве просохнуть на 2-3 см, прежде чем поливать снова."
+    ),
+    (
+        "🌿 Растение: Монстера\n"
+        "📊 Health Score: 🟢 9/10 (Статус: Отличное)\n"
+        "✅ Новые листья здоровые, пятен нет.\n"
+        "💧 Полив раз в 7-10 дней, рассеянный свет."
+    ),
+    (
+        "🌿 Растение: Спатифиллум\n"
+        "📊 Health Score: 🔴 3/10 (Статус: Критическое)\n"
+        "🚨 Корни, вероятно, загнивают: листья вялые при влажной почве.\n"
+        "✂️ Нужна пересадка и обрезка повреждённых корней."
+    ),
+)
+CARE_ANSWERS = (
+    (
+        "### Полив\n- Поливай, когда верхний слой почвы просохнет на 2-3 см.\n- Лишнюю воду из поддона сливай.\n\n"
+        "### Свет\n- Рассеянный свет, без прямого полуденного солнца."
+    ),
+    "Похоже, растению не хватает света. Переставь его ближе к окну и не поливай чаще раза в неделю.",
+)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    kind, *params = spec.split(":")
+    values = [float(param) for param in params]
+    if kind == "fixed" and len(values) == 1:
+        return lambda _rng: values[0]
+    if kind == "uniform" and len(values) == 2:  # noqa: PLR2004
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:  # noqa: PLR2004
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise argparse.ArgumentTypeError(f"Bad latency spec: {spec}")
+
+
+def input_text(payload: dict[str, Any]) -> str:
+    parts = []
+    for item in payload.get("input") or []:
+        content = item.get("content") if isinstance(item, dict) else None
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(part.get("text", "") for part in content if isinstance(part, dict))
+    if isinstance(payload.get("input"), str):
+        parts.append(payload["input"])
+    return "\n".join(parts)
+
+
+def canned_answer(text: str, rng: random.Random) -> str:
+    if "NAME:" in text:
+        return rng.choice(GARDEN_ANSWERS)
+    if "SPRAY_DAYS" in text:
+        return rng.choice(SNAPSHOT_ANSWERS)
+    if "Health Score" in text:
+        return rng.choice(DIAGNOSIS_ANSWERS)
+    return rng.choice(CARE_ANSWERS)
+
+
+def error_body(message: str, error_type: str, code: str | None, param: str | None = None) -> dict[str, Any]:
+    return {"error": {"message": message, "type": error_type, "code": code, "param": param}}
+
+
+def message_item(item_id: str, text: str, status: str = "completed") -> dict[str, Any]:
+    return {
+        "id": item_id,
+        "type": "message",
+        "role": "assistant",
+        "status": status,
+        "content": [{"type": "output_text", "text": text, "annotations": []}] if text else [],
+    }
+
+
+def response_object(  # noqa: PLR0913
+    response_id: str,
+    payload: dict[str, Any],
+    *,
+    status: str,
+    text: str,
+    item_id: str,
+    created_at: float,
+) -> dict[str, Any]:
+    input_tokens = max(1, len(input_text(payload)) // 4)
+    output_tokens = max(1, len(text) // 4) if status == "completed" else 0
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(created_at),
+        "status": status,
+        "model": payload.get("model", "gpt-test"),
+        "instructions": payload.get("instructions"),
+        "previous_response_id": payload.get("previous_response_id"),
+        "background": bool(payload.get("background")),
+        "output": [message_item(item_id, text)] if status == "completed" else [],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": payload.get("tools") or [],
+        "text": {"format": {"type": "text"}},
+        "temperature": 1.0,
+        "top_p": 1.0,
+        "metadata": {},
+        "error": None,
+        "incomplete_details": None,
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        }
+        if status == "completed"
+        else None,
+    }
+
+
+def build_app(  # noqa: C901, PLR0915
+    *,
+    latency: str = "fixed:0",
+    delta_interval: float = 0.02,
+    rate_limit_ratio: float = 0.0,
+    bad_request_ratio: float = 0.0,
+    seed: int | None = None,
+) -> web.Application:
+    """
+    rate_limit_ratio: share of requests answered with 429 (the SDK retries them itself);
+    bad_request_ratio: share of chained requests answered with the 400 "previous_response_id" error
+    AIClient recovers from. Chaining to an id this server has not produced is always a 400.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    draw_latency = parse_latency(latency)
+    app = web.Application(client_max_size=32 * 1024**2)
+    app["responses"] = {}
+    app["stats"] = Counter()
+
+    def count(name: str) -> None:
+        app["stats"][name] += 1
+
+    def injected_error(payload: dict[str, Any] | None = None) -> web.Response | None:
+        if rate_limit_ratio and rng.random() < rate_limit_ratio:
+            count("error_429")
+            return web.json_response(
+                error_body("Rate limit reached for requests", "requests", "rate_limit_exceeded"),
+                status=429,
+                headers={"retry-after": "1"},
+            )
+        previous_id = (payload or {}).get("previous_response_id")
+        if previous_id and (previous_id not in app["responses"] or rng.random() < bad_request_ratio):
+            count("error_400")
+            return web.json_response(
+                error_body(
+                    f"Previous response with id '{previous_id}' not found.",
+                    "invalid_request_error",
+                    "previous_response_not_found",
+                    "previous_response_id",
+                ),
+                status=400,
+            )
+        return None
+
+    def stored_status(stored: dict[str, Any]) -> dict[str, Any]:
+        status = "completed" if time.time() >= stored["ready_at"] else "in_progress"
+        return response_object(
+            stored["id"],
+            stored["payload"],
+            status=status,
+            text=stored["text"],
+            item_id=stored["item_id"],
+            created_at=stored["created_at"],
+        )
+
+    async def stream(request: web.Request, stored: dict[str, Any]) -> web.StreamResponse:
+        sse = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await sse.prepare(request)
+        sequence = 0
+
+        async def send(event: dict[str, Any]) -> None:
+            nonlocal sequence
+            event["sequence_number"] = sequence
+            sequence += 1
+            await sse.write(f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode())
+
+        in_progress = response_object(
+            stored["id"],
+            stored["payload"],
+            status="in_progress",
+            text="",
+            item_id=stored["item_id"],
+            created_at=stored["created_at"],
+        )
+        item_id, text = stored["item_id"], stored["text"]
+        position = {"item_id": item_id, "output_index": 0, "content_index": 0}
+        await send({"type": "response.created", "response": in_progress})
+        await asyncio.sleep(draw_latency(rng))
+        part = {"type": "output_text", "text": "", "annotations": []}
+        item = message_item(item_id, "", "in_progress")
+        await send({"type": "response.output_item.added", "output_index": 0, "item": item})
+        await send({"type": "response.content_part.added", **position, "part": part})
+        for delta in re.findall(r"\S+\s*|\s+", text):
+            await send({"type": "response.output_text.delta", **position, "delta": delta, "logprobs": []})
+            await asyncio.sleep(delta_interval)
+        part = {**part, "text": text}
+        await send({"type": "response.output_text.done", **position, "text": text, "logprobs": []})
+        await send({"type": "response.content_part.done", **position, "part": part})
+        await send({"type": "response.output_item.done", "output_index": 0, "item": message_item(item_id, text)})
+        stored["ready_at"] = time.time()
+        await send({"type": "response.completed", "response": stored_status(stored)})
+        await sse.write_eof()
+        return sse
+
+    async def create_response(request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        count("responses.create")
+        error = injected_error(payload)
+        if error is not None:
+            return error
+        created_at = time.time()
+        stored = {
+            "id": f"resp_{uuid4().hex}",
+            "item_id": f"msg_{uuid4().hex}",
+            "payload": payload,
+            "text": canned_answer(input_text(payload), rng),
+            "created_at": created_at,
+            "ready_at": created_at,
+        }
+        request.app["responses"][stored["id"]] = stored
+        if payload.get("stream"):
+            count("responses.stream")
+            return await stream(request, stored)
+        delay = draw_latency(rng)
+        if payload.get("background"):
+            stored["ready_at"] = created_at + delay
+            return web.json_response(stored_status(stored))
+        await asyncio.sleep(delay)
+        return web.json_response(stored_status(stored))
+
+    async def retrieve_response(request: web.Request) -> web.Response:
+        count("responses.retrieve")
+        stored = request.app["responses"].get(request.match_info["response_id"])
+        if stored is None:
+            return web.json_response(error_body("Response not found", "invalid_request_error", None), status=404)
+        return web.json_response(stored_status(stored))
+
+    async def delete_response(request: web.Request) -> web.Response:
+        count("responses.delete")
+        response_id = request.match_info["response_id"]
+        if request.app["responses"].pop(response_id, None) is None:
+            return web.json_response(error_body("Response not found", "invalid_request_error", None), status=404)
+        return web.json_response({"id": response_id, "object": "response", "deleted": True})
+
+    async def transcribe(request: web.Request) -> web.Response:
+        count("audio.transcriptions")
+        form = await request.post()
+        error = injected_error()
+        if error is not None:
+            return error
+        await asyncio.sleep(draw_latency(rng) / 2)
+        text = "Почему у моего фикуса желтеют листья?"
+        if form.get("response_format", "json") == "text":
+            return web.Response(text=text + "\n")
+        return web.json_response({"text": text})
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response({**request.app["stats"], "stored_responses": len(request.app["responses"])})
+
+    app.router.add_post("/v1/responses", create_response)
+    app.router.add_get("/v1/responses/{response_id}", retrieve_response)
+    app.router.add_delete("/v1/responses/{response_id}", delete_response)
+    app.router.add_post("/v1/audio/transcriptions", transcribe)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local OpenAI Responses API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="lognormal:1.5:0.4", help="Time to the first output, see module doc")
+    parser.add_argument("--delta-interval", type=float, default=0.02, help="Pause between streamed deltas, seconds")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--bad-request-ratio", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    parse_latency(args.latency)
+    web.run_app(
+        build_app(
+            latency=args.latency,
+            delta_interval=args.delta_interval,
+            rate_limit_ratio=args.rate_limit_ratio,
+            bad_request_ratio=args.bad_request_ratio,
+            seed=args.seed,
+        ),
+        host=args.host,
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
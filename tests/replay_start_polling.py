@@ -16,6 +16,7 @@ from redis.asyncio import Redis
 from bot.config import get_settings
 from bot.handlers.command import router as commands_router
 from bot.middlewares.auth import AuthMiddleware
+from bot.middlewares.fsm_tracking import FSMTrackingMiddleware
 from bot.middlewares.logging import LoggingMiddleware
 from bot.middlewares.session import DBSessionMiddleware
 from bot.middlewares.updates_dumper import UpdatesDumperMiddleware
@@ -99,6 +100,9 @@ def build_dispatcher_and_bot() -> tuple[Dispatcher, Bot]:
     # middlewares — порядок как в main.py
     dp.update.outer_middleware(UpdatesDumperMiddleware())
 
+    dp.message.middleware(FSMTrackingMiddleware())
+    dp.callback_query.middleware(FSMTrackingMiddleware())
+
     dp.message.middleware(db_session_middleware)
     dp.callback_query.middleware(db_session_middleware)
 
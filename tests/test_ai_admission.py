@@ -0,0 +1,106 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from bot.ai_admission import AIAdmission, AIBusyError
+from bot.ai_client import AIClient
+from bot.internal.enums import AIPriority
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_waiting_requests_are_admitted_by_priority() -> None:
+    admission = AIAdmission(max_concurrency=1, queue_timeout=1)
+    order: list[str] = []
+
+    async def request(name: str, priority: AIPriority) -> None:
+        async with admission.admit(priority):
+            order.append(name)
+
+    async with admission.admit(AIPriority.NORMAL):
+        tasks = [
+            asyncio.create_task(request("demo", AIPriority.LOW)),
+            asyncio.create_task(request("free", AIPriority.NORMAL)),
+            asyncio.create_task(request("paid", AIPriority.HIGH)),
+        ]
+        await asyncio.sleep(0)
+        assert admission.queued == 3  # noqa: PLR2004
+    await asyncio.gather(*tasks)
+
+    assert order == ["paid", "free", "demo"]
+    assert admission.in_flight == 0
+    assert admission.queued == 0
+
+
+@pytest.mark.anyio
+async def test_request_past_deadline_gets_busy() -> None:
+    admission = AIAdmission(max_concurrency=1, queue_timeout=0.05)
+
+    async with admission.admit():
+        with pytest.raises(AIBusyError):
+            async with admission.admit():
+                pass
+
+    assert admission.queued == 0
+    async with admission.admit():
+        assert admission.in_flight == 1
+
+
+@pytest.mark.anyio
+async def test_full_queue_rejects_immediately() -> None:
+    admission = AIAdmission(max_concurrency=1, queue_timeout=5, max_queue=1)
+
+    async def wait_in_queue() -> None:
+        async with admission.admit():
+            pass
+
+    async with admission.admit():
+        queued = asyncio.create_task(wait_in_queue())
+        await asyncio.sleep(0)
+        with pytest.raises(AIBusyError, match="full"):
+            async with admission.admit():
+                pass
+    await queued
+
+
+@pytest.mark.anyio
+async def test_token_budget_delays_next_request() -> None:
+    admission = AIAdmission(max_concurrency=10, tpm=6000, queue_timeout=1)
+    loop = asyncio.get_running_loop()
+
+    async with admission.admit(tokens=6000) as permit:
+        permit.settle(5990)
+    started = loop.time()
+    async with admission.admit(tokens=20):
+        waited = loop.time() - started
+
+    # 10 missing tokens at 100 tokens/s
+    assert 0.05 < waited < 0.5  # noqa: PLR2004
+
+
+class RateLimitedResponsesAPI:
+    async def create(self, **_kwargs):
+        request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+        response = httpx.Response(429, headers={"retry-after": "7"}, request=request)
+        raise openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+@pytest.mark.anyio
+async def test_rate_limit_pauses_admission_and_raises_busy() -> None:
+    admission = AIAdmission(max_concurrency=2)
+    client = AIClient(token="test", model="gpt-test", admission=admission)  # noqa: S106
+    client._responses_api = RateLimitedResponsesAPI()  # noqa: SLF001
+
+    with pytest.raises(AIBusyError) as exc_info:
+        await client.get_response(None, "hi", SimpleNamespace(), "User", priority=AIPriority.HIGH)
+
+    assert exc_info.value.retry_after == 7  # noqa: PLR2004
+    assert admission.in_flight == 0
+    assert admission._start_delay(0) > 6  # noqa: PLR2004, SLF001
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bot.ai_client import AIClient
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakeResponsesAPI:
+    def __init__(self, status: str = "completed") -> None:
+        self.status = status
+        self.create_calls = 0
+        self.retrieve_calls = 0
+
+    async def create(self, **_kwargs):
+        self.create_calls += 1
+        return SimpleNamespace(id="resp_1", status=self.status, output_text="hello", usage=None)
+
+    async def retrieve(self, response_id: str):
+        self.retrieve_calls += 1
+        return SimpleNamespace(id=response_id, status="completed", output_text="later", usage=None)
+
+
+def build_client(responses_api: FakeResponsesAPI) -> AIClient:
+    client = AIClient(token="test", model="gpt-test")  # noqa: S106
+    client._responses_api = responses_api  # noqa: SLF001
+    return client
+
+
+@pytest.mark.anyio
+async def test_get_response_uses_create_result_without_retrieve() -> None:
+    responses_api = FakeResponsesAPI()
+    client = build_client(responses_api)
+
+    text, response_id = await client.get_response(None, "hi", SimpleNamespace(), "User")
+
+    assert (text, response_id) == ("hello", "resp_1")
+    assert responses_api.create_calls == 1
+    assert responses_api.retrieve_calls == 0
+
+
+@pytest.mark.anyio
+async def test_get_response_polls_background_response(monkeypatch) -> None:
+    async def no_sleep(_seconds: float) -> None:
+        return None
+
+    monkeypatch.setattr("bot.ai_client.sleep", no_sleep)
+    responses_api = FakeResponsesAPI(status="queued")
+    client = build_client(responses_api)
+
+    text, _ = await client.get_response(None, "hi", SimpleNamespace(), "User")
+
+    assert text == "later"
+    assert responses_api.retrieve_calls == 1
@@ -0,0 +1,132 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from bot.controllers import analytics as analytics_module
+from bot.controllers.analytics import AnalyticsSink, build_period_snapshots
+from bot.controllers.statistics import StatsSnapshot
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.commands: list[tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *_args) -> None:
+        return None
+
+    def __getattr__(self, name: str):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+
+        return queue
+
+    async def execute(self) -> list:
+        if self.redis.fail:
+            raise ConnectionError("redis is down")
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.strings: dict[str, str] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.hlls: dict[str, set[int]] = {}
+        self.fail = False
+        self.pipelines = 0
+
+    def pipeline(self, *, transaction: bool = True) -> FakePipeline:  # noqa: ARG002
+        self.pipelines += 1
+        return FakePipeline(self)
+
+    async def set(self, key: str, value: str, *, nx: bool = False) -> bool:
+        if nx and key in self.strings:
+            return False
+        self.strings[key] = value
+        return True
+
+    async def get(self, key: str) -> str | None:
+        return self.strings.get(key)
+
+    async def hincrby(self, key: str, field: str, amount: int) -> int:
+        bucket = self.hashes.setdefault(key, {})
+        bucket[field] = str(int(bucket.get(field, 0)) + amount)
+        return int(bucket[field])
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        return dict(self.hashes.get(key, {}))
+
+    async def pfadd(self, key: str, *values: int) -> int:
+        self.hlls.setdefault(key, set()).update(values)
+        return 1
+
+    async def pfcount(self, *keys: str) -> int:
+        return len(set().union(*(self.hlls.get(key, set()) for key in keys)))
+
+
+NOW = datetime(2026, 5, 4, 10, 30, tzinfo=UTC)
+
+
+@pytest.mark.anyio
+async def test_track_buffers_until_one_pipelined_flush() -> None:
+    redis = FakeRedis()
+    sink = AnalyticsSink(redis)
+
+    for user_tg_id in (1, 2, 1):
+        sink.track("Start_bot", user_tg_id, at=NOW)
+    sink.track("Photo_upload", 1, at=NOW)
+    sink.track("Photo_upload", 1, at=NOW + timedelta(days=1))
+    assert redis.pipelines == 0
+
+    await sink.flush()
+
+    assert redis.pipelines == 1
+    assert redis.hashes["analytics:events:Start_bot"] == {"2026050410": "3"}
+    assert await sink.tracking_since() == NOW.replace(minute=0)
+    snapshot = await sink.snapshot(NOW - timedelta(hours=1), NOW + timedelta(days=2))
+    assert snapshot == StatsSnapshot(start_bot=3, photo_upload=1)
+
+
+@pytest.mark.anyio
+async def test_failed_flush_keeps_counters_for_retry() -> None:
+    redis = FakeRedis()
+    sink = AnalyticsSink(redis)
+    sink.track("Paywall_view", 1, at=NOW)
+    redis.fail = True
+
+    await sink.flush()
+    redis.fail = False
+    await sink.flush()
+
+    assert redis.hashes["analytics:events:Paywall_view"] == {"2026050410": "1"}
+
+
+@pytest.mark.anyio
+async def test_period_before_tracking_started_comes_from_log_index(monkeypatch) -> None:
+    redis = FakeRedis()
+    sink = AnalyticsSink(redis)
+    monkeypatch.setattr(analytics_module, "analytics", sink)
+    sink.track("Payment_success", 1, at=NOW)
+    await sink.flush()
+
+    class FakeLogIndex:
+        def snapshots(self, windows) -> list[StatsSnapshot]:
+            assert [end_at for _, end_at in windows] == [NOW.replace(minute=0), NOW.replace(minute=0)]
+            return [StatsSnapshot(payment_success=5), StatsSnapshot()]
+
+    since = await sink.tracking_since()
+    snapshots = await build_period_snapshots(
+        [(None, NOW + timedelta(hours=1)), (NOW, NOW + timedelta(hours=1))],
+        since,
+        FakeLogIndex(),
+    )
+
+    assert [snapshot.payment_success for snapshot in snapshots] == [6, 1]
@@ -0,0 +1,111 @@
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+from bot.controllers import broadcast as broadcast_module
+from bot.controllers.broadcast import BroadcastWorker, format_broadcast_progress, set_broadcast_status
+from bot.internal.enums import BroadcastOutcome, BroadcastStatus
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.sent: list[int] = []
+        self.flooded = False
+
+    async def send_message(self, chat_id: int, _text: str) -> None:
+        method = SimpleNamespace()
+        if chat_id == 2:  # noqa: PLR2004
+            raise TelegramForbiddenError(method=method, message="Forbidden: bot was blocked by the user")
+        if chat_id == 3:  # noqa: PLR2004
+            raise TelegramForbiddenError(method=method, message="Forbidden: user is deactivated")
+        if chat_id == 4 and not self.flooded:  # noqa: PLR2004
+            self.flooded = True
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=0)
+        self.sent.append(chat_id)
+
+
+@pytest.mark.anyio
+async def test_broadcast_page_records_outcome_per_recipient() -> None:
+    bot = FakeBot()
+    worker = BroadcastWorker(bot, db=None, rate=1000, concurrency=2)
+    job = SimpleNamespace(text="Привет", photo_file_id=None)
+
+    outcomes = await worker._send_page(job, [1, 2, 3, 4])  # noqa: SLF001
+
+    assert [(user_tg_id, outcome) for user_tg_id, outcome, _ in outcomes] == [
+        (1, BroadcastOutcome.SENT),
+        (2, BroadcastOutcome.BLOCKED),
+        (3, BroadcastOutcome.DEACTIVATED),
+        (4, BroadcastOutcome.SENT),
+    ]
+    assert sorted(bot.sent) == [1, 4]
+
+
+def test_format_broadcast_progress_shows_percent() -> None:
+    job = SimpleNamespace(id=7, status=BroadcastStatus.PAUSED, total=200, sent=90, blocked=8, failed=2)
+
+    text = format_broadcast_progress(job)
+
+    assert "#7" in text
+    assert "на паузе" in text
+    assert "100 (50%)" in text
+
+
+class FakeSession:
+    def __init__(self, events: list[str]) -> None:
+        self.events = events
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *_args) -> None:
+        return None
+
+    async def flush(self) -> None:
+        self.events.append("flush")
+
+    async def commit(self) -> None:
+        self.events.append("commit")
+
+
+@pytest.mark.anyio
+async def test_pause_and_resume_keep_the_lease() -> None:
+    locked_until = datetime(2026, 5, 4, 9, 0, tzinfo=UTC)
+    job = SimpleNamespace(status=BroadcastStatus.RUNNING, locked_until=locked_until, finished_at=None)
+    session = FakeSession([])
+
+    await set_broadcast_status(job, BroadcastStatus.PAUSED, session)
+    await set_broadcast_status(job, BroadcastStatus.RUNNING, session)
+    assert job.locked_until == locked_until
+
+    await set_broadcast_status(job, BroadcastStatus.CANCELLED, session)
+    assert job.locked_until is None
+    assert job.finished_at is not None
+
+
+@pytest.mark.anyio
+async def test_worker_releases_lease_when_it_stops_on_paused_job(monkeypatch) -> None:
+    events: list[str] = []
+    job = SimpleNamespace(id=7, status=BroadcastStatus.PAUSED, progress_message_id=None)
+
+    async def fake_get_broadcast_job(_job_id, _db_session):
+        return job
+
+    async def fake_release_broadcast_job(job_id, _db_session):
+        events.append(f"release {job_id}")
+
+    monkeypatch.setattr(broadcast_module, "get_broadcast_job", fake_get_broadcast_job)
+    monkeypatch.setattr(broadcast_module, "release_broadcast_job", fake_release_broadcast_job)
+    db = SimpleNamespace(session_factory=lambda: FakeSession(events))
+    worker = BroadcastWorker(FakeBot(), db=db)
+
+    await worker.process(7)
+
+    assert events == ["release 7", "commit"]
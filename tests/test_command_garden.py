@@ -1,6 +1,6 @@
 from datetime import UTC, datetime
 from types import SimpleNamespace
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 
@@ -75,13 +75,12 @@ async def test_open_garden_by_command_for_active_subscription(monkeypatch) -> No
 
     monkeypatch.setattr(garden_module, "ensure_garden_access", AsyncMock(return_value=True))
     monkeypatch.setattr(garden_module, "show_garden_list", show_garden_list)
-    monkeypatch.setattr(garden_module, "log_garden_action", AsyncMock())
+    monkeypatch.setattr(garden_module, "log_garden_action", Mock())
 
     await garden_module.open_garden_by_command(
         message=message,
         user=SimpleNamespace(),
         db_session=SimpleNamespace(),
-        settings=SimpleNamespace(bot=SimpleNamespace(CHAT_LOG_ID=1)),
     )
 
     show_garden_list.assert_awaited_once()
@@ -94,13 +93,12 @@ async def test_open_garden_by_command_without_subscription(monkeypatch) -> None:
 
     monkeypatch.setattr(garden_module, "ensure_garden_access", AsyncMock(return_value=False))
     monkeypatch.setattr(garden_module, "show_garden_list", show_garden_list)
-    monkeypatch.setattr(garden_module, "log_garden_action", AsyncMock())
+    monkeypatch.setattr(garden_module, "log_garden_action", Mock())
 
     await garden_module.open_garden_by_command(
         message=message,
         user=SimpleNamespace(),
         db_session=SimpleNamespace(),
-        settings=SimpleNamespace(bot=SimpleNamespace(CHAT_LOG_ID=1)),
     )
 
     show_garden_list.assert_not_awaited()
@@ -137,7 +135,6 @@ async def test_add_garden_plant_last_watered_rejects_invalid_date_range(monkeypa
         state=state,
         user=SimpleNamespace(tg_id=1),
         db_session=SimpleNamespace(),
-        settings=SimpleNamespace(bot=SimpleNamespace(CHAT_LOG_ID=1)),
     )
 
     add_plant.assert_not_awaited()
@@ -227,14 +224,13 @@ async def test_add_garden_plant_last_watered_shows_today_for_overdue_next_wateri
     monkeypatch.setattr(garden_module, "ensure_garden_access", AsyncMock(return_value=True))
     monkeypatch.setattr(garden_module, "add_plant", AsyncMock(return_value=plant))
     monkeypatch.setattr(garden_module, "show_garden_list", show_garden_list)
-    monkeypatch.setattr(garden_module, "log_garden_action", AsyncMock())
+    monkeypatch.setattr(garden_module, "log_garden_action", Mock())
 
     await garden_module.add_garden_plant_last_watered(
         message=message,
         state=state,
         user=SimpleNamespace(tg_id=1),
         db_session=SimpleNamespace(flush=AsyncMock()),
-        settings=SimpleNamespace(bot=SimpleNamespace(CHAT_LOG_ID=1)),
     )
 
     assert message.answers[0] == "Готово! «кент» теперь в саду."
@@ -254,14 +250,13 @@ async def test_mark_watered_rejects_second_watering_same_day(monkeypatch) -> Non
 
     monkeypatch.setattr(garden_module, "get_plant", AsyncMock(return_value=plant))
     monkeypatch.setattr(garden_module, "mark_plant_watered", mark_plant_watered)
-    monkeypatch.setattr(garden_module, "log_garden_action", AsyncMock())
+    monkeypatch.setattr(garden_module, "log_garden_action", Mock())
 
     await garden_module.mark_watered(
         callback=callback,
         callback_data=SimpleNamespace(plant_id=1),
         user=SimpleNamespace(tg_id=1, fullname="Test", username="test"),
         db_session=SimpleNamespace(),
-        settings=SimpleNamespace(bot=SimpleNamespace(CHAT_LOG_ID=1)),
     )
 
     mark_plant_watered.assert_not_awaited()
@@ -276,7 +271,7 @@ async def test_back_from_garden_list_returns_to_ai_dialog(monkeypatch) -> None:
     callback = FakeCallback(message)
     state = FakeState(current_state=garden_module.GardenState.IN_GARDEN_STUB)
 
-    monkeypatch.setattr(garden_module, "log_garden_action", AsyncMock())
+    monkeypatch.setattr(garden_module, "log_garden_action", Mock())
 
     await garden_module.back_handler(
         callback=callback,
@@ -284,7 +279,6 @@ async def test_back_from_garden_list_returns_to_ai_dialog(monkeypatch) -> None:
         state=state,
         user=SimpleNamespace(tg_id=1, fullname="Test", username="test"),
         db_session=SimpleNamespace(),
-        settings=SimpleNamespace(bot=SimpleNamespace(CHAT_LOG_ID=1)),
     )
 
     assert state.state == garden_module.AIState.IN_AI_DIALOG
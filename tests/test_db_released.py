@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+
+from database.database_connector import RELEASE_ON_IO_KEY, PoolWaitStats, db_released
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakeSession:
+    def __init__(self, *, release_on_io: bool, in_transaction: bool = True) -> None:
+        self.info = {RELEASE_ON_IO_KEY: release_on_io}
+        self._in_transaction = in_transaction
+        self.commits = 0
+
+    def in_transaction(self) -> bool:
+        return self._in_transaction
+
+    async def commit(self) -> None:
+        self.commits += 1
+        self._in_transaction = False
+
+
+@pytest.mark.anyio
+async def test_db_released_commits_in_release_mode() -> None:
+    session = FakeSession(release_on_io=True)
+
+    async with db_released(session):
+        pass
+
+    assert session.commits == 1
+
+
+@pytest.mark.anyio
+async def test_db_released_is_noop_by_default() -> None:
+    session = FakeSession(release_on_io=False)
+
+    async with db_released(session):
+        pass
+    async with db_released(SimpleNamespace()):
+        pass
+
+    assert session.commits == 0
+
+
+def test_pool_wait_stats_snapshot() -> None:
+    stats = PoolWaitStats()
+    stats.observe(0.01)
+    stats.observe(0.2)
+
+    snapshot = stats.snapshot()
+
+    assert snapshot["checkouts"] == 2  # noqa: PLR2004
+    assert snapshot["slow_checkouts"] == 1
+    assert snapshot["max_wait_ms"] == 200.0  # noqa: PLR2004
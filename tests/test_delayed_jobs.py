@@ -0,0 +1,114 @@
+import asyncio
+import os
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from bot.internal.delayed_jobs import DelayedJobs
+
+NOW = datetime(2026, 5, 4, 9, 0, tzinfo=UTC)
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def redis_jobs() -> AsyncIterator[DelayedJobs]:
+    """DelayedJobs on a local Redis (TEST_REDIS_URL) under a throwaway prefix; skipped when Redis is not running."""
+    redis = Redis.from_url(os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15"), decode_responses=True)
+    try:
+        await redis.ping()
+    except (RedisConnectionError, OSError):
+        await redis.aclose()
+        pytest.skip("local Redis is not available")
+    jobs = DelayedJobs(redis, prefix=f"test_delayed_jobs:{uuid4().hex}")
+    jobs.configure(redis, bot="bot")
+
+    @jobs.register("reminder")
+    async def reminder(bot, chat_id: int) -> None:
+        pass
+
+    yield jobs
+    await redis.delete(jobs.due_key, jobs.processing_key, jobs.data_key)
+    await redis.aclose()
+
+
+@pytest.mark.anyio
+async def test_delayed_jobs_without_redis_run_in_process_and_replace_by_id() -> None:
+    jobs = DelayedJobs()
+    jobs.configure(None, bot="bot")
+    calls: list[tuple[str, int]] = []
+
+    @jobs.register("reminder")
+    async def reminder(bot, chat_id: int) -> None:
+        calls.append((bot, chat_id))
+
+    await jobs.schedule("reminder", datetime.now(UTC) + timedelta(hours=1), job_id="reminder:1", chat_id=1)
+    await jobs.schedule("reminder", datetime.now(UTC), job_id="reminder:1", chat_id=2)
+    await asyncio.sleep(0.01)
+
+    assert calls == [("bot", 2)]
+    assert not jobs._local_tasks  # noqa: SLF001
+
+
+@pytest.mark.anyio
+async def test_delayed_jobs_reject_unknown_handler() -> None:
+    with pytest.raises(ValueError, match="Unknown delayed job"):
+        await DelayedJobs().schedule("missing", datetime.now(UTC))
+
+
+@pytest.mark.anyio
+async def test_claim_moves_due_jobs_to_processing_once(redis_jobs: DelayedJobs) -> None:
+    await redis_jobs.schedule("reminder", NOW - timedelta(minutes=1), job_id="due", chat_id=1)
+    await redis_jobs.schedule("reminder", NOW + timedelta(hours=1), job_id="later", chat_id=2)
+
+    claimed = await redis_jobs.claim_due(NOW, limit=10, lease_seconds=60)
+
+    assert [(job["id"], job["payload"]) for job in claimed] == [("due", {"chat_id": 1})]
+    assert await redis_jobs.claim_due(NOW, limit=10, lease_seconds=60) == []
+    assert await redis_jobs.redis.zscore(redis_jobs.processing_key, "due") == NOW.timestamp() + 60
+    assert await redis_jobs.complete(claimed[0])
+    assert await redis_jobs.redis.zcard(redis_jobs.processing_key) == 0
+    assert await redis_jobs.redis.hkeys(redis_jobs.data_key) == ["later"]
+
+
+@pytest.mark.anyio
+async def test_claim_drops_ids_without_data(redis_jobs: DelayedJobs) -> None:
+    await redis_jobs.redis.zadd(redis_jobs.due_key, {"orphan": NOW.timestamp()})
+
+    assert await redis_jobs.claim_due(NOW, limit=10, lease_seconds=60) == []
+    assert await redis_jobs.redis.zcard(redis_jobs.due_key) == 0
+    assert await redis_jobs.redis.zcard(redis_jobs.processing_key) == 0
+
+
+@pytest.mark.anyio
+async def test_expired_lease_is_requeued(redis_jobs: DelayedJobs) -> None:
+    await redis_jobs.schedule("reminder", NOW, job_id="job", chat_id=1)
+    await redis_jobs.claim_due(NOW, limit=10, lease_seconds=60)
+
+    assert await redis_jobs.requeue_expired(NOW + timedelta(seconds=30)) == 0
+    assert await redis_jobs.requeue_expired(NOW + timedelta(seconds=61)) == 1
+
+    claimed = await redis_jobs.claim_due(NOW + timedelta(seconds=61), limit=10, lease_seconds=60)
+    assert [job["id"] for job in claimed] == ["job"]
+
+
+@pytest.mark.anyio
+async def test_completing_old_run_keeps_job_scheduled_again(redis_jobs: DelayedJobs) -> None:
+    await redis_jobs.schedule("reminder", NOW, job_id="reminder:1", chat_id=1)
+    [old_run] = await redis_jobs.claim_due(NOW, limit=10, lease_seconds=60)
+    await redis_jobs.schedule("reminder", NOW + timedelta(hours=1), job_id="reminder:1", chat_id=2)
+
+    assert not await redis_jobs.complete(old_run)
+    assert await redis_jobs.requeue_expired(NOW + timedelta(minutes=5)) == 0
+
+    [new_run] = await redis_jobs.claim_due(NOW + timedelta(hours=1), limit=10, lease_seconds=60)
+    assert new_run["payload"] == {"chat_id": 2}
+    assert await redis_jobs.complete(new_run)
+    assert await redis_jobs.redis.hlen(redis_jobs.data_key) == 0
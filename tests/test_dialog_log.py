@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bot.controllers.dialog_log import DialogLogWriter
+from database.models import BotResponseLog, UserRequestLog
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakeSession:
+    def __init__(self, db: "FakeDB") -> None:
+        self.db = db
+        self.pending: list[tuple[str, list[dict]]] = []
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *_args) -> None:
+        return None
+
+    async def execute(self, statement, rows=None):
+        if rows is None:
+            start = self.db.next_id
+            self.db.next_id += self.db.block_size
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: list(range(start, self.db.next_id))))
+        table = statement.table.name
+        if any(row["user_tg_id"] in self.db.missing_users for row in rows):
+            raise RuntimeError("foreign key violation")
+        self.pending.append((table, rows))
+        return None
+
+    async def commit(self) -> None:
+        await asyncio.sleep(self.db.commit_delay)
+        self.db.committed.extend(self.pending)
+
+
+class FakeDB:
+    def __init__(self, block_size: int = 100) -> None:
+        self.block_size = block_size
+        self.next_id = 1
+        self.missing_users: set[int] = set()
+        self.committed: list[tuple[str, list[dict]]] = []
+        self.commit_delay = 0.0
+
+    def session_factory(self) -> FakeSession:
+        return FakeSession(self)
+
+
+@pytest.mark.anyio
+async def test_writer_links_response_to_reserved_request_id_in_one_batch() -> None:
+    db = FakeDB()
+    writer = DialogLogWriter(db)
+
+    request_ids = [await writer.next_request_id() for _ in range(2)]
+    for request_id in request_ids:
+        await writer.add(UserRequestLog, id=request_id, user_tg_id=1, request_text="hi")
+        await writer.add(BotResponseLog, user_tg_id=1, response_text="hello", user_request_log_id=request_id)
+    await writer.close()
+
+    assert request_ids == [1, 2]
+    assert [(table, len(rows)) for table, rows in db.committed] == [
+        ("user_request_logs", 2),
+        ("bot_response_logs", 2),
+    ]
+    assert [row["user_request_log_id"] for row in db.committed[1][1]] == request_ids
+
+
+@pytest.mark.anyio
+async def test_writer_retries_rows_rejected_by_the_bulk_insert() -> None:
+    db = FakeDB()
+    db.missing_users.add(2)
+    writer = DialogLogWriter(db, max_attempts=2)
+    await writer.add(UserRequestLog, id=1, user_tg_id=1, request_text="ok")
+    await writer.add(UserRequestLog, id=2, user_tg_id=2, request_text="user not committed yet")
+
+    assert await writer.flush() == 1
+    db.missing_users.clear()
+    assert await writer.flush() == 1
+    assert [rows[0]["id"] for _, rows in db.committed] == [1, 2]
+
+
+@pytest.mark.anyio
+async def test_close_lets_the_running_writer_finish_its_batch() -> None:
+    db = FakeDB()
+    db.commit_delay = 0.05
+    writer = DialogLogWriter(db, batch_size=1, flush_interval=10)
+    task = asyncio.create_task(writer.run())
+    await writer.add(UserRequestLog, id=1, user_tg_id=1, request_text="in flight")
+    await asyncio.sleep(0.01)
+    await writer.add(UserRequestLog, id=2, user_tg_id=1, request_text="still queued")
+
+    await writer.close()
+
+    assert task.done()
+    assert [rows[0]["id"] for _, rows in db.committed] == [1, 2]
@@ -0,0 +1,84 @@
+import argparse
+from types import SimpleNamespace
+
+import pytest
+from aiohttp.test_utils import TestServer
+from fake_openai_server import build_app, parse_latency
+
+from bot.ai_client import AIClient
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+def build_client(server: TestServer) -> AIClient:
+    return AIClient(token="test", model="gpt-test", base_url=str(server.make_url("/v1")))  # noqa: S106
+
+
+def test_parse_latency_specs() -> None:
+    assert parse_latency("fixed:0.25")(None) == 0.25  # noqa: PLR2004
+    with pytest.raises(argparse.ArgumentTypeError, match="latency"):
+        parse_latency("gaussian:1")
+
+
+@pytest.mark.anyio
+async def test_get_response_chains_through_stand_in() -> None:
+    app = build_app(seed=1)
+    async with TestServer(app) as server:
+        client = build_client(server)
+        text, response_id = await client.get_response(None, "Как поливать фикус?", SimpleNamespace(), "User")
+        _, next_id = await client.get_response(response_id, "А зимой?", SimpleNamespace(), "User")
+        await client.client.close()
+
+    assert text
+    assert response_id.startswith("resp_")
+    assert next_id != response_id
+    assert app["stats"]["responses.create"] == 2  # noqa: PLR2004
+
+
+@pytest.mark.anyio
+async def test_stream_response_deltas_join_to_final_text() -> None:
+    deltas: list[str] = []
+
+    async def on_delta(delta: str) -> None:
+        deltas.append(delta)
+
+    async with TestServer(build_app(seed=1, delta_interval=0)) as server:
+        client = build_client(server)
+        text, response_id = await client.stream_response(None, "Привет", SimpleNamespace(), "User", on_delta)
+        await client.client.close()
+
+    assert len(deltas) > 1
+    assert "".join(deltas) == text
+    assert response_id.startswith("resp_")
+
+
+@pytest.mark.anyio
+async def test_unknown_previous_response_is_recovered(monkeypatch) -> None:
+    async def no_sleep(_seconds: float) -> None:
+        return None
+
+    monkeypatch.setattr("bot.ai_client.sleep", no_sleep)
+    app = build_app(seed=1)
+    async with TestServer(app) as server:
+        client = build_client(server)
+        text, response_id = await client.get_response("resp_missing", "Привет", SimpleNamespace(), "User")
+        await client.client.close()
+
+    assert text
+    assert response_id in app["responses"]
+    assert app["stats"]["error_400"] == 1
+
+
+@pytest.mark.anyio
+async def test_transcription_returns_plain_text() -> None:
+    async with TestServer(build_app()) as server:
+        client = build_client(server)
+        transcript = await client.client.audio.transcriptions.create(
+            model="whisper-1", file=("voice.ogg", b"OggS"), response_format="text"
+        )
+        await client.client.close()
+
+    assert "фикус" in transcript
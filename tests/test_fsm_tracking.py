@@ -0,0 +1,69 @@
+from typing import Any
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from bot.internal.enums import AIState
+from bot.middlewares.fsm_tracking import FSMTrackingMiddleware, TrackedFSMContext
+from bot.middlewares.logging import LoggingMiddleware
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class CountingStorage(MemoryStorage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.reads = 0
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        self.reads += 1
+        return await super().get_state(key)
+
+
+KEY = StorageKey(bot_id=1, chat_id=2, user_id=2)
+
+
+@pytest.mark.anyio
+async def test_tracked_context_follows_writes_without_reading_storage() -> None:
+    storage = CountingStorage()
+    context = TrackedFSMContext(storage, KEY, state=None)
+
+    await context.set_state(AIState.IN_AI_DIALOG)
+    assert await context.get_state() == AIState.IN_AI_DIALOG.state
+    assert context.changed
+    await context.clear()
+
+    assert await context.get_state() is None
+    assert not context.changed
+    assert storage.reads == 0
+    assert await storage.get_state(KEY) is None
+
+
+@pytest.mark.anyio
+async def test_logging_middleware_reports_transition_from_tracked_context() -> None:
+    storage = CountingStorage()
+    await storage.set_state(KEY, AIState.WAITING_PLANT_PHOTO)
+    seen: dict[str, Any] = {}
+
+    async def handler(_event, data: dict[str, Any]) -> None:
+        seen["state"] = data["state"]
+        await data["state"].set_state(AIState.IN_AI_DIALOG)
+
+    logging_middleware = LoggingMiddleware()
+    logging_middleware._get_name = lambda _handler: "handler"  # noqa: SLF001
+
+    async def logged(event, data: dict[str, Any]) -> None:
+        return await logging_middleware(handler, event, data)
+
+    data = {"state": FSMContext(storage, KEY), "raw_state": AIState.WAITING_PLANT_PHOTO.state}
+    await FSMTrackingMiddleware()(logged, object(), data)
+
+    assert isinstance(seen["state"], TrackedFSMContext)
+    assert seen["state"].initial_state == AIState.WAITING_PLANT_PHOTO.state
+    assert storage.reads == 0
+    assert await storage.get_state(KEY) == AIState.IN_AI_DIALOG.state
@@ -0,0 +1,113 @@
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+
+from bot.controllers.image_analysis_cache import CachedAnalysis, ImageAnalysisCache
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakeBot:
+    def __init__(self, contents: dict[str, bytes]) -> None:
+        self.contents = contents
+        self.downloads = 0
+
+    async def get_file(self, file_id: str):
+        return SimpleNamespace(file_path=f"photos/{file_id}.jpg")
+
+    async def download_file(self, file_path: str):
+        self.downloads += 1
+        return BytesIO(self.contents[file_path.removeprefix("photos/").removesuffix(".jpg")])
+
+
+class FakeAnalyser:
+    def __init__(self, answer: str | None = "NAME: Фикус") -> None:
+        self.answer = answer
+        self.calls = 0
+
+    async def __call__(self, _image_bytes: bytes, _telegram_path: str | None) -> CachedAnalysis | None:
+        self.calls += 1
+        return CachedAnalysis(self.answer) if self.answer else None
+
+
+@pytest.mark.anyio
+async def test_same_photo_skips_download_and_ai() -> None:
+    cache = ImageAnalysisCache()
+    bot = FakeBot({"file_1": b"photo"})
+    analyser = FakeAnalyser()
+
+    first, first_hit = await cache.analyse_photo(bot, "file_1", "uniq_1", 1, "prompt", analyser, kind="garden")
+    second, second_hit = await cache.analyse_photo(bot, "file_1", "uniq_1", 1, "prompt", analyser, kind="garden")
+
+    assert (first_hit, second_hit) == (False, True)
+    assert first == second == CachedAnalysis("NAME: Фикус")
+    assert (bot.downloads, analyser.calls) == (1, 1)
+    assert cache.snapshot()["hit_rate"] == 0.5  # noqa: PLR2004
+
+
+@pytest.mark.anyio
+async def test_reupload_with_same_bytes_hits_by_content() -> None:
+    cache = ImageAnalysisCache()
+    bot = FakeBot({"file_1": b"photo", "file_2": b"photo"})
+    analyser = FakeAnalyser()
+
+    await cache.analyse_photo(bot, "file_1", "uniq_1", 1, "prompt", analyser, kind="garden")
+    _, hit = await cache.analyse_photo(bot, "file_2", "uniq_2", 1, "prompt", analyser, kind="garden")
+
+    assert hit
+    assert (bot.downloads, analyser.calls) == (2, 1)
+
+
+@pytest.mark.anyio
+async def test_entries_are_scoped_by_user_and_prompt() -> None:
+    cache = ImageAnalysisCache()
+    bot = FakeBot({"file_1": b"photo"})
+    analyser = FakeAnalyser()
+
+    await cache.analyse_photo(bot, "file_1", "uniq_1", 1, "prompt v1", analyser, kind="garden")
+    await cache.analyse_photo(bot, "file_1", "uniq_1", 1, "prompt v2", analyser, kind="garden")
+    await cache.analyse_photo(bot, "file_1", "uniq_1", 2, "prompt v1", analyser, kind="garden")
+
+    assert analyser.calls == 3  # noqa: PLR2004
+
+
+@pytest.mark.anyio
+async def test_failed_analysis_is_not_cached() -> None:
+    cache = ImageAnalysisCache()
+    bot = FakeBot({"file_1": b"photo"})
+    analyser = FakeAnalyser(answer=None)
+
+    await cache.analyse_photo(bot, "file_1", "uniq_1", 1, "prompt", analyser, kind="onboarding")
+    analysis, hit = await cache.analyse_photo(bot, "file_1", "uniq_1", 1, "prompt", analyser, kind="onboarding")
+
+    assert (analysis, hit) == (None, False)
+    assert analyser.calls == 2  # noqa: PLR2004
+
+
+@pytest.mark.anyio
+async def test_entries_expire_and_are_evicted() -> None:
+    now = [0.0]
+    cache = ImageAnalysisCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    for index in range(3):
+        await cache.put(1, "prompt", [f"uniq_{index}"], CachedAnalysis(f"answer {index}"))
+
+    assert await cache.get(1, "prompt", "uniq_0", kind="garden") is None
+    assert await cache.get(1, "prompt", "uniq_2", kind="garden") == CachedAnalysis("answer 2")
+    now[0] = 11
+    assert await cache.get(1, "prompt", "uniq_2", kind="garden") is None
+
+
+@pytest.mark.anyio
+async def test_hit_with_missing_stored_photo_is_a_miss(tmp_path) -> None:
+    cache = ImageAnalysisCache()
+    photo_path = tmp_path / "plant.jpg"
+    photo_path.write_bytes(b"photo")
+    await cache.put(1, "prompt", ["uniq_1"], CachedAnalysis("answer", str(photo_path)))
+
+    assert await cache.get(1, "prompt", "uniq_1", kind="garden") is not None
+    photo_path.unlink()
+    assert await cache.get(1, "prompt", "uniq_1", kind="garden") is None
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bot.controllers.log_channel import MESSAGE_LIMIT, LogChannel, build_digests
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, dict]] = []
+
+    async def send_message(self, **kwargs) -> None:
+        self.calls.append(("send_message", kwargs))
+
+    async def forward_messages(self, **kwargs) -> None:
+        self.calls.append(("forward_messages", kwargs))
+
+
+def make_message(chat_id: int, message_id: int) -> SimpleNamespace:
+    return SimpleNamespace(chat=SimpleNamespace(id=chat_id), message_id=message_id)
+
+
+def test_build_digests_packs_texts_up_to_the_message_limit() -> None:
+    texts = ["a" * 2000, "b" * 2000, "c" * 2000, "d" * (MESSAGE_LIMIT + 10)]
+
+    digests = build_digests(texts)
+
+    assert [len(digest) for digest in digests] == [4002, 2000, MESSAGE_LIMIT, 10]
+    assert digests[0] == "a" * 2000 + "\n\n" + "b" * 2000
+
+
+@pytest.mark.anyio
+async def test_flush_coalesces_texts_and_batches_forwards_in_order() -> None:
+    bot = FakeBot()
+    channel = LogChannel(bot, chat_id=-100)
+    channel.forward(make_message(1, 11))
+    channel.forward(make_message(1, 10))
+    channel.post("step one")
+    channel.post("step two")
+    channel.forward(make_message(2, 5))
+
+    assert await channel.flush() == 5  # noqa: PLR2004
+    assert bot.calls == [
+        ("forward_messages", {"chat_id": -100, "from_chat_id": 1, "message_ids": [10, 11]}),
+        ("send_message", {"chat_id": -100, "text": "step one\n\nstep two"}),
+        ("forward_messages", {"chat_id": -100, "from_chat_id": 2, "message_ids": [5]}),
+    ]
+
+
+@pytest.mark.anyio
+async def test_backpressure_sheds_forwards_first_and_reports_drops() -> None:
+    bot = FakeBot()
+    channel = LogChannel(bot, chat_id=-100, max_queue=4, shed_forwards_at=0.5)
+    for index in range(5):
+        channel.post(f"entry {index}")
+    channel.forward(make_message(1, 1))
+
+    await channel.flush()
+
+    assert bot.calls == [
+        (
+            "send_message",
+            {
+                "chat_id": -100,
+                "text": "⚠️ log channel dropped 2 entries under load\n\nentry 0\n\nentry 1\n\nentry 2\n\nentry 3",
+            },
+        )
+    ]
+
+
+def test_unconfigured_channel_ignores_entries() -> None:
+    channel = LogChannel()
+    channel.post("nobody listens")
+    channel.forward(make_message(1, 1))
+
+    assert channel.dropped == 0
@@ -0,0 +1,81 @@
+import logging
+
+import pytest
+from aiogram.types import Update
+
+from bot.internal.helpers import enqueue_root_handlers
+from bot.log_context import LogContextFilter, SamplingFilter, get_log_context, reset_log_context, set_log_context
+from bot.middlewares.updates_dumper import UpdatesDumperMiddleware
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__(level=logging.INFO)
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.fixture
+def root_handler():
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    handler = ListHandler()
+    handler.addFilter(LogContextFilter(service="test"))
+    root.handlers = [handler]
+    root.setLevel(logging.DEBUG)
+    yield handler
+    root.handlers, root.level = saved_handlers, saved_level
+
+
+def make_record(message: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, message, None, None)
+
+
+def test_sampling_keeps_or_drops_both_records_of_an_update() -> None:
+    sampling = SamplingFilter(messages=("handler start", "handler end"), rate=0.5)
+    kept = 0
+    for update_id in range(200):
+        token = set_log_context(correlation_id=f"tg-{update_id}")
+        start = sampling.filter(make_record("handler start"))
+        end = sampling.filter(make_record("handler end"))
+        assert start == end
+        assert sampling.filter(make_record("fsm transition"))
+        assert sampling.filter(make_record("handler start", logging.ERROR))
+        reset_log_context(token)
+        kept += start
+    assert 50 < kept < 150  # noqa: PLR2004
+
+
+def test_queued_records_keep_the_callers_log_context(root_handler: ListHandler) -> None:
+    listener = enqueue_root_handlers()
+    token = set_log_context(correlation_id="tg-42", user_id=7)
+    try:
+        logging.getLogger("test").info("user %s asked", 7)
+        logging.getLogger("test").debug("not for the handlers")
+    finally:
+        reset_log_context(token)
+        listener.stop()
+
+    assert [(record.msg, record.correlation_id, record.user_id) for record in root_handler.records] == [
+        ("user 7 asked", "tg-42", 7),
+    ]
+
+
+@pytest.mark.anyio
+async def test_updates_dumper_binds_correlation_id_for_inner_middlewares() -> None:
+    seen: list[str | None] = []
+
+    async def inner(_event: Update, _data: dict) -> None:
+        seen.append(get_log_context().correlation_id)
+
+    await UpdatesDumperMiddleware()(inner, Update(update_id=42), {})
+
+    assert seen == ["tg-42"]
+    assert get_log_context().correlation_id is None
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+from aiogram.types import FSInputFile
+
+from bot.internal.media import MediaRegistry
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakeMessage:
+    def __init__(self) -> None:
+        self.sent_photos: list[object] = []
+
+    async def answer_photo(self, photo, *_args, **_kwargs):
+        self.sent_photos.append(photo)
+        return SimpleNamespace(photo=[SimpleNamespace(file_id=f"file_{len(self.sent_photos)}")])
+
+
+@pytest.mark.anyio
+async def test_media_registry_uploads_once_and_reuses_file_id(tmp_path) -> None:
+    image_path = tmp_path / "greetings.png"
+    image_path.write_bytes(b"first version")
+    registry = MediaRegistry()
+    message = FakeMessage()
+
+    await registry.answer_photo(message, str(image_path), caption="hi")
+    await registry.answer_photo(message, str(image_path), caption="hi")
+
+    assert isinstance(message.sent_photos[0], FSInputFile)
+    assert message.sent_photos[1] == "file_1"
+
+
+@pytest.mark.anyio
+async def test_media_registry_reuploads_changed_file(tmp_path) -> None:
+    image_path = tmp_path / "greetings.png"
+    image_path.write_bytes(b"first version")
+    registry = MediaRegistry()
+    message = FakeMessage()
+
+    await registry.answer_photo(message, str(image_path))
+    image_path.write_bytes(b"second, longer version")
+    await registry.answer_photo(message, str(image_path))
+
+    assert all(isinstance(photo, FSInputFile) for photo in message.sent_photos)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import UTC, datetime
 from types import SimpleNamespace
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 
@@ -114,32 +114,23 @@ async def test_onboarding_fsm_transitions_table( # noqa: PLR0913
     expected_state,
     expected_response,
 ) -> None:
-    monkeypatch.setattr(onboarding_module, "log_onboarding_step", AsyncMock())
+    monkeypatch.setattr(onboarding_module, "log_onboarding_step", Mock())
 
     class _TestDatetime:
         @classmethod
         def now(cls, _tz=None):
             return datetime(2026, 1, 1, 12, 0, 0, tzinfo=UTC)
 
-    class _FakeTask:
-        def add_done_callback(self, _callback) -> None:
-            return None
-
-    def _consume_task(coro):
-        coro.close()
-        return _FakeTask()
-
     monkeypatch.setattr(onboarding_module, "datetime", _TestDatetime)
-    monkeypatch.setattr(onboarding_module.asyncio, "create_task", _consume_task)
+    monkeypatch.setattr(onboarding_module.delayed_jobs, "schedule", AsyncMock())
 
     message = FakeMessage()
     callback = FakeCallback(data=callback_data, message=message)
     state = FakeState(data=initial_data)
 
     user = SimpleNamespace(tg_id=1, username="u", ai_thread=None)
-    settings = SimpleNamespace(bot=SimpleNamespace(ADMINS=[]))
 
-    await handler(callback=callback, state=state, user=user, settings=settings)
+    await handler(callback=callback, state=state, user=user)
 
     assert state.state == expected_state, node
     assert message.answers, node
@@ -149,7 +140,7 @@ async def test_onboarding_fsm_transitions_table( # noqa: PLR0913
 @pytest.mark.anyio
 @pytest.mark.parametrize("scenario", ["rescue", "growth"])
 async def test_onboarding_waiting_city_text_transition(monkeypatch, scenario: str) -> None:
-    monkeypatch.setattr(onboarding_module, "log_onboarding_step", AsyncMock())
+    monkeypatch.setattr(onboarding_module, "log_onboarding_step", Mock())
 
     async def rescue_screen(message, city):
         await message.answer(f"rescue:{city}")
@@ -173,7 +164,6 @@ async def test_onboarding_waiting_city_text_transition(monkeypatch, scenario: st
         state=state,
         user=user,
         db_session=db_session,
-        settings=SimpleNamespace(),
     )
 
     assert state.state == AIState.IN_AI_DIALOG
@@ -219,7 +209,7 @@ async def test_waiting_home_time_non_callback_fallbacks(handler_name: str) -> No
 
 @pytest.mark.anyio
 async def test_skip_callback_with_ai_thread_and_no_client(monkeypatch) -> None:
-    monkeypatch.setattr(onboarding_module, "log_onboarding_step", AsyncMock())
+    monkeypatch.setattr(onboarding_module, "log_onboarding_step", Mock())
     callback = FakeCallback(data="skip", message=FakeMessage())
     state = FakeState()
     user = SimpleNamespace(ai_thread="thread-1", action_count=0, tg_id=1)
@@ -230,7 +220,6 @@ async def test_skip_callback_with_ai_thread_and_no_client(monkeypatch) -> None:
         state=state,
         user=user,
         db_session=db_session,
-        settings=SimpleNamespace(),
         openai_client=None,
     )
 
@@ -243,7 +232,7 @@ async def test_skip_callback_with_ai_thread_and_no_client(monkeypatch) -> None:
 @pytest.mark.anyio
 @pytest.mark.parametrize("callback_data", ["pay:rescue", "pay:growth"])
 async def test_pay_callbacks_with_ai_thread_and_no_client(monkeypatch, callback_data: str) -> None:
-    monkeypatch.setattr(onboarding_module, "log_onboarding_step", AsyncMock())
+    monkeypatch.setattr(onboarding_module, "log_onboarding_step", Mock())
     monkeypatch.setattr(onboarding_module, "show_subscription_paywall", AsyncMock())
 
     callback = FakeCallback(data=callback_data, message=FakeMessage())
@@ -253,7 +242,6 @@ async def test_pay_callbacks_with_ai_thread_and_no_client(monkeypatch, callback_
     await onboarding_module.handle_paywall_from_onboarding(
         callback=callback,
         user=user,
-        settings=SimpleNamespace(),
         db_session=db_session,
         openai_client=None,
     )
@@ -0,0 +1,22 @@
+from datetime import date
+
+from database.partitions import PARTITION_TABLE_RE, add_months, partition_bounds, partition_name
+
+
+def test_add_months_crosses_year_boundaries() -> None:
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_partition_name_and_bounds() -> None:
+    assert partition_name("user_request_logs", date(2026, 12, 1)) == "user_request_logs_p2026_12"
+    assert partition_bounds(date(2026, 12, 1)) == (
+        "FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+    )
+
+
+def test_partition_table_re_matches_only_log_partitions() -> None:
+    assert PARTITION_TABLE_RE.match("bot_response_logs_p2026_05")
+    assert PARTITION_TABLE_RE.match("user_request_logs_default")
+    assert not PARTITION_TABLE_RE.match("user_request_logs")
+    assert not PARTITION_TABLE_RE.match("users_p2026_05")
@@ -0,0 +1,49 @@
+import pytest
+from aiohttp.test_utils import TestServer
+from yookassa_stub_server import build_app
+
+from bot.payment_gateway import PaymentGatewayError, YooKassaGateway
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+PAYLOAD = {
+    "amount": {"value": "390.00", "currency": "RUB"},
+    "confirmation": {"type": "redirect", "return_url": "https://t.me/SuslikAI_bot"},
+    "description": "Оплата подписки, длительность: 1 месяц.",
+    "metadata": {"entity": "ONE_MONTH_SUBSCRIPTION"},
+}
+
+
+@pytest.mark.anyio
+async def test_gateway_retries_with_same_idempotence_key() -> None:
+    app = build_app(fail_first=1)
+    async with TestServer(app) as server:
+        gateway = YooKassaGateway(1, "secret", base_url=str(server.make_url("/v3")))
+        try:
+            payment = await gateway.create_payment(PAYLOAD, "key-1")
+            repeated = await gateway.create_payment(PAYLOAD, "key-1")
+        finally:
+            await gateway.close()
+
+    assert payment.id == repeated.id
+    assert payment.confirmation.confirmation_url.endswith(payment.id)
+    assert {item["idempotence_key"] for item in app["requests"]} == {"key-1"}
+    assert len(app["payments_by_key"]) == 1
+
+
+@pytest.mark.anyio
+async def test_gateway_times_out() -> None:
+    app = build_app(delay=0.5)
+    async with TestServer(app) as server:
+        gateway = YooKassaGateway(
+            1, "secret", base_url=str(server.make_url("/v3")), timeout=0.05, max_retries=0
+        )
+        try:
+            with pytest.raises(PaymentGatewayError):
+                await gateway.create_payment(PAYLOAD)
+        finally:
+            await gateway.close()
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+from bot.handlers.onboarding_callbacks import build_rescue_plan
+from bot.handlers.pdf_generator import PlanPDFRenderer, render_plan_pdf
+
+PLAN_TEXT = "### ЭТАП 1\n- Убрать повреждённые листья\n\nПоливать раз в неделю."
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+def test_render_plan_pdf_returns_pdf_bytes_on_repeated_calls() -> None:
+    first = render_plan_pdf(PLAN_TEXT, "Протокол Реанимации №1")
+    second = render_plan_pdf(PLAN_TEXT * 40, "Протокол Реанимации №2")
+
+    assert first.startswith(b"%PDF")
+    assert second.startswith(b"%PDF")
+    assert len(second) > len(first)
+
+
+@pytest.mark.anyio
+async def test_renderer_without_workers_renders_in_a_thread() -> None:
+    renderer = PlanPDFRenderer(workers=0)
+
+    pdf_bytes = await renderer.render(PLAN_TEXT, "Протокол Реанимации №3")
+
+    assert pdf_bytes.startswith(b"%PDF")
+    renderer.close()
+
+
+class FakeResult:
+    def __init__(self, analysis) -> None:
+        self.analysis = analysis
+
+    def scalar_one_or_none(self):
+        return self.analysis
+
+
+class FakeSession:
+    def __init__(self, analysis) -> None:
+        self.analysis = analysis
+
+    async def execute(self, _stmt) -> FakeResult:
+        return FakeResult(self.analysis)
+
+
+class FakeMessage:
+    def __init__(self) -> None:
+        self.documents: list[object] = []
+
+    async def answer_document(self, document, **_kwargs) -> None:
+        self.documents.append(document)
+
+
+@pytest.mark.anyio
+async def test_stored_plan_is_resent_without_rendering() -> None:
+    analysis = SimpleNamespace(id=1, thread_id="resp_1", plan_file_id="plan_file_1")
+    message = FakeMessage()
+
+    await build_rescue_plan(message, SimpleNamespace(tg_id=1), FakeSession(analysis), openai_client=None)
+
+    assert message.documents == ["plan_file_1"]
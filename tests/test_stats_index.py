@@ -0,0 +1,100 @@
+import json
+from datetime import UTC, datetime, timedelta
+
+from bot.controllers.statistics import (
+    StatsIndex,
+    build_stat_message,
+    build_stats_snapshot,
+    build_stats_snapshots,
+    day_windows,
+    iter_stat_events,
+)
+
+
+def log_line(timestamp: datetime, message: str) -> str:
+    return f"{timestamp.strftime('%d.%m.%Y %H:%M:%S.%f%z')} | {message}\n"
+
+
+def photo_update(user_id: int) -> str:
+    return json.dumps({"update_id": 1, "message": {"from_user": {"id": user_id, "is_bot": False}, "photo": []}})
+
+
+DAY = datetime(2026, 5, 4, 10, 0, tzinfo=UTC)
+
+
+def test_refresh_parses_only_appended_lines(tmp_path) -> None:
+    log_path = tmp_path / "suslik_robot.log"
+    log_path.write_text(log_line(DAY, build_stat_message("Start_bot", 1)) + log_line(DAY, photo_update(1)))
+    index = StatsIndex(tmp_path / "stats_index.json")
+
+    index.refresh([log_path])
+    with log_path.open("a") as log_file:
+        log_file.write(log_line(DAY + timedelta(days=1), build_stat_message("Start_bot", 2)))
+        log_file.write(log_line(DAY + timedelta(days=1), photo_update(1)))
+        log_file.write("04.05.2026 12:00:00.000000+0000 | STAT|event=Paywa")
+    index.refresh([log_path])
+
+    snapshot = index.snapshot(None, None)
+    assert snapshot.start_bot == 2  # noqa: PLR2004
+    assert snapshot.photo_upload == 1
+    assert snapshot.paywall_view == 0
+    assert snapshot == build_stats_snapshot(iter_stat_events([log_path]), None, None)
+
+
+def test_counters_survive_rotation_and_restart(tmp_path) -> None:
+    log_path = tmp_path / "suslik_robot.log"
+    rotated_path = tmp_path / "suslik_robot.log.1"
+    index_path = tmp_path / "stats_index.json"
+    log_path.write_text(log_line(DAY, build_stat_message("Start_bot", 1)))
+    StatsIndex(index_path).refresh([log_path])
+
+    log_path.rename(rotated_path)
+    log_path.write_text(log_line(DAY + timedelta(days=2), build_stat_message("Payment_success", 1)))
+    index = StatsIndex(index_path)
+    index.refresh([log_path, rotated_path])
+    rotated_path.unlink()
+    index.refresh([log_path])
+
+    assert index.snapshot(None, None).start_bot == 1
+    assert index.snapshot(None, None).payment_success == 1
+    assert len(index.files) == 1
+
+
+def test_snapshot_sums_hourly_buckets_in_period(tmp_path) -> None:
+    log_path = tmp_path / "suslik_robot.log"
+    log_path.write_text(
+        "".join(
+            log_line(DAY + timedelta(hours=hours), build_stat_message("Diagnosis_result", 1))
+            for hours in (-30, -2, 0, 5, 30)
+        )
+    )
+    index = StatsIndex(tmp_path / "stats_index.json")
+    index.refresh([log_path])
+
+    assert index.snapshot(DAY - timedelta(hours=2), DAY + timedelta(hours=5)).diagnosis_result == 2  # noqa: PLR2004
+    assert index.snapshot(DAY, None).diagnosis_result == 3  # noqa: PLR2004
+    assert index.snapshot(None, DAY).diagnosis_result == 2  # noqa: PLR2004
+
+
+def test_build_stats_snapshots_matches_per_window_scan() -> None:
+    events = [
+        (DAY + timedelta(hours=hours), event)
+        for hours in range(-100, 100, 7)
+        for event in ("Start_bot", "Paywall_view", "Unknown")
+    ]
+    windows = [(None, None), (DAY, None), (None, DAY), *day_windows(DAY - timedelta(days=2), DAY + timedelta(days=2))]
+
+    def scan(start_at, end_at) -> int:
+        return sum(
+            1
+            for timestamp, event in events
+            if event == "Start_bot"
+            and (start_at is None or timestamp >= start_at)
+            and (end_at is None or timestamp < end_at)
+        )
+
+    snapshots = build_stats_snapshots(reversed(events), windows)
+
+    assert [snapshot.start_bot for snapshot in snapshots] == [scan(*window) for window in windows]
+    assert snapshots[0].paywall_view == len(events) // 3
+    assert len(day_windows(DAY, DAY + timedelta(days=2))) == 3  # noqa: PLR2004
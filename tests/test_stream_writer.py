@@ -0,0 +1,71 @@
+import pytest
+
+from bot.controllers.base import refactor_string
+from bot.controllers.streaming import TelegramStreamWriter
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakeSentMessage:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.edits = 0
+
+    async def edit_text(self, text: str, **_kwargs) -> None:
+        self.text = text
+        self.edits += 1
+
+
+class FakeMessage:
+    def __init__(self) -> None:
+        self.answers: list[FakeSentMessage] = []
+
+    async def answer(self, text: str, **_kwargs) -> FakeSentMessage:
+        sent = FakeSentMessage(text)
+        self.answers.append(sent)
+        return sent
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.anyio
+async def test_stream_writer_throttles_edits_and_renders_final_text() -> None:
+    message = FakeMessage()
+    clock = FakeClock()
+    writer = TelegramStreamWriter(message, edit_interval=1.0, clock=clock)
+
+    await writer.feed("## Полив\n")
+    await writer.feed("Раз в **неделю**")
+    await writer.feed(".")
+    clock.now = 2.0
+    await writer.feed("\nГотово!")
+    sent = await writer.finish()
+
+    assert len(sent) == 1
+    assert sent[0].edits == 1
+    assert sent[0].text == refactor_string("## Полив\nРаз в **неделю**.\nГотово!")
+
+
+@pytest.mark.anyio
+async def test_stream_writer_rolls_over_to_new_message() -> None:
+    message = FakeMessage()
+    writer = TelegramStreamWriter(message, limit=40, edit_interval=0.0)
+
+    for line in ["первая строка ответа", "вторая строка ответа", "третья строка ответа"]:
+        await writer.feed(line + "\n")
+    sent = await writer.finish()
+
+    assert len(sent) > 1
+    assert all(len(item.text) <= 40 for item in sent)  # noqa: PLR2004
+    assert "\n".join(item.text for item in sent).split() == refactor_string(
+        "первая строка ответа\nвторая строка ответа\nтретья строка ответа"
+    ).split()
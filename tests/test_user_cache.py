@@ -0,0 +1,106 @@
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.orm import make_transient_to_detached
+
+from bot.controllers.user_cache import UserCache
+from database.models import User
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_user(tg_id: int, action_count: int = 0) -> User:
+    user = User(
+        id=tg_id,
+        created_at=datetime(2026, 1, 1, tzinfo=UTC),
+        tg_id=tg_id,
+        fullname="Test User",
+        username="test",
+        ai_thread=None,
+        action_count=action_count,
+        is_subscribed=False,
+        subscription_duration=None,
+        is_autopayment_enabled=False,
+        is_context_added=False,
+        expired_at=None,
+        space=None,
+        geography=None,
+        request=None,
+        payment_method_id=None,
+        source=None,
+    )
+    make_transient_to_detached(user)
+    return user
+
+
+class FakeSession:
+    def __init__(self, users: dict[int, User], on_execute=None) -> None:
+        self.users = users
+        self.on_execute = on_execute
+        self.selects = 0
+        self.merged: list[User] = []
+
+    async def execute(self, query):
+        self.selects += 1
+        if self.on_execute is not None:
+            self.on_execute()
+        tg_id = query.whereclause.right.value
+        return SimpleNamespace(scalar_one_or_none=lambda: self.users.get(tg_id))
+
+    async def merge(self, instance, *, load=True):
+        assert load is False
+        self.merged.append(instance)
+        return instance
+
+
+@pytest.mark.anyio
+async def test_user_cache_skips_select_for_returning_user_until_invalidated() -> None:
+    cache = UserCache()
+    session = FakeSession({1: make_user(1, action_count=3)})
+
+    first = await cache.get_user(1, session)
+    second = await cache.get_user(1, session)
+    cache.invalidate_local(1)
+    await cache.get_user(1, session)
+
+    assert session.selects == 2  # noqa: PLR2004
+    assert second is not first
+    assert second.action_count == 3  # noqa: PLR2004
+    assert session.merged == [second]
+
+
+@pytest.mark.anyio
+async def test_user_cache_expires_entries_and_evicts_least_recently_used() -> None:
+    clock = FakeClock()
+    cache = UserCache(maxsize=2, ttl=10, clock=clock)
+    for tg_id in (1, 2):
+        cache.put(make_user(tg_id))
+    cache.get_values(1)
+    cache.put(make_user(3))
+
+    assert cache.get_values(2) is None
+    assert cache.get_values(1) is not None
+    clock.now = 11
+    assert cache.get_values(1) is None
+
+
+@pytest.mark.anyio
+async def test_user_cache_does_not_store_row_read_during_invalidation() -> None:
+    cache = UserCache()
+    session = FakeSession({1: make_user(1)}, on_execute=lambda: cache.invalidate_local(1))
+
+    await cache.get_user(1, session)
+
+    assert cache.get_values(1) is None
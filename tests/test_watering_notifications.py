@@ -0,0 +1,164 @@
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError, TelegramRetryAfter
+
+from bot.controllers import watering_notifications as notifications_module
+from bot.controllers.watering_notifications import (
+    NotificationDispatcher,
+    ThrottledNotificationDispatcher,
+    WateringNotificationService,
+)
+from bot.controllers.watering_schedule import FAILED_REMINDER_RETRY_SECONDS
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class RecordingDispatcher(NotificationDispatcher):
+    def __init__(self, failing_plant_ids: set[int] | None = None, dead_chat_ids: set[int] | None = None) -> None:
+        self.sent: list[tuple[int, int]] = []
+        self.failing_plant_ids = failing_plant_ids or set()
+        self.dead_chat_ids = dead_chat_ids or set()
+
+    async def send_watering_reminder(self, *, chat_id: int, plant_id: int, plant_name: str) -> None:  # noqa: ARG002
+        if chat_id in self.dead_chat_ids:
+            raise TelegramBadRequest(method=SimpleNamespace(), message="Bad Request: chat not found")
+        if plant_id in self.failing_plant_ids:
+            raise TelegramNetworkError(method=SimpleNamespace(), message="telegram is down")
+        self.sent.append((chat_id, plant_id))
+
+
+class FakeSession:
+    def __init__(self, events: list[str]) -> None:
+        self.events = events
+
+    async def commit(self) -> None:
+        self.events.append("commit")
+
+
+@pytest.mark.anyio
+async def test_notify_due_plants_commits_each_claim_before_sending(monkeypatch) -> None:
+    now = datetime(2026, 5, 4, 9, 0, tzinfo=UTC)
+    batches = [
+        [SimpleNamespace(id=1, user_tg_id=10, name="Фикус"), SimpleNamespace(id=2, user_tg_id=10, name="Кактус")],
+        [SimpleNamespace(id=3, user_tg_id=20, name="Монстера")],
+    ]
+    events: list[str] = []
+
+    async def fake_claim_due_plants(_db_session, query_now, *, limit, test_repeat_minutes):  # noqa: ARG001
+        assert query_now == now
+        events.append("claim")
+        return batches.pop(0) if batches else []
+
+    async def fake_release_claimed_plants(_db_session, plant_ids, _now, *, test_repeat_minutes):  # noqa: ARG001
+        events.append(f"release {plant_ids}")
+
+    monkeypatch.setattr(notifications_module, "claim_due_plants", fake_claim_due_plants)
+    monkeypatch.setattr(notifications_module, "release_claimed_plants", fake_release_claimed_plants)
+    dispatcher = RecordingDispatcher(failing_plant_ids={2})
+    service = WateringNotificationService(dispatcher)
+
+    sent_count = await service.notify_due_plants(db_session=FakeSession(events), now=now, batch_size=2)
+
+    assert sent_count == 2  # noqa: PLR2004
+    assert dispatcher.sent == [(10, 1), (20, 3)]
+    assert events == ["claim", "commit", "claim", "commit", "release [2]", "commit"]
+
+
+class RecordingSchedule:
+    def __init__(self) -> None:
+        self.applied: list[tuple[int, datetime | None]] = []
+
+    async def apply(self, entries) -> None:
+        self.applied.extend(entries)
+
+    async def due_plant_ids(self, _now: datetime) -> list[int]:
+        return []
+
+
+@pytest.mark.anyio
+async def test_reminders_failed_in_throttled_dispatcher_are_released(monkeypatch) -> None:
+    now = datetime(2026, 5, 4, 9, 0, tzinfo=UTC)
+    batches = [[SimpleNamespace(id=plant_id, user_tg_id=10, name="Фикус", next_watering_at=now) for plant_id in (1, 2)]]
+    released: list[int] = []
+
+    async def fake_claim_due_plants(_db_session, _now, *, limit, test_repeat_minutes):  # noqa: ARG001
+        return batches.pop(0) if batches else []
+
+    async def fake_release_claimed_plants(_db_session, plant_ids, _now, *, test_repeat_minutes):  # noqa: ARG001
+        released.extend(plant_ids)
+
+    monkeypatch.setattr(notifications_module, "claim_due_plants", fake_claim_due_plants)
+    monkeypatch.setattr(notifications_module, "release_claimed_plants", fake_release_claimed_plants)
+    inner = RecordingDispatcher(failing_plant_ids={2})
+    dispatcher = ThrottledNotificationDispatcher(inner, rate=1000, per_chat_interval=0)
+    schedule = RecordingSchedule()
+    service = WateringNotificationService(dispatcher, schedule)
+    try:
+        sent_count = await service.notify_due_plants(db_session=FakeSession([]), now=now)
+    finally:
+        await dispatcher.close()
+
+    assert sent_count == 1
+    assert inner.sent == [(10, 1)]
+    assert released == [2]
+    assert schedule.applied[-1] == (2, now + timedelta(seconds=FAILED_REMINDER_RETRY_SECONDS))
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("throttled", [False, True])
+async def test_reminders_to_dead_chats_are_not_released(monkeypatch, throttled: bool) -> None:
+    now = datetime(2026, 5, 4, 9, 0, tzinfo=UTC)
+    batches = [[SimpleNamespace(id=plant_id, user_tg_id=plant_id * 10, name="Фикус") for plant_id in (1, 2, 3)]]
+    released: list[int] = []
+
+    async def fake_claim_due_plants(_db_session, _now, *, limit, test_repeat_minutes):  # noqa: ARG001
+        return batches.pop(0) if batches else []
+
+    async def fake_release_claimed_plants(_db_session, plant_ids, _now, *, test_repeat_minutes):  # noqa: ARG001
+        released.extend(plant_ids)
+
+    monkeypatch.setattr(notifications_module, "claim_due_plants", fake_claim_due_plants)
+    monkeypatch.setattr(notifications_module, "release_claimed_plants", fake_release_claimed_plants)
+    inner = RecordingDispatcher(failing_plant_ids={3}, dead_chat_ids={20})
+    dispatcher = ThrottledNotificationDispatcher(inner, rate=1000, per_chat_interval=0) if throttled else inner
+    try:
+        await WateringNotificationService(dispatcher).notify_due_plants(db_session=FakeSession([]), now=now)
+    finally:
+        if throttled:
+            await dispatcher.close()
+
+    assert inner.sent == [(10, 1)]
+    assert released == [3]
+
+
+@pytest.mark.anyio
+async def test_throttled_dispatcher_retries_after_flood_control_and_reports() -> None:
+    class FloodOnceDispatcher(RecordingDispatcher):
+        def __init__(self) -> None:
+            super().__init__()
+            self.flooded = False
+
+        async def send_watering_reminder(self, *, chat_id: int, plant_id: int, plant_name: str) -> None:
+            if not self.flooded:
+                self.flooded = True
+                raise TelegramRetryAfter(method=SimpleNamespace(), message="Too Many Requests", retry_after=0)
+            await super().send_watering_reminder(chat_id=chat_id, plant_id=plant_id, plant_name=plant_name)
+
+    inner = FloodOnceDispatcher()
+    dispatcher = ThrottledNotificationDispatcher(inner, rate=1000, concurrency=3, per_chat_interval=0)
+    try:
+        for plant_id in range(5):
+            await dispatcher.send_watering_reminder(chat_id=plant_id, plant_id=plant_id, plant_name="Фикус")
+        report = await dispatcher.drain()
+    finally:
+        await dispatcher.close()
+
+    assert sorted(plant_id for _, plant_id in inner.sent) == [0, 1, 2, 3, 4]
+    assert report.sent == 5  # noqa: PLR2004
+    assert report.retried == 1
+    assert report.failed == 0
@@ -0,0 +1,141 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from bot.controllers.watering_schedule import RECHECK_DELAY_SECONDS, WateringSchedule, schedule_due_at
+
+NOW = datetime(2026, 5, 4, 9, 30, tzinfo=UTC)
+TOMORROW = datetime(2026, 5, 5, tzinfo=UTC)
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.commands: list[tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *_args) -> None:
+        return None
+
+    def __getattr__(self, name: str):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+
+        return queue
+
+    async def execute(self) -> list:
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.lists: dict[str, list[str]] = {}
+        self.pushed = asyncio.Event()
+
+    def pipeline(self, *, transaction: bool = True) -> FakePipeline:  # noqa: ARG002
+        return FakePipeline(self)
+
+    async def zadd(self, key: str, mapping: dict[str, float]) -> int:
+        self.zsets.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    async def zrem(self, key: str, *members: str) -> int:
+        zset = self.zsets.get(key, {})
+        return sum(zset.pop(member, None) is not None for member in members)
+
+    async def zrange(self, key: str, start: int, end: int, *, withscores: bool = False) -> list:
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+        items = items[start:] if end == -1 else items[start : end + 1]
+        return items if withscores else [member for member, _ in items]
+
+    async def zrangebyscore(self, key: str, low: str, high: float) -> list[str]:  # noqa: ARG002
+        return [member for member, score in await self.zrange(key, 0, -1, withscores=True) if score <= high]
+
+    async def lpush(self, key: str, *values: object) -> int:
+        self.lists.setdefault(key, [])[:0] = [str(value) for value in reversed(values)]
+        self.pushed.set()
+        return len(self.lists[key])
+
+    async def ltrim(self, key: str, start: int, end: int) -> None:
+        self.lists[key] = self.lists.get(key, [])[start : end + 1]
+
+    async def blpop(self, keys: list[str], timeout: float) -> tuple[str, str] | None:  # noqa: ASYNC109
+        try:
+            async with asyncio.timeout(timeout):
+                while not any(self.lists.get(key) for key in keys):
+                    self.pushed.clear()
+                    await self.pushed.wait()
+        except TimeoutError:
+            return None
+        key = next(key for key in keys if self.lists.get(key))
+        return key, self.lists[key].pop(0)
+
+
+def test_schedule_due_at_keeps_future_due_time() -> None:
+    due_at = NOW + timedelta(days=3)
+
+    assert schedule_due_at(due_at, None, NOW) == due_at
+
+
+def test_schedule_due_at_parks_reminded_and_inactive_plants_until_tomorrow() -> None:
+    overdue = NOW - timedelta(days=1)
+
+    assert schedule_due_at(overdue, NOW - timedelta(hours=1), NOW) == TOMORROW
+    assert schedule_due_at(overdue, None, NOW, is_active=False) == TOMORROW
+
+
+def test_schedule_due_at_drops_disabled_and_rechecks_raced_plants() -> None:
+    overdue = NOW - timedelta(minutes=5)
+
+    assert schedule_due_at(overdue, None, NOW, notifications_enabled=False) is None
+    assert schedule_due_at(overdue, None, NOW, recheck=True) == NOW + timedelta(seconds=RECHECK_DELAY_SECONDS)
+
+
+@pytest.mark.anyio
+async def test_schedule_keeps_due_times_in_sorted_set() -> None:
+    redis = FakeRedis()
+    schedule = WateringSchedule(redis)
+
+    await schedule.apply([(1, NOW + timedelta(hours=2)), (2, NOW - timedelta(minutes=1)), (3, NOW)])
+    await schedule.apply([(3, None)])
+
+    assert await schedule.due_plant_ids(NOW) == [2]
+    assert await schedule.seconds_until_next(NOW) == 0
+    await schedule.unschedule(2)
+    assert await schedule.seconds_until_next(NOW) == timedelta(hours=2).total_seconds()
+
+
+@pytest.mark.anyio
+async def test_sooner_due_time_wakes_waiting_worker() -> None:
+    redis = FakeRedis()
+    schedule = WateringSchedule(redis)
+    await schedule.schedule(1, NOW + timedelta(hours=2))
+    redis.lists.clear()
+
+    waiter = asyncio.create_task(schedule.wait_for_change(max_wait=5))
+    await asyncio.sleep(0)
+    await schedule.schedule(2, NOW + timedelta(days=1))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    await schedule.schedule(3, NOW + timedelta(minutes=1))
+
+    assert await asyncio.wait_for(waiter, 1)
+    assert redis.lists[schedule.wakeup_key] == []
+
+
+@pytest.mark.anyio
+async def test_wait_for_change_times_out_without_new_due_times() -> None:
+    schedule = WateringSchedule(FakeRedis())
+
+    assert not await schedule.wait_for_change(max_wait=0.01)
+    assert not await schedule.wait_for_change(max_wait=0)
@@ -93,7 +93,6 @@ async def test_successful_payment_opens_access_and_duplicate_is_idempotent(monke
     monkeypatch.setattr(webhook_module, "Redis", lambda *_args, **_kwargs: object())
     monkeypatch.setattr(webhook_module, "RedisStorage", lambda *_: object())
     monkeypatch.setattr(webhook_module, "FSMContext", lambda *_args, **_kwargs: FakeFSMContext())
-    monkeypatch.setattr(webhook_module, "FSInputFile", lambda path: path)
     async def fake_get_payment_from_db(*_args, **_kwargs):
         return payment
 
@@ -0,0 +1,69 @@
+"""
+Local YooKassa stand-in for tests and manual runs.
+
+    python tests/yookassa_stub_server.py --port 8081
+    SHOP_API_URL=http://127.0.0.1:8081/v3 bot-run
+"""
+
+import argparse
+import asyncio
+from uuid import uuid4
+
+from aiohttp import web
+
+
+def build_app(*, delay: float = 0.0, fail_first: int = 0) -> web.Application:
+    app = web.Application()
+    app["payments_by_key"] = {}
+    app["requests"] = []
+    app["failures_left"] = fail_first
+
+    async def create_payment(request: web.Request) -> web.Response:
+        key = request.headers.get("Idempotence-Key")
+        payload = await request.json()
+        request.app["requests"].append({"idempotence_key": key, "payload": payload})
+        if delay:
+            await asyncio.sleep(delay)
+        if not key:
+            return web.json_response(
+                {"type": "error", "code": "invalid_request", "description": "Idempotence-Key header is missing"},
+                status=400,
+            )
+        if request.app["failures_left"] > 0:
+            request.app["failures_left"] -= 1
+            return web.json_response({"type": "error", "code": "internal_server_error"}, status=500)
+        payments = request.app["payments_by_key"]
+        if key not in payments:
+            payment_id = str(uuid4())
+            payments[key] = {
+                "id": payment_id,
+                "status": "succeeded" if "payment_method_id" in payload else "pending",
+                "paid": False,
+                "amount": payload["amount"],
+                "description": payload.get("description"),
+                "metadata": payload.get("metadata", {}),
+                "created_at": "2024-01-01T00:00:00.000Z",
+                "test": True,
+                "refundable": False,
+                "confirmation": {
+                    "type": "redirect",
+                    "confirmation_url": f"https://yoomoney.ru/checkout/payments/v2/contract?orderId={payment_id}",
+                },
+            }
+        return web.json_response(payments[key])
+
+    app.router.add_post("/v3/payments", create_payment)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local YooKassa stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--delay", type=float, default=0.0, help="Artificial latency per request, seconds")
+    args = parser.parse_args()
+    web.run_app(build_app(delay=args.delay), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()